@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Agrupación de la misma historia publicada por varias fuentes (cluster_id).
+
+Cada título se reduce al conjunto de sus raíces (buscador.tokenizar) y se
+resume con una firma MinHash. Un índice LSH por bandas propone candidatas
+entre las noticias de la VENTANA reciente, y se confirma con la similitud de
+Jaccard exacta de los conjuntos. Una noticia parecida a otra hereda su
+cluster_id; si no, abre un grupo con su propio id.
+
+El oyente de ingesta asigna cluster_id a cada lote guardado. Para agrupar las
+noticias existentes:
+
+    python agrupamiento.py
+"""
+
+import sys
+import os
+import random
+import hashlib
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from functools import lru_cache
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mysql.connector import Error
+from buscador import tokenizar
+
+# ----------------- CONFIG AGRUPAMIENTO -----------------
+# Títulos de la misma historia en distintas fuentes comparten ~50-70% de sus
+# palabras ("Huaico en Huánuco bloquea la carretera central" / "Huaicos en
+# Huánuco bloquean carretera central"); titulares distintos casi ninguna.
+UMBRAL_JACCARD = 0.5
+# 10 bandas de 2 valores: un par con Jaccard 0.5 es candidato con p ≈ 0.94
+BANDAS = 10
+FILAS_POR_BANDA = 2
+PERMUTACIONES = BANDAS * FILAS_POR_BANDA
+MIN_TERMINOS = 3          # títulos más cortos no se agrupan
+VENTANA = timedelta(days=3)
+TAM_LOTE_REAGRUPAR = 5000
+
+_PRIMO = (1 << 61) - 1
+_rnd = random.Random(20240501)
+_COEFICIENTES = [(_rnd.randrange(1, _PRIMO), _rnd.randrange(0, _PRIMO)) for _ in range(PERMUTACIONES)]
+
+
+@lru_cache(maxsize=200_000)
+def _hashes_termino(termino):
+    # Los PERMUTACIONES hashes de un término se calculan una vez: el vocabulario
+    # de los títulos se repite mucho y la firma queda en un min() por posición
+    base = int.from_bytes(hashlib.blake2b(termino.encode("utf-8"), digest_size=8).digest(), "little")
+    return tuple((a * base + b) % _PRIMO for a, b in _COEFICIENTES)
+
+
+def terminos_titulo(titulo):
+    return frozenset(tokenizar(titulo))
+
+
+def firma_minhash(terminos):
+    """
+    Firma MinHash del conjunto de términos (tupla de PERMUTACIONES enteros).
+    """
+    return tuple(map(min, zip(*(_hashes_termino(t) for t in terminos))))
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def _como_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor
+    if isinstance(valor, str) and valor:
+        try:
+            return datetime.fromisoformat(valor)
+        except ValueError:
+            pass
+    return datetime.now()
+
+
+class AgrupadorNoticias:
+    """
+    Índice LSH de las noticias de la ventana reciente para asignar cluster_id.
+
+    Las noticias deben llegar aproximadamente en orden de fecha_scraping: las
+    que salen de la ventana se olvidan.
+    """
+
+    def __init__(self, ventana=VENTANA, umbral=UMBRAL_JACCARD):
+        self.ventana = ventana
+        self.umbral = umbral
+        self._bandas = [{} for _ in range(BANDAS)]
+        self._docs = {}          # id -> (terminos, firma, cluster_id)
+        self._orden = deque()    # (fecha, id) en orden de llegada
+        self._ultima_fecha = None
+        # Mayor id leído de la BD (ver _cargar_ventana)
+        self.ultimo_id = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _claves(self, firma):
+        return [firma[i * FILAS_POR_BANDA:(i + 1) * FILAS_POR_BANDA] for i in range(BANDAS)]
+
+    def _olvidar_antiguas(self, fecha):
+        if self._ultima_fecha is None or fecha > self._ultima_fecha:
+            self._ultima_fecha = fecha
+        limite = self._ultima_fecha - self.ventana
+        while self._orden and self._orden[0][0] < limite:
+            _, doc_id = self._orden.popleft()
+            _, firma, _ = self._docs.pop(doc_id)
+            for banda, clave in zip(self._bandas, self._claves(firma)):
+                ids = banda[clave]
+                ids.remove(doc_id)
+                if not ids:
+                    del banda[clave]
+
+    def _indexar(self, doc_id, terminos, firma, cluster_id, fecha):
+        self._docs[doc_id] = (terminos, firma, cluster_id)
+        self._orden.append((fecha, doc_id))
+        for banda, clave in zip(self._bandas, self._claves(firma)):
+            banda.setdefault(clave, []).append(doc_id)
+
+    def registrar(self, doc_id, titulo, fecha, cluster_id):
+        """
+        Agrega una noticia ya agrupada (al cargar la ventana desde la BD).
+        """
+        terminos = terminos_titulo(titulo)
+        if len(terminos) < MIN_TERMINOS or doc_id in self._docs:
+            return
+        with self._lock:
+            fecha = _como_fecha(fecha)
+            self._olvidar_antiguas(fecha)
+            self._indexar(doc_id, terminos, firma_minhash(terminos), cluster_id or doc_id, fecha)
+
+    def asignar(self, doc_id, titulo, fecha=None):
+        """
+        Devuelve el cluster_id de la noticia y la agrega al índice.
+        """
+        terminos = terminos_titulo(titulo)
+        if len(terminos) < MIN_TERMINOS:
+            return doc_id
+        firma = firma_minhash(terminos)
+        with self._lock:
+            fecha = _como_fecha(fecha)
+            self._olvidar_antiguas(fecha)
+            if doc_id in self._docs:
+                return self._docs[doc_id][2]
+
+            candidatas = set()
+            for banda, clave in zip(self._bandas, self._claves(firma)):
+                candidatas.update(banda.get(clave, ()))
+            mejor, mejor_similitud = None, self.umbral
+            for otro in candidatas:
+                similitud = jaccard(terminos, self._docs[otro][0])
+                if similitud > mejor_similitud or (similitud == mejor_similitud and (mejor is None or otro < mejor)):
+                    mejor, mejor_similitud = otro, similitud
+            cluster_id = self._docs[mejor][2] if mejor is not None else doc_id
+            self._indexar(doc_id, terminos, firma, cluster_id, fecha)
+            return cluster_id
+
+    def asignar_lote(self, noticias):
+        """
+        Asigna cluster_id a una lista de noticias (dicts con id, titulo y
+        fecha_scraping). Devuelve [(cluster_id, id)], listo para el UPDATE.
+        """
+        return [(self.asignar(n["id"], n.get("titulo"), n.get("fecha_scraping")), n["id"]) for n in noticias]
+
+
+# ----------------- AGRUPADOR DEL PROCESO -----------------
+_agrupador = None
+_agrupador_lock = threading.Lock()
+
+SQL_ASIGNAR = "UPDATE noticias SET cluster_id = %s WHERE id = %s"
+
+
+def _cargar_ventana(conn, agrupador):
+    # Noticias ya agrupadas de la ventana, para que las nuevas encuentren su
+    # grupo: la primera vez toda la ventana; después, solo las de id posterior
+    # a la última leída (las que agrupó otro proceso, p. ej. scraper.py)
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(
+            "SELECT id, titulo, fecha_scraping, cluster_id FROM noticias "
+            "WHERE id > %s AND fecha_scraping >= %s AND cluster_id IS NOT NULL ORDER BY id",
+            (agrupador.ultimo_id, datetime.now() - agrupador.ventana)
+        )
+        for fila in cursor.fetchall():
+            agrupador.registrar(fila["id"], fila["titulo"], fila["fecha_scraping"], fila["cluster_id"])
+            agrupador.ultimo_id = fila["id"]
+    finally:
+        cursor.close()
+
+
+def asignar_por_ingesta(noticias):
+    """
+    Oyente de ingesta (db.registrar_oyente_ingesta): asigna cluster_id a las
+    noticias nuevas. Debe registrarse antes de invalidar la cache de respuestas.
+    """
+    global _agrupador
+    if not noticias:
+        return
+    from db import conectar
+
+    conn = conectar()
+    if not conn:
+        return
+    try:
+        with _agrupador_lock:
+            if _agrupador is None:
+                _agrupador = AgrupadorNoticias()
+            _cargar_ventana(conn, _agrupador)
+        asignaciones = _agrupador.asignar_lote(sorted(noticias, key=lambda n: n["id"]))
+        cursor = conn.cursor()
+        cursor.executemany(SQL_ASIGNAR, asignaciones)
+        conn.commit()
+        cursor.close()
+    except Error as e:
+        print(f"⚠️ No se pudo agrupar el lote de noticias: {e}")
+    finally:
+        conn.close()
+
+
+def reagrupar_todo(tam_lote=TAM_LOTE_REAGRUPAR):
+    """
+    Recalcula cluster_id de toda la tabla en orden de id, por lotes.
+    """
+    from db import conectar
+
+    conn = conectar()
+    if not conn:
+        return False
+    agrupador = AgrupadorNoticias()
+    procesadas = grupos = 0
+    try:
+        lectura = conn.cursor(dictionary=True)
+        escritura = conn.cursor()
+        ultimo_id = 0
+        while True:
+            lectura.execute(
+                "SELECT id, titulo, fecha_scraping FROM noticias WHERE id > %s ORDER BY id LIMIT %s",
+                (ultimo_id, tam_lote)
+            )
+            filas = lectura.fetchall()
+            if not filas:
+                break
+            asignaciones = agrupador.asignar_lote(filas)
+            escritura.executemany(SQL_ASIGNAR, asignaciones)
+            conn.commit()
+            procesadas += len(filas)
+            grupos += sum(1 for cluster_id, doc_id in asignaciones if cluster_id == doc_id)
+            ultimo_id = filas[-1]["id"]
+            print(f"   {procesadas} noticias agrupadas")
+        print(f"✅ {procesadas} noticias en {grupos} grupos")
+        # Los listados con agrupar=1 cambian: invalidar las respuestas cacheadas
+        from cache_respuestas import obtener_cache_respuestas
+        obtener_cache_respuestas().incrementar_generacion()
+        return True
+    except Error as e:
+        print(f"❌ Error al reagrupar noticias: {e}")
+        return False
+    finally:
+        if conn.is_connected():
+            conn.close()
+
+
+if __name__ == "__main__":
+    exit(0 if reagrupar_todo() else 1)
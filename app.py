@@ -1,16 +1,28 @@
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, jsonify, request, render_template, make_response, Response, stream_with_context
+from functools import wraps
+from contextlib import contextmanager
 import os
 from dotenv import load_dotenv
 import mysql.connector
 from mysql.connector import Error
-from datetime import datetime
+from datetime import datetime, timezone
+import hashlib
 import threading
 import time
-from bs4 import BeautifulSoup
-import requests
-from urllib.parse import urljoin
+from descargas import descargar_fuentes
+from scraper import procesar_fuente
 from sources import FUENTES, obtener_fuentes_por_categoria, obtener_categorias_disponibles, clasificar_noticia
-from db import crear_tabla_si_no_existe, obtener_departamentos_con_noticias, obtener_categorias_con_noticias
+from paginacion import CursorInvalido
+from consultas import ConsultaNoticias, FILTROS_IGUALDAD, CampoInvalido, ParametroInvalido, entero_positivo, resolver_campos, lista_select
+from buscador import obtener_indice, iniciar_calentamiento, refrescar_indice, reindexar_indice
+from exportacion import Exportacion, FORMATOS
+from agrupamiento import asignar_por_ingesta
+from clasificador import clasificar_tipo
+from estado_rastreo import EstadoRastreo
+from planificador import Planificador
+from relacionadas import leer_similares, vecinos_calculados, calcular_vecinos, guardar_vecinos, muestra_aleatoria, actualizar_por_ingesta
+from cache_respuestas import obtener_cache_respuestas, clave_cache, invalidar_por_ingesta
+from db import conectar, obtener_departamentos_con_noticias, obtener_categorias_con_noticias, guardar_noticias_lote, migrar_claves_hash, asegurar_indices_listado, asegurar_tabla_relacionadas, asegurar_tabla_crawl_state, obtener_filtro_enlaces, registrar_oyente_ingesta
 import re
 
 # ---------------- FLASK ----------------
@@ -57,7 +69,11 @@ def crear_base_y_tabla():
                 fuente VARCHAR(255),
                 departamento VARCHAR(50),
                 fecha_scraping DATETIME,
-                UNIQUE KEY unique_link (link)
+                cluster_id INT,
+                link_hash BINARY(16),
+                titulo_hash BINARY(16),
+                UNIQUE KEY uq_link_hash (link_hash),
+                UNIQUE KEY uq_titulo_hash (titulo_hash)
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
         """)
         # Intentar agregar columna tipo si la tabla ya existía
@@ -70,6 +86,11 @@ def crear_base_y_tabla():
             cursor.execute("ALTER TABLE noticias ADD COLUMN departamento VARCHAR(50)")
         except Exception:
             pass
+        # Intentar agregar columna cluster_id (agrupamiento) si la tabla ya existía
+        try:
+            cursor.execute("ALTER TABLE noticias ADD COLUMN cluster_id INT")
+        except Exception:
+            pass
         # Índices útiles (si ya existen, ignorar error)
         try:
             cursor.execute("CREATE INDEX idx_fecha ON noticias (fecha)")
@@ -93,219 +114,127 @@ def crear_base_y_tabla():
             pass
         conn.commit()
         conn.close()
+        # Claves hash para deduplicar (rellena filas antiguas si hace falta)
+        migrar_claves_hash()
+        # Índices para paginar por cursor en cada orden
+        asegurar_indices_listado()
+        # Vecinos precalculados de /api/noticias/relacionadas (modo=similar)
+        asegurar_tabla_relacionadas()
+        # Estado de rastreo que lee y escribe el scraping automático
+        asegurar_tabla_crawl_state()
         print(f"✅ Base y tabla '{DB_NAME}.noticias' verificadas/creadas.")
     except Error as e:
         print(f"❌ Error al crear la base o tabla: {e}")
 
 def get_connection():
-    try:
-        conn = mysql.connector.connect(
-            host=DB_HOST,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            database=DB_NAME
-        )
-        return conn
-    except Error as e:
-        print(f"❌ Error en la conexión a DB: {e}")
-        return None
-
-def guardar_noticia(titulo, link, categoria, fecha, resumen, autor, imagen, fuente, departamento=None):
+    # Conexión del pool compartido (db.py); conn.close() la devuelve al pool
+    return conectar()
+
+@contextmanager
+def conexion_bd():
+    """
+    Conexión del pool para una ruta (None si no hay). Vuelve al pool al salir
+    del with aunque la consulta falle: una conexión del pool que no se cierra
+    no vuelve nunca, y DB_POOL_SIZE errores bastan para agotarlo.
+    """
     conn = get_connection()
-    if not conn:
-        return False, "Error DB"
-
-    cursor = conn.cursor()
     try:
-        # Bloquear cualquier noticia de Peru21/Perú21
-        if fuente and fuente.strip().lower() in ("peru21", "perú21"):
-            conn.close()
-            return False, "Bloqueado"
-        cursor.execute("SELECT id FROM noticias WHERE link = %s OR titulo = %s", (link, titulo))
-        if cursor.fetchone():
+        yield conn
+    finally:
+        if conn:
             conn.close()
-            return False, "Duplicado"
 
-        fecha_scraping = datetime.now()
-        tipo = clasificar_tipo(titulo, resumen, categoria, fuente)
-        
-        # Si no se especifica categoría, clasificar automáticamente
-        if not categoria:
-            clasificacion = clasificar_noticia(titulo, resumen, "nacional")
-            categoria = clasificacion["categoria"]
-            if not departamento:
-                departamento = clasificacion["departamento"]
-        
-        cursor.execute("""
-            INSERT INTO noticias (titulo, link, categoria, tipo, fecha, resumen, autor, imagen, fuente, departamento, fecha_scraping)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """, (titulo, link, categoria, tipo, fecha, resumen, autor, imagen, fuente, departamento, fecha_scraping))
-        conn.commit()
-        conn.close()
-        return True, "Guardado"
-    except Error as e:
-        print(f"❌ Error al insertar noticia: {e}")
-        conn.close()
-        return False, "Error DB"
-
-# ---------------- CLASIFICACIÓN ----------------
-def clasificar_tipo(titulo, resumen, categoria, fuente):
-    texto = " ".join([str(x or "") for x in [titulo, resumen, categoria, fuente]]).lower()
-    reglas = [
-        ("deporte", ["deporte", "futbol", "fútbol", "liga", "partido", "gol", "selección", "mundial"]),
-        ("comedia", ["humor", "broma", "meme", "parodia", "satira", "sátira", "chiste"]),
-        ("economía", ["economía", "dólar", "inflación", "bcr", "mercado", "bolsa"]),
-        ("política", ["congreso", "presidente", "ministro", "política", "gobierno", "elecciones"]),
-        ("policial", ["policía", "pnp", "homicidio", "robo", "capturan", "detienen"]),
-        ("salud", ["salud", "hospital", "covid", "vacuna", "epidemia"]),
-        ("educación", ["educación", "universidad", "colegio", "estudiantes", "sunedu"]),
-    ]
-    for etiqueta, palabras in reglas:
-        if any(p in texto for p in palabras):
-            return etiqueta
-    return "informativo"
-
-def ultima_fecha_fuente(fuente):
-    conn = get_connection()
-    if not conn:
-        return None
-    cursor = conn.cursor()
-    cursor.execute("SELECT MAX(fecha_scraping) FROM noticias WHERE fuente = %s", (fuente,))
-    result = cursor.fetchone()
-    conn.close()
-    return result[0] if result[0] else None
+def guardar_noticia(titulo, link, categoria, fecha, resumen, autor, imagen, fuente, departamento=None):
+    # Si no se especifica categoría, clasificar automáticamente
+    if not categoria:
+        clasificacion = clasificar_noticia(titulo, resumen, "nacional")
+        categoria = clasificacion["categoria"]
+        if not departamento:
+            departamento = clasificacion["departamento"]
+
+    resultado = guardar_noticias_lote([{
+        "titulo": titulo, "link": link, "categoria": categoria,
+        "tipo": clasificar_tipo(titulo, resumen, categoria, fuente), "fecha": fecha,
+        "resumen": resumen, "autor": autor, "imagen": imagen, "fuente": fuente, "departamento": departamento,
+    }])
+    if resultado["insertadas"]: return True, "Guardado"
+    if resultado["bloqueadas"]: return False, "Bloqueado"
+    if resultado["duplicadas"]: return False, "Duplicado"
+    return False, "Error DB"
 
 # ---------------- FUENTES ----------------
 
-# ---------------- SCRAPER ----------------
-def scrape_fuente(fuente):
-    print(f"🌐 Scrapeando {fuente['fuente']}...")
-    ultima_fecha = ultima_fecha_fuente(fuente["fuente"])
-    nuevas = duplicados = errores = 0
-
-    try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0 Safari/537.36 NoticieroBot/1.0"
-        }
-        response = requests.get(fuente["url"], timeout=12, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-        # Nuevo esquema basado en container/title_selector/img_selector
-        items = []
-        use_container = bool(fuente.get("container"))
-        if use_container:
-            items = soup.select(fuente["container"]) or []
-        else:
-            articulos = soup.select(fuente.get("selector", "a")) or []
-            items = articulos
-
-        for i, item in enumerate(items):
-            # Título y enlace
-            anchor = None
-            if use_container and fuente.get("title_selector"):
-                anchor = item.select_one(fuente["title_selector"]) or item.find('a', href=True)
-            else:
-                anchor = item if getattr(item, 'name', None) == 'a' else item.find('a', href=True)
-            link = anchor.get('href') if anchor and anchor.has_attr('href') else None
-            titulo = anchor.get_text(strip=True) if anchor else (item.get_text(strip=True) if item else None)
-            if not titulo or not link:
-                continue
-            # Normalizar URL absoluta
-            link = urljoin(fuente["base"], link)
-
-            # Imagen por item
-            imagen = None
-            if use_container and fuente.get("img_selector"):
-                img_el = item.select_one(fuente["img_selector"].split("::attr(")[0].strip())
-                if img_el:
-                    imagen = img_el.get("src") or img_el.get("data-src") or img_el.get("data-img-url")
-                # Si el selector especifica ::attr(attr)
-                if not imagen and "::attr(" in fuente["img_selector"]:
-                    attr_name = fuente["img_selector"].split("::attr(",1)[1][:-1]
-                    if img_el and img_el.get(attr_name):
-                        imagen = img_el.get(attr_name)
-            elif not use_container and fuente.get("selector_img"):
-                # compatibilidad con esquema antiguo
-                sel_img = fuente["selector_img"]
-                if "::attr(" in sel_img and sel_img.endswith(")"):
-                    css_sel, attr_part = sel_img.split("::attr(", 1)
-                    attr_name = attr_part[:-1]
-                    el = soup.select_one(css_sel.strip())
-                    imagen = el.get(attr_name) if el else None
-                else:
-                    el = soup.select_one(sel_img)
-                    if el:
-                        imagen = el.get("src") or el.get("data-src") or el.get("data-img-url")
-            if imagen:
-                imagen = urljoin(fuente["base"], imagen)
-
-            # Categoría: usar category_selector si existe, si no, la fija de la fuente (si la hubiera)
-            categoria = None
-            if use_container and fuente.get("category_selector"):
-                cat_el = item.select_one(fuente["category_selector"]) 
-                if cat_el:
-                    categoria = cat_el.get_text(strip=True)
-            if not categoria:
-                categoria = fuente.get("categoria")
-            fecha = datetime.today().date()
-            resumen = None
-            if use_container and fuente.get("summary_selector"):
-                sum_el = item.select_one(fuente["summary_selector"]) 
-                if sum_el:
-                    resumen = sum_el.get_text(strip=True)
-            autor = None
-            if use_container and fuente.get("author_selector"):
-                aut_el = item.select_one(fuente["author_selector"]) 
-                if aut_el:
-                    autor = aut_el.get_text(strip=True)
-
-            # Intentar extraer fecha desde date_selector si existe
-            if use_container and fuente.get("date_selector"):
-                date_el = item.select_one(fuente["date_selector"]) 
-                if date_el:
-                    txt = date_el.get_text(strip=True)
-                    parsed = None
-                    try:
-                        if "/" in txt:
-                            parts = [p for p in txt.replace("\u00a0", " ").split("/") if p]
-                            if len(parts) >= 3:
-                                parsed = datetime(int(parts[2][:4]), int(parts[1]), int(parts[0])).date()
-                        elif "-" in txt:
-                            parts = [p for p in txt.split("-") if p]
-                            if len(parts) >= 3 and len(parts[0]) == 4:
-                                parsed = datetime(int(parts[0]), int(parts[1]), int(parts[2][:2])).date()
-                    except Exception:
-                        parsed = None
-                    if parsed:
-                        fecha = parsed
-
-            if not ultima_fecha or fecha > ultima_fecha.date():
-                # Clasificar automáticamente la noticia
-                clasificacion = clasificar_noticia(titulo, resumen, fuente.get("categoria", "nacional"))
-                
-                ok, mensaje = guardar_noticia(
-                    titulo, link, clasificacion["categoria"], fecha, resumen, autor, imagen, 
-                    fuente["fuente"], clasificacion["departamento"]
-                )
-                if ok: nuevas += 1
-                elif mensaje == "Duplicado": duplicados += 1
-                else: errores += 1
-            else:
-                duplicados += 1
-
-        print(f"✅ {fuente['fuente']} - Nuevas: {nuevas}, Duplicados: {duplicados}, Errores: {errores}")
-
-    except Exception as e:
-        print(f"❌ Error en {fuente['fuente']}: {e}")
+# ---------------- OYENTES DE INGESTA ----------------
+# Se registran al importar el módulo, así también valen bajo WSGI (donde no
+# corre el __main__) para lo que inserten el scraper automático y /api/scraping.
+# Índice de búsqueda: se actualiza con cada lote guardado
+registrar_oyente_ingesta(obtener_indice().agregar)
+# Relacionadas: vecinos de las noticias nuevas (después de indexarlas)
+registrar_oyente_ingesta(actualizar_por_ingesta)
+# Agrupación de la misma historia entre fuentes (antes de invalidar la cache)
+registrar_oyente_ingesta(asignar_por_ingesta)
+# Cache de respuestas: cada lote con noticias nuevas invalida las entradas
+registrar_oyente_ingesta(invalidar_por_ingesta)
+
+_generacion_indice = None
+_reescritura_indice = None
+
+def indice_al_dia():
+    """
+    Índice de búsqueda del proceso listo y con las noticias que insertó otro
+    proceso (scraper.py): cuando cambia la generación de datos compartida
+    (cache_respuestas) se leen de la BD las de id posterior a la última
+    leída, y cuando cambia la de reescritura (clasificador.py) se releen
+    todas. Mientras se carga devuelve False y se usa MySQL.
+    """
+    global _generacion_indice, _reescritura_indice
+    indice = obtener_indice()
+    cache = obtener_cache_respuestas()
+    if not indice.listo:
+        if _reescritura_indice is None:
+            # La carga lee las filas ya reescritas hasta ahora
+            _reescritura_indice = cache.generacion_reescritura()
+        iniciar_calentamiento()
+        return False
+    reescritura = cache.generacion_reescritura()
+    if reescritura != _reescritura_indice:
+        generacion = cache.generacion()
+        if reindexar_indice() is not None:
+            _reescritura_indice, _generacion_indice = reescritura, generacion
+        return True
+    # La generación se lee antes de refrescar y se anota solo si el refresco
+    # corrió: si otro hilo lo tenía o falló, la siguiente llamada lo reintenta
+    generacion = cache.generacion()
+    if generacion != _generacion_indice and refrescar_indice() is not None:
+        _generacion_indice = generacion
+    return True
 
 # ---------------- AUTOMATIZACIÓN ----------------
 def scraper_automatico():
+    # Estado de todas las fuentes en una consulta; cada fuente tiene su propia próxima descarga
+    rastreo = EstadoRastreo.cargar(FUENTES)
+    planificador = Planificador(FUENTES, rastreo)
     while True:
-        print("🔄 Ejecutando scraping incremental automático...")
-        for fuente in FUENTES:
-            scrape_fuente(fuente)
-        print("✅ Scraping incremental finalizado.")
-        time.sleep(3600)
+        vencidas = planificador.vencidas()
+        if vencidas:
+            print(f"🔄 Scraping incremental de {len(vencidas)} fuentes...")
+            filtro = obtener_filtro_enlaces()
+            filtro.reiniciar_estadisticas()
+            for fuente, html, validadores, error in descargar_fuentes(vencidas):
+                if error:
+                    print(f"❌ Error en {fuente['fuente']}: {error}")
+                    rastreo.obtener(fuente).registrar_error(error)
+                elif html is None:
+                    print(f"♻️ {fuente['fuente']} sin cambios ({fuente['url']})")
+                    rastreo.obtener(fuente).registrar_sin_cambios()
+                else:
+                    procesar_fuente(fuente, html, rastreo, validadores=validadores)
+                intervalo = planificador.reprogramar(fuente)
+                print(f"⏱️ {fuente['fuente']} ({fuente['url']}): próxima en {intervalo.total_seconds() / 60:.0f} min")
+            rastreo.guardar()
+            stats = filtro.estadisticas()
+            print(f"✅ Scraping incremental finalizado. Filtro de enlaces: {stats['omitidos']}/{stats['consultados']} omitidos ({stats['tasa_omision']:.0%}).")
+        time.sleep(max(1.0, planificador.espera()))
 
 # ---------------- RUTAS HTML ----------------
 @app.route("/")
@@ -324,195 +253,226 @@ def favoritos():
 def favicon():
     return app.send_static_file("favicon.ico")
 
+# ---------------- CACHE DE RESPUESTAS ----------------
+def cache_respuesta(vista):
+    """
+    Sirve la respuesta desde cache_respuestas mientras no lleguen noticias
+    nuevas. Solo se guardan las respuestas 200.
+    """
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        cache = obtener_cache_respuestas()
+        clave = clave_cache(request.path, request.args)
+        guardada = cache.obtener(clave)
+        if guardada:
+            estado, cuerpo, mimetype = guardada
+            respuesta = app.response_class(cuerpo, status=estado, mimetype=mimetype)
+            respuesta.headers["X-Cache"] = "HIT"
+            return respuesta
+
+        # La generación se lee antes de consultar: si llega un lote mientras
+        # tanto, esta respuesta no se guarda
+        generacion = cache.generacion()
+        respuesta = make_response(vista(*args, **kwargs))
+        if respuesta.status_code == 200:
+            cache.guardar(clave, generacion, respuesta.status_code, respuesta.get_data(), respuesta.mimetype)
+        respuesta.headers["X-Cache"] = "MISS"
+        return respuesta
+    return envoltura
+
+# ---------------- VALIDADORES HTTP ----------------
+# Los listados se revalidan siempre (un 304 cuesta casi nada); meta y
+# conteos cambian poco; una noticia no cambia salvo reclasificación.
+CACHE_CONTROL_LISTADOS = "public, no-cache"
+CACHE_CONTROL_META = "public, max-age=300"
+CACHE_CONTROL_NOTICIA = "public, max-age=3600"
+
+def ultima_modificacion(fijos):
+    """
+    MAX(fecha_scraping) del conjunto de filtros de la petición ('' si no hay
+    filas, None si falla la BD). Se memoriza hasta que llegan noticias nuevas.
+    """
+    sql, params = ConsultaNoticias.desde_args(request.args, fijos).sql_ultima_modificacion()
+
+    def calcular():
+        conn = get_connection()
+        if not conn: return None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, tuple(params))
+            fila = cursor.fetchone()
+            return fila[0] if fila and fila[0] else ""
+        except Error as e:
+            print(f"⚠️ No se pudo calcular Last-Modified: {e}")
+            return None
+        finally:
+            conn.close()
+
+    return obtener_cache_respuestas().validador(f"{sql}|{params}", calcular)
+
+def validadores_http(cache_control, por_filtros=True):
+    """
+    Agrega ETag / Last-Modified / Cache-Control y responde 304 sin ejecutar la
+    vista cuando el cliente ya tiene la versión actual.
+
+    Con por_filtros, los validadores salen del último fecha_scraping de los
+    filtros de la petición (los de la ruta llegan como kwargs); si no, solo de
+    la generación de datos.
+    """
+    def decorador(vista):
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            ultima = None
+            if por_filtros:
+                ultima = ultima_modificacion(kwargs)
+                if ultima is None:
+                    return vista(*args, **kwargs)
+            semilla = f"{clave_cache(request.path, request.args)}|{ultima}|{obtener_cache_respuestas().generacion()}"
+            etag = hashlib.md5(semilla.encode("utf-8")).hexdigest()[:20]
+            # fecha_scraping se guarda en hora local del servidor
+            ultima_utc = ultima.astimezone(timezone.utc) if isinstance(ultima, datetime) else None
+
+            if request.if_none_match:
+                no_modificado = request.if_none_match.contains_weak(etag)
+            else:
+                no_modificado = bool(ultima_utc and request.if_modified_since and ultima_utc <= request.if_modified_since)
+
+            if no_modificado:
+                respuesta = app.response_class(status=304)
+            else:
+                respuesta = make_response(vista(*args, **kwargs))
+                if respuesta.status_code != 200:
+                    return respuesta
+            respuesta.set_etag(etag, weak=True)
+            if ultima_utc:
+                respuesta.last_modified = ultima_utc
+            respuesta.headers["Cache-Control"] = cache_control
+            return respuesta
+        return envoltura
+    return decorador
+
+@app.route("/api/cache/estadisticas", methods=["GET"])
+def estadisticas_cache():
+    return jsonify(obtener_cache_respuestas().estadisticas()), 200
+
+# ---------------- PAGINACIÓN ----------------
+@app.errorhandler(CursorInvalido)
+def cursor_invalido(e):
+    return jsonify({"error": str(e)}), 400
+
+@app.errorhandler(CampoInvalido)
+def campo_invalido(e):
+    return jsonify({"error": str(e)}), 400
+
+@app.errorhandler(ParametroInvalido)
+def parametro_invalido(e):
+    return jsonify({"error": str(e)}), 400
+
+def responder_listado(fijos=None, extra=None, mensaje_vacio=None):
+    """
+    Respuesta común de los listados: filtros de la query string más los fijos
+    de la ruta, compilados en una sola consulta (filas + total) por ConsultaNoticias.
+    Con mensaje_vacio, una página sin filas responde 404 con ese mensaje.
+    """
+    consulta = ConsultaNoticias.desde_args(request.args, fijos)
+
+    with conexion_bd() as conn:
+        if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
+        rows, next_cursor, total, estimado = consulta.ejecutar(conn.cursor(dictionary=True))
+
+    if not rows and mensaje_vacio:
+        return jsonify({"mensaje": mensaje_vacio, "total": total or 0, "page": consulta.page, "total_pages": 0}), 404
+
+    respuesta = {"noticias": rows}
+    respuesta.update(extra or {})
+    respuesta["pagination"] = consulta.paginacion(total, next_cursor, estimado)
+    return jsonify(respuesta), 200
+
 # ---------------- RUTAS API ----------------
 @app.route("/api/noticias", methods=["GET"])
+@validadores_http(CACHE_CONTROL_LISTADOS)
+@cache_respuesta
 def listar_noticias():
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 10))
-    offset = (page - 1) * limit
-
-    # Filtros opcionales para compatibilidad simple
-    fuente = request.args.get("fuente")
-    categoria = request.args.get("categoria")
-    tipo = request.args.get("tipo")
-    departamento = request.args.get("departamento")
-    fecha_desde = request.args.get("fecha_desde")
-    fecha_hasta = request.args.get("fecha_hasta")
-    ordenar = request.args.get("ordenar", "fecha_desc")  # fecha_desc, fecha_asc, titulo_asc, titulo_desc
-
-    conn = get_connection()
-    if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
-
-    cursor = conn.cursor(dictionary=True)
-    base_query = "SELECT * FROM noticias WHERE 1=1"
-    params = []
-    # Excluir Peru21 de forma global
-    base_query += " AND (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21'))"
-    if fuente:
-        base_query += " AND fuente = %s"
-        params.append(fuente)
-    if categoria:
-        base_query += " AND categoria = %s"
-        params.append(categoria)
-    if tipo:
-        base_query += " AND tipo = %s"
-        params.append(tipo)
-    if departamento:
-        base_query += " AND departamento = %s"
-        params.append(departamento)
-    if fecha_desde:
-        base_query += " AND fecha >= %s"
-        params.append(fecha_desde)
-    if fecha_hasta:
-        base_query += " AND fecha <= %s"
-        params.append(fecha_hasta)
-    
-    # Ordenamiento - priorizar noticias más recientes
-    order_clause = "ORDER BY "
-    if ordenar == "fecha_asc":
-        order_clause += "fecha ASC, fecha_scraping DESC"
-    elif ordenar == "titulo_asc":
-        order_clause += "titulo ASC, fecha_scraping DESC"
-    elif ordenar == "titulo_desc":
-        order_clause += "titulo DESC, fecha_scraping DESC"
-    else:  # fecha_desc por defecto - mostrar las más recientes primero
-        order_clause += "fecha_scraping DESC, fecha DESC"
-    
-    base_query += f" {order_clause} LIMIT %s OFFSET %s"
-    params.extend([limit, offset])
-    cursor.execute(base_query, tuple(params))
-    rows = cursor.fetchall()
-    
-    # Contar total para paginación
-    count_query = "SELECT COUNT(*) as total FROM noticias WHERE 1=1"
-    count_params = []
-    count_query += " AND (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21'))"
-    if fuente:
-        count_query += " AND fuente = %s"
-        count_params.append(fuente)
-    if categoria:
-        count_query += " AND categoria = %s"
-        count_params.append(categoria)
-    if tipo:
-        count_query += " AND tipo = %s"
-        count_params.append(tipo)
-    if departamento:
-        count_query += " AND departamento = %s"
-        count_params.append(departamento)
-    if fecha_desde:
-        count_query += " AND fecha >= %s"
-        count_params.append(fecha_desde)
-    if fecha_hasta:
-        count_query += " AND fecha <= %s"
-        count_params.append(fecha_hasta)
-    
-    cursor.execute(count_query, tuple(count_params))
-    total = cursor.fetchone()["total"]
-    
-    conn.close()
-    if not rows: return jsonify({"mensaje": "No hay noticias disponibles", "total": 0, "page": page, "total_pages": 0}), 404
-    
-    total_pages = (total + limit - 1) // limit
-    return jsonify({
-        "noticias": rows,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
-        }
-    }), 200
+    # Filtros opcionales: fuente, categoria, tipo, departamento, fecha_desde, fecha_hasta
+    return responder_listado(mensaje_vacio="No hay noticias disponibles")
 
 @app.route("/api/noticias/filtrar", methods=["GET"])
+@validadores_http(CACHE_CONTROL_LISTADOS)
+@cache_respuesta
 def filtrar_noticias():
-    fuente = request.args.get("fuente")
-    categoria = request.args.get("categoria")
-    fecha = request.args.get("fecha")
-    tipo = request.args.get("tipo")
-    departamento = request.args.get("departamento")
-    fecha_desde = request.args.get("fecha_desde")
-    fecha_hasta = request.args.get("fecha_hasta")
-    ordenar = request.args.get("ordenar", "fecha_desc")
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 10))
-    offset = (page - 1) * limit
-
-    query = "SELECT * FROM noticias WHERE 1=1"
-    params = []
-
-    if fuente: query += " AND fuente = %s"; params.append(fuente)
-    if categoria: query += " AND categoria = %s"; params.append(categoria)
-    if fecha: query += " AND fecha = %s"; params.append(fecha)
-    if tipo: query += " AND tipo = %s"; params.append(tipo)
-    if departamento: query += " AND departamento = %s"; params.append(departamento)
-    if fecha_desde: query += " AND fecha >= %s"; params.append(fecha_desde)
-    if fecha_hasta: query += " AND fecha <= %s"; params.append(fecha_hasta)
-    # Excluir Peru21 de forma global
-    query += " AND (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21'))"
+    return responder_listado(mensaje_vacio="No se encontraron noticias con esos filtros")
+
+MAX_IDS_LOTE = 500
+
+@app.route("/api/noticias/lote", methods=["GET", "POST"])
+def noticias_por_lote():
+    """
+    Obtiene varias noticias por id en una sola consulta (página de favoritos).
+    GET ?ids=1,2,3 o POST {"ids": [1, 2, 3]}; admite q, fecha_desde, fecha_hasta y ordenar.
+    """
+    if request.method == "POST":
+        parametros = request.get_json(silent=True) or {}
+        crudos = parametros.get("ids") or []
+    else:
+        parametros = request.args
+        crudos = [i for i in (parametros.get("ids") or "").split(",") if i.strip()]
 
-    conn = get_connection()
-    if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
-
-    cursor = conn.cursor(dictionary=True)
-    
-    # Ordenamiento - priorizar noticias más recientes
-    order_clause = "ORDER BY "
-    if ordenar == "fecha_asc":
-        order_clause += "fecha ASC, fecha_scraping DESC"
-    elif ordenar == "titulo_asc":
-        order_clause += "titulo ASC, fecha_scraping DESC"
-    elif ordenar == "titulo_desc":
-        order_clause += "titulo DESC, fecha_scraping DESC"
-    else:  # fecha_desc por defecto - mostrar las más recientes primero
-        order_clause += "fecha_scraping DESC, fecha DESC"
-    
-    query += f" {order_clause} LIMIT %s OFFSET %s"
-    params.extend([limit, offset])
-    cursor.execute(query, tuple(params))
-    rows = cursor.fetchall()
-    
-    # Contar total para paginación
-    count_query = "SELECT COUNT(*) as total FROM noticias WHERE 1=1"
-    count_params = []
-    if fuente: count_query += " AND fuente = %s"; count_params.append(fuente)
-    if categoria: count_query += " AND categoria = %s"; count_params.append(categoria)
-    if fecha: count_query += " AND fecha = %s"; count_params.append(fecha)
-    if tipo: count_query += " AND tipo = %s"; count_params.append(tipo)
-    if departamento: count_query += " AND departamento = %s"; count_params.append(departamento)
-    if fecha_desde: count_query += " AND fecha >= %s"; count_params.append(fecha_desde)
-    if fecha_hasta: count_query += " AND fecha <= %s"; count_params.append(fecha_hasta)
-    count_query += " AND (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21'))"
-    
-    cursor.execute(count_query, tuple(count_params))
-    total = cursor.fetchone()["total"]
-    
-    conn.close()
-    if not rows: return jsonify({"mensaje": "No se encontraron noticias con esos filtros", "total": 0, "page": page, "total_pages": 0}), 404
-    
-    total_pages = (total + limit - 1) // limit
-    return jsonify({
-        "noticias": rows,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
-        }
-    }), 200
+    try:
+        ids = list(dict.fromkeys(int(i) for i in crudos))
+    except (TypeError, ValueError):
+        return jsonify({"error": "ids debe ser una lista de enteros"}), 400
+    if not ids: return jsonify({"error": "Debe proporcionar ?ids=1,2,3"}), 400
+    if len(ids) > MAX_IDS_LOTE: return jsonify({"error": f"Máximo {MAX_IDS_LOTE} ids por consulta"}), 400
+
+    consulta = ConsultaNoticias(
+        filtros={"ids": ids, "q": parametros.get("q"),
+                 "fecha_desde": parametros.get("fecha_desde"), "fecha_hasta": parametros.get("fecha_hasta")},
+        ordenar=parametros.get("ordenar"),
+        limit=len(ids),
+        conteo="none",
+        modo="like",  # subcadena, como filtraba antes la página de favoritos
+        campos=resolver_campos(parametros.get("fields")),
+    )
+
+    with conexion_bd() as conn:
+        if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
+        rows, _, _, _ = consulta.ejecutar(conn.cursor(dictionary=True))
+    return jsonify({"noticias": rows, "total": len(rows)}), 200
+
+@app.route("/api/export", methods=["GET"])
+def exportar():
+    """
+    Exporta las noticias que cumplen los filtros como NDJSON o CSV, en streaming.
+    ?formato=ndjson|csv, ?gzip=1 comprime al vuelo, ?fields= elige columnas (todas por defecto).
+    """
+    formato = request.args.get("formato", "ndjson")
+    if formato not in FORMATOS:
+        return jsonify({"error": f"formato debe ser uno de: {', '.join(FORMATOS)}"}), 400
+
+    filtros = {k: request.args.get(k) for k in FILTROS_IGUALDAD + ("fecha_desde", "fecha_hasta", "q")}
+    exportacion = Exportacion(filtros, request.args.get("fields"), formato,
+                              comprimir=request.args.get("gzip") in ("1", "true"))
+    if not exportacion.abrir():
+        return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
+
+    respuesta = Response(
+        stream_with_context(iter(exportacion)),
+        mimetype=exportacion.mimetype,
+        headers={"Content-Disposition": f"attachment; filename={exportacion.nombre_archivo}"}
+    )
+    # Cliente desconectado o respuesta nunca enviada: la conexión se cierra igual
+    respuesta.call_on_close(exportacion.cerrar)
+    return respuesta
 
 @app.route("/api/noticias/<int:noticia_id>", methods=["GET"])
+@validadores_http(CACHE_CONTROL_NOTICIA, por_filtros=False)
 def noticia_por_id(noticia_id):
-    conn = get_connection()
-    if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
-
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("SELECT * FROM noticias WHERE id = %s", (noticia_id,))
-    row = cursor.fetchone()
-    conn.close()
+    campos = lista_select(resolver_campos(request.args.get("fields"), por_defecto="completa"))
+    with conexion_bd() as conn:
+        if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute(f"SELECT {campos} FROM noticias WHERE id = %s", (noticia_id,))
+        row = cursor.fetchone()
     if not row: return jsonify({"mensaje": f"No existe la noticia con id {noticia_id}"}), 404
     return jsonify(row), 200
 
@@ -520,244 +480,180 @@ def noticia_por_id(noticia_id):
 def buscar_noticias():
     keyword = request.args.get("q")
     if not keyword: return jsonify({"error": "Debe proporcionar un parámetro ?q=palabra"}), 400
+    # Índice en memoria por defecto; modo=natural|booleano|like fuerzan MySQL
+    if request.args.get("modo", "indice") == "indice" and indice_al_dia():
+        return responder_busqueda_indice(keyword)
+    return responder_listado(mensaje_vacio="No se encontraron noticias con esa búsqueda")
+
+def responder_busqueda_indice(keyword):
+    """
+    Búsqueda con el índice en memoria (buscador.py): el índice resuelve
+    términos, filtros, orden y total; MySQL solo entrega las filas de la página.
+    """
+    page = entero_positivo(request.args, "page", 1)
+    limit = entero_positivo(request.args, "limit", 10)
+    ordenar = request.args.get("ordenar") or "relevancia"
+    filtros = {k: request.args.get(k) for k in FILTROS_IGUALDAD + ("fecha_desde", "fecha_hasta")}
+    campos = lista_select(resolver_campos(request.args.get("fields")))
+    resultados, total = obtener_indice().buscar(keyword, filtros, ordenar, limit, (page - 1) * limit)
+    if not resultados:
+        return jsonify({"mensaje": "No se encontraron noticias con esa búsqueda", "total": total, "page": page, "total_pages": 0}), 404
+
+    with conexion_bd() as conn:
+        if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
+        cursor = conn.cursor(dictionary=True)
+        marcadores = ", ".join(["%s"] * len(resultados))
+        cursor.execute(f"SELECT {campos} FROM noticias WHERE id IN ({marcadores})", tuple(r["id"] for r in resultados))
+        por_id = {row["id"]: row for row in cursor.fetchall()}
+
+    noticias = []
+    for resultado in resultados:
+        row = por_id.get(resultado["id"])
+        if row:
+            row.update(relevancia=resultado["puntuacion"], titulo_resaltado=resultado["titulo_resaltado"], snippet=resultado["snippet"])
+            noticias.append(row)
 
-    conn = get_connection()
-    if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
-
-    cursor = conn.cursor(dictionary=True)
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 10))
-    offset = (page - 1) * limit
-    ordenar = request.args.get("ordenar", "fecha_desc")
-    
-    query = "SELECT * FROM noticias WHERE (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21')) AND (titulo LIKE %s OR resumen LIKE %s)"
-    
-    # Ordenamiento - priorizar noticias más recientes
-    order_clause = "ORDER BY "
-    if ordenar == "fecha_asc":
-        order_clause += "fecha ASC, fecha_scraping DESC"
-    elif ordenar == "titulo_asc":
-        order_clause += "titulo ASC, fecha_scraping DESC"
-    elif ordenar == "titulo_desc":
-        order_clause += "titulo DESC, fecha_scraping DESC"
-    else:  # fecha_desc por defecto - mostrar las más recientes primero
-        order_clause += "fecha_scraping DESC, fecha DESC"
-    
-    query += f" {order_clause} LIMIT %s OFFSET %s"
-    cursor.execute(query, (f"%{keyword}%", f"%{keyword}%", limit, offset))
-    rows = cursor.fetchall()
-    
-    # Contar total para paginación
-    count_query = "SELECT COUNT(*) as total FROM noticias WHERE (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21')) AND (titulo LIKE %s OR resumen LIKE %s)"
-    cursor.execute(count_query, (f"%{keyword}%", f"%{keyword}%"))
-    total = cursor.fetchone()["total"]
-    
-    conn.close()
-    if not rows: return jsonify({"mensaje": "No se encontraron noticias con esa búsqueda", "total": 0, "page": page, "total_pages": 0}), 404
-    
-    total_pages = (total + limit - 1) // limit
     return jsonify({
-        "noticias": rows,
+        "noticias": noticias,
         "pagination": {
             "page": page,
             "limit": limit,
             "total": total,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
+            "total_estimado": False,
+            "total_pages": (total + limit - 1) // limit,
+            "has_next": page * limit < total,
+            "has_prev": page > 1,
+            "next_cursor": None
         }
     }), 200
 
 @app.route("/api/meta", methods=["GET"])
+@validadores_http(CACHE_CONTROL_META)
+@cache_respuesta
 def meta_info():
     """Devuelve listas de fuentes y categorías disponibles en la DB"""
-    conn = get_connection()
-    if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
-
-    cursor = conn.cursor()
-    cursor.execute("SELECT DISTINCT fuente FROM noticias WHERE fuente IS NOT NULL AND fuente <> ''")
-    fuentes = [row[0] for row in cursor.fetchall()]
-    cursor.execute("SELECT DISTINCT categoria FROM noticias WHERE categoria IS NOT NULL AND categoria <> ''")
-    categorias = [row[0] for row in cursor.fetchall()]
-    cursor.execute("SELECT DISTINCT tipo FROM noticias WHERE tipo IS NOT NULL AND tipo <> ''")
-    tipos = [row[0] for row in cursor.fetchall()]
-    cursor.execute("SELECT DISTINCT departamento FROM noticias WHERE departamento IS NOT NULL AND departamento <> ''")
-    departamentos = [row[0] for row in cursor.fetchall()]
-    conn.close()
+    with conexion_bd() as conn:
+        if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
+        cursor = conn.cursor()
+        cursor.execute("SELECT DISTINCT fuente FROM noticias WHERE fuente IS NOT NULL AND fuente <> ''")
+        fuentes = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT DISTINCT categoria FROM noticias WHERE categoria IS NOT NULL AND categoria <> ''")
+        categorias = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT DISTINCT tipo FROM noticias WHERE tipo IS NOT NULL AND tipo <> ''")
+        tipos = [row[0] for row in cursor.fetchall()]
+        cursor.execute("SELECT DISTINCT departamento FROM noticias WHERE departamento IS NOT NULL AND departamento <> ''")
+        departamentos = [row[0] for row in cursor.fetchall()]
     return jsonify({"fuentes": fuentes, "categorias": categorias, "tipos": tipos, "departamentos": departamentos}), 200
 
 @app.route("/api/categorias", methods=["GET"])
+@validadores_http(CACHE_CONTROL_META)
+@cache_respuesta
 def listar_categorias():
     """Devuelve lista de categorías disponibles con conteo de noticias"""
-    conn = get_connection()
-    if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
-
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT categoria, COUNT(*) as cantidad 
-        FROM noticias 
-        WHERE categoria IS NOT NULL AND categoria <> '' 
-        GROUP BY categoria 
-        ORDER BY cantidad DESC
-    """)
-    categorias = cursor.fetchall()
-    conn.close()
+    with conexion_bd() as conn:
+        if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT categoria, COUNT(*) as cantidad 
+            FROM noticias 
+            WHERE categoria IS NOT NULL AND categoria <> '' 
+            GROUP BY categoria 
+            ORDER BY cantidad DESC
+        """)
+        categorias = cursor.fetchall()
     return jsonify({"categorias": categorias}), 200
 
 @app.route("/api/noticias/categoria/<categoria>", methods=["GET"])
+@validadores_http(CACHE_CONTROL_LISTADOS)
+@cache_respuesta
 def noticias_por_categoria(categoria):
     """Obtiene noticias de una categoría específica"""
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 10))
-    offset = (page - 1) * limit
-    
-    conn = get_connection()
-    if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
-
-    cursor = conn.cursor(dictionary=True)
-    
-    # Obtener noticias de la categoría
-    cursor.execute("""
-        SELECT * FROM noticias 
-        WHERE categoria = %s 
-        ORDER BY fecha_scraping DESC 
-        LIMIT %s OFFSET %s
-    """, (categoria, limit, offset))
-    noticias = cursor.fetchall()
-    
-    # Contar total
-    cursor.execute("SELECT COUNT(*) as total FROM noticias WHERE categoria = %s", (categoria,))
-    total = cursor.fetchone()["total"]
-    
-    conn.close()
-    
-    total_pages = (total + limit - 1) // limit
-    return jsonify({
-        "noticias": noticias,
-        "categoria": categoria,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
-        }
-    }), 200
+    return responder_listado(fijos={"categoria": categoria}, extra={"categoria": categoria})
 
 @app.route("/api/departamentos", methods=["GET"])
+@validadores_http(CACHE_CONTROL_META)
+@cache_respuesta
 def listar_departamentos():
     """Devuelve lista de departamentos disponibles con conteo de noticias"""
-    conn = get_connection()
-    if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
-
-    cursor = conn.cursor(dictionary=True)
-    cursor.execute("""
-        SELECT departamento, COUNT(*) as cantidad 
-        FROM noticias 
-        WHERE departamento IS NOT NULL AND departamento <> '' 
-        GROUP BY departamento 
-        ORDER BY cantidad DESC
-    """)
-    departamentos = cursor.fetchall()
-    conn.close()
+    with conexion_bd() as conn:
+        if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
+        cursor = conn.cursor(dictionary=True)
+        cursor.execute("""
+            SELECT departamento, COUNT(*) as cantidad 
+            FROM noticias 
+            WHERE departamento IS NOT NULL AND departamento <> '' 
+            GROUP BY departamento 
+            ORDER BY cantidad DESC
+        """)
+        departamentos = cursor.fetchall()
     return jsonify({"departamentos": departamentos}), 200
 
 @app.route("/api/noticias/departamento/<departamento>", methods=["GET"])
+@validadores_http(CACHE_CONTROL_LISTADOS)
+@cache_respuesta
 def noticias_por_departamento(departamento):
     """Obtiene noticias de un departamento específico"""
-    page = int(request.args.get("page", 1))
-    limit = int(request.args.get("limit", 10))
-    offset = (page - 1) * limit
-    
-    conn = get_connection()
-    if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
-
-    cursor = conn.cursor(dictionary=True)
-    
-    # Obtener noticias del departamento
-    cursor.execute("""
-        SELECT * FROM noticias 
-        WHERE departamento = %s 
-        ORDER BY fecha_scraping DESC 
-        LIMIT %s OFFSET %s
-    """, (departamento, limit, offset))
-    noticias = cursor.fetchall()
-    
-    # Contar total
-    cursor.execute("SELECT COUNT(*) as total FROM noticias WHERE departamento = %s", (departamento,))
-    total = cursor.fetchone()["total"]
-    
-    conn.close()
-    
-    total_pages = (total + limit - 1) // limit
-    return jsonify({
-        "noticias": noticias,
-        "departamento": departamento,
-        "pagination": {
-            "page": page,
-            "limit": limit,
-            "total": total,
-            "total_pages": total_pages,
-            "has_next": page < total_pages,
-            "has_prev": page > 1
-        }
-    }), 200
+    return responder_listado(fijos={"departamento": departamento}, extra={"departamento": departamento})
 
 @app.route("/api/noticias/relacionadas", methods=["GET"])
 def noticias_relacionadas():
-    noticia_id = request.args.get("id")
-    limit = int(request.args.get("limit", 6))
-    modo = request.args.get("modo", "categoria")  # categoria | tipo | random
+    noticia_id = request.args.get("id", type=int)
+    limit = entero_positivo(request.args, "limit", 6)
+    modo = request.args.get("modo", "similar")  # similar | categoria | tipo | random
     if not noticia_id:
         return jsonify({"error": "Falta ?id"}), 400
-    conn = get_connection()
-    if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
-    cur = conn.cursor(dictionary=True)
-    # Buscar noticia base
-    cur.execute("SELECT categoria, tipo, fuente FROM noticias WHERE id = %s", (noticia_id,))
-    base = cur.fetchone()
-    if not base:
-        conn.close()
-        return jsonify({"mensaje": "No existe la noticia"}), 404
-    if modo == "random":
-        cur.execute(
-            """
-            SELECT * FROM noticias
-            WHERE id <> %s
-              AND (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21'))
-            ORDER BY RAND()
-            LIMIT %s
-            """,
-            (noticia_id, limit)
-        )
-    elif modo == "tipo":
-        cur.execute(
-            """
-            SELECT * FROM noticias
-            WHERE id <> %s
-              AND (tipo IS NOT NULL AND tipo = %s)
-              AND (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21'))
-            ORDER BY fecha DESC
-            LIMIT %s
-            """,
-            (noticia_id, base.get("tipo"), limit)
-        )
-    else:
-        # categoria (por defecto)
-        cur.execute(
-            """
-            SELECT * FROM noticias
-            WHERE id <> %s
-              AND (categoria IS NOT NULL AND categoria = %s)
-              AND (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21'))
-            ORDER BY fecha DESC
-            LIMIT %s
-            """,
-            (noticia_id, base.get("categoria"), limit)
-        )
-    rows = cur.fetchall()
-    conn.close()
+    campos = resolver_campos(request.args.get("fields"))
+    with conexion_bd() as conn:
+        if not conn: return jsonify({"error": "No se pudo conectar a la base de datos"}), 500
+        cur = conn.cursor(dictionary=True)
+        # Buscar noticia base
+        cur.execute("SELECT categoria, tipo, fuente FROM noticias WHERE id = %s", (noticia_id,))
+        base = cur.fetchone()
+        if not base:
+            return jsonify({"mensaje": "No existe la noticia"}), 404
+        if modo == "similar":
+            try:
+                if not vecinos_calculados(cur, noticia_id) and indice_al_dia():
+                    # Vecinos nunca calculados (noticia anterior al relleno o de otro
+                    # proceso): se calculan ahora, aunque ya tenga vecinos inversos
+                    guardar_vecinos(conn, calcular_vecinos([noticia_id]), calculadas=[noticia_id])
+                rows = leer_similares(cur, noticia_id, limit, campos)
+            except Error as e:
+                # p. ej. noticias_relacionadas todavía sin crear: se responde por categoría
+                print(f"⚠️ No se pudieron obtener las relacionadas de {noticia_id}: {e}")
+                rows = []
+            if rows:
+                return jsonify(rows), 200
+            # Sin texto parecido en el archivo: las más recientes de su categoría
+            modo = "categoria"
+        if modo == "random":
+            return jsonify(muestra_aleatoria(cur, noticia_id, limit, campos)), 200
+        elif modo == "tipo":
+            cur.execute(
+                f"""
+                SELECT {lista_select(campos)} FROM noticias
+                WHERE id <> %s
+                  AND (tipo IS NOT NULL AND tipo = %s)
+                  AND (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21'))
+                ORDER BY fecha DESC
+                LIMIT %s
+                """,
+                (noticia_id, base.get("tipo"), limit)
+            )
+        else:
+            # categoria
+            cur.execute(
+                f"""
+                SELECT {lista_select(campos)} FROM noticias
+                WHERE id <> %s
+                  AND (categoria IS NOT NULL AND categoria = %s)
+                  AND (fuente IS NULL OR fuente NOT IN ('Perú21','Peru21'))
+                ORDER BY fecha DESC
+                LIMIT %s
+                """,
+                (noticia_id, base.get("categoria"), limit)
+            )
+        rows = cur.fetchall()
     return jsonify(rows), 200
 
 @app.route("/api/scraping/categoria/<categoria>", methods=["POST"])
@@ -811,14 +707,17 @@ if __name__ == "__main__":
     crear_base_y_tabla()  # Verifica/crea DB y tabla
     # Purgar cualquier noticia existente de Peru21/Perú21
     try:
-        conn = get_connection()
-        if conn:
-            cur = conn.cursor()
-            cur.execute("DELETE FROM noticias WHERE fuente IN (%s, %s)", ("Perú21", "Peru21"))
-            conn.commit()
-            conn.close()
-            print("🧹 Noticias de Perú21 eliminadas.")
+        with conexion_bd() as conn:
+            if conn:
+                cur = conn.cursor()
+                cur.execute("DELETE FROM noticias WHERE fuente IN (%s, %s)", ("Perú21", "Peru21"))
+                conn.commit()
+                if cur.rowcount:
+                    obtener_cache_respuestas().incrementar_generacion()
+                print("🧹 Noticias de Perú21 eliminadas.")
     except Exception:
         pass
+    # Índice de búsqueda en segundo plano (los oyentes ya están registrados)
+    indice_al_dia()
     threading.Thread(target=scraper_automatico, daemon=True).start()
     app.run(debug=True, port=5000)
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Adaptadores sqlite3 con la interfaz de mysql.connector para los scripts de
+prueba, y la tabla noticias de ejemplo.
+
+Los upserts de MySQL se traducen a ON CONFLICT de sqlite: con clave, la
+columna única en conflicto (p. ej. "url_hash").
+"""
+
+import re
+import sqlite3
+from mysql.connector import Error, IntegrityError
+
+COLUMNAS_NOTICIAS = (
+    "id", "titulo", "link", "categoria", "tipo", "fecha", "resumen", "autor", "imagen", "fuente",
+    "departamento", "fecha_scraping", "cluster_id", "link_hash", "titulo_hash",
+)
+
+
+def traducir_sql(sql, clave=None):
+    """
+    Pasa una consulta de mysql.connector a sqlite3.
+    """
+    sql = re.sub(r"ON DUPLICATE KEY UPDATE (\w+) = \1\b", "ON CONFLICT DO NOTHING", sql.replace("%s", "?"))
+    if clave:
+        sql = sql.replace("ON DUPLICATE KEY UPDATE", f"ON CONFLICT ({clave}) DO UPDATE SET")
+        sql = re.sub(r"VALUES\((\w+)\)", r"excluded.\1", sql)
+    return sql
+
+
+class CursorSQLite:
+    """
+    Cursor de MySQL sobre sqlite3: filas como dict (dictionary=True) o
+    tuplas, rowcount, fetchmany y errores como mysql.connector.Error. Las
+    consultas ejecutadas quedan en consultas.
+    """
+
+    def __init__(self, conn, dictionary=True, clave=None):
+        self.conn = conn
+        self.dictionary = dictionary
+        self.clave = clave
+        self.consultas = []
+        self.rowcount = 0
+        self.lotes = 0
+        self._filas = []
+
+    def _ejecutar(self, funcion, sql, params):
+        try:
+            return funcion(traducir_sql(sql, self.clave), params)
+        except sqlite3.IntegrityError as e:
+            raise IntegrityError(msg=str(e))
+        except sqlite3.Error as e:
+            raise Error(msg=str(e))
+
+    def execute(self, sql, params=()):
+        self.consultas.append(sql)
+        resultado = self._ejecutar(self.conn.execute, sql, params)
+        self._filas = [dict(r) if self.dictionary else tuple(r) for r in resultado]
+        self.rowcount = len(self._filas) if resultado.description else resultado.rowcount
+
+    def executemany(self, sql, filas):
+        self.consultas.append(sql)
+        self.rowcount = self._ejecutar(self.conn.executemany, sql, filas).rowcount
+        self._filas = []
+
+    def fetchall(self):
+        filas, self._filas = self._filas, []
+        return filas
+
+    def fetchone(self):
+        return self._filas.pop(0) if self._filas else None
+
+    def fetchmany(self, n):
+        self.lotes += 1
+        filas, self._filas = self._filas[:n], self._filas[n:]
+        return filas
+
+    def close(self):
+        pass
+
+
+class ConexionSQLite:
+    """
+    Conexión de mysql.connector (o del pool de db.conectar) sobre sqlite3.
+    close() la marca como cerrada; los cursores abiertos quedan en cursores.
+    """
+
+    def __init__(self, conn, clave=None):
+        self.conn = conn
+        self.clave = clave
+        self.abierta = True
+        self.cursores = []
+
+    def cursor(self, dictionary=False, buffered=None):
+        cursor = CursorSQLite(self.conn, dictionary, self.clave)
+        self.cursores.append(cursor)
+        return cursor
+
+    def commit(self):
+        self.conn.commit()
+
+    def rollback(self):
+        self.conn.rollback()
+
+    def is_connected(self):
+        return self.abierta
+
+    def close(self):
+        self.abierta = False
+
+
+def crear_tabla_noticias():
+    """
+    Base sqlite3 en memoria con la tabla noticias vacía (usable desde el
+    hilo de calentamiento del índice).
+    """
+    conn = sqlite3.connect(":memory:", check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("""CREATE TABLE noticias (id INTEGER PRIMARY KEY, titulo TEXT, link TEXT, categoria TEXT,
+                    tipo TEXT, fecha TEXT, resumen TEXT, autor TEXT, imagen TEXT, fuente TEXT, departamento TEXT,
+                    fecha_scraping TEXT, cluster_id INTEGER, link_hash BLOB UNIQUE, titulo_hash BLOB UNIQUE)""")
+    return conn
+
+
+def insertar_noticias(conn, noticias):
+    """
+    Inserta dicts con cualquier subconjunto de COLUMNAS_NOTICIAS.
+    """
+    for noticia in noticias:
+        columnas = [c for c in COLUMNAS_NOTICIAS if c in noticia]
+        conn.execute(f"INSERT INTO noticias ({', '.join(columnas)}) VALUES ({', '.join('?' * len(columnas))})",
+                     [noticia[c] for c in columnas])
+
+
+def crear_tabla_ejemplo():
+    """
+    Tabla noticias con 40 filas: impares regionales, pares nacionales, las
+    múltiplos de 10 de Peru21 y las múltiplos de 3 de Cusco.
+    """
+    conn = crear_tabla_noticias()
+    insertar_noticias(conn, [{
+        "id": i, "titulo": f"Noticia {i}", "resumen": "lluvias en la sierra" if i % 4 == 0 else "resumen",
+        "categoria": "regional" if i % 2 else "nacional", "tipo": "general",
+        "departamento": "Cusco" if i % 3 == 0 else None, "fuente": "Peru21" if i % 10 == 0 else "RPP",
+        "fecha": f"2024-05-{i % 28 + 1:02d}", "fecha_scraping": f"2024-05-28 10:{i:02d}:00",
+    } for i in range(1, 41)])
+    return conn
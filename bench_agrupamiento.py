@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark de agrupación (agrupamiento.py) sobre un flujo sintético de titulares.
+
+Genera historias con un vocabulario tipo Zipf (desplazado); cada historia se publica de 1 a
+4 veces con variaciones (plural, palabras de más o de menos, otro orden),
+como la misma noticia en RPP, Correo o La República. Mide noticias/segundo y
+cuántas copias terminan en el grupo de su historia.
+
+    python bench_agrupamiento.py                 # 1M noticias
+    python bench_agrupamiento.py --filas 100000 --por-dia 5000
+"""
+
+import sys
+import os
+import time
+import random
+import argparse
+from itertools import accumulate
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agrupamiento import AgrupadorNoticias, _hashes_termino
+
+RELLENO = "el la en de por tras para con ante sobre".split()
+
+
+def _flujo(filas, por_dia, semilla=7):
+    """
+    Devuelve [(id, titulo, fecha_scraping, historia)] en orden de llegada.
+    """
+    rnd = random.Random(semilla)
+    vocabulario = [f"termino{i}" for i in range(50000)]
+    # Zipf desplazado: sin stopwords, la palabra más común de los titulares
+    # ("perú", "lima", "gobierno") aparece en pocos por ciento de ellos
+    acumulados = list(accumulate(1 / (rango + 50) for rango in range(len(vocabulario))))
+    paso = timedelta(days=1) / por_dia
+    inicio = datetime(2024, 1, 1)
+    pendientes = []   # (llegada, historia, palabras) de copias aún no publicadas
+    salida = []
+    historia = 0
+    while len(salida) < filas:
+        historia += 1
+        palabras = rnd.choices(vocabulario, cum_weights=acumulados, k=rnd.randint(6, 10))
+        salida.append((len(salida) + 1, " ".join(palabras), inicio + paso * len(salida), historia))
+        for _ in range(rnd.choice((0, 0, 1, 1, 2, 3))):
+            # Otra fuente publica la misma historia unas horas después
+            pendientes.append((len(salida) + rnd.randint(1, por_dia // 8), historia, palabras))
+        listas = [p for p in pendientes if p[0] <= len(salida)]
+        pendientes = [p for p in pendientes if p[0] > len(salida)]
+        for _, copia_de, palabras in listas:
+            if len(salida) >= filas:
+                break
+            variante = list(palabras)
+            if rnd.random() < 0.5:
+                variante[rnd.randrange(len(variante))] += "s"
+            if rnd.random() < 0.3:
+                variante.pop(rnd.randrange(len(variante)))
+            if rnd.random() < 0.5:
+                variante.insert(rnd.randrange(len(variante)), rnd.choice(vocabulario[:2000]))
+            rnd.shuffle(variante)
+            variante += rnd.sample(RELLENO, 2)
+            salida.append((len(salida) + 1, " ".join(variante), inicio + paso * len(salida), copia_de))
+    return salida
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide la velocidad y calidad de la agrupación de noticias")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--por-dia", type=int, default=5000, help="noticias ingresadas por día (tamaño de la ventana)")
+    args = parser.parse_args()
+
+    print(f"📚 Generando {args.filas} titulares ({args.por_dia}/día)...")
+    flujo = _flujo(args.filas, args.por_dia)
+
+    agrupador = AgrupadorNoticias()
+    grupos = {}
+    inicio = time.perf_counter()
+    for doc_id, titulo, fecha, _ in flujo:
+        grupos[doc_id] = agrupador.asignar(doc_id, titulo, fecha)
+    segundos = time.perf_counter() - inicio
+
+    # Calidad: copias unidas al grupo de su historia y grupos que mezclan historias
+    primera = {}
+    aciertos = copias = 0
+    historias_por_grupo = {}
+    for doc_id, _, _, historia in flujo:
+        historias_por_grupo.setdefault(grupos[doc_id], set()).add(historia)
+        if historia in primera:
+            copias += 1
+            aciertos += grupos[doc_id] == grupos[primera[historia]]
+        else:
+            primera[historia] = doc_id
+    mezclados = sum(1 for h in historias_por_grupo.values() if len(h) > 1)
+
+    print(f"⚡ {len(flujo) / segundos:,.0f} noticias/s ({segundos:.1f} s en total)")
+    print(f"🧮 {len(historias_por_grupo):,} grupos para {len(primera):,} historias")
+    print(f"🎯 Copias en el grupo de su historia: {aciertos:,}/{copias:,} ({aciertos / max(copias, 1):.1%})")
+    print(f"⚠️ Grupos que mezclan historias: {mezclados:,}")
+    print(f"🗂️ Ventana: {len(agrupador):,} noticias; términos en cache: {_hashes_termino.cache_info().currsize:,}")
+
+
+if __name__ == "__main__":
+    main()
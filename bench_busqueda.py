@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Benchmark de búsqueda: índice en memoria (buscador.py) frente a LIKE '%q%'.
+
+Sin argumentos usa un corpus sintético en SQLite en memoria; con --mysql
+compara contra la tabla noticias real (modo=like de consultas.py).
+
+    python bench_busqueda.py --docs 50000 --repeticiones 20
+    python bench_busqueda.py --mysql
+"""
+
+import sys
+import os
+import time
+import random
+import sqlite3
+import argparse
+import statistics
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from buscador import IndiceBusqueda, calentar_indice, obtener_indice
+
+CONSULTAS = ["huanuco", "lluvias", "politica congreso", "ica", "bcr", "region", "sismo arequipa"]
+
+# Términos de las consultas, poco frecuentes como en un corpus real
+TEMAS = (
+    "lluvias huaicos congreso política región Huánuco Ica Cusco Arequipa Puno BCR economía ministro "
+    "salud educación sismo carretera alcalde gobierno presidente elecciones minería agua hospital"
+).split()
+
+
+def _corpus(n, semilla=1):
+    # Vocabulario con frecuencias tipo Zipf más algunos términos de TEMAS por noticia
+    rnd = random.Random(semilla)
+    vocabulario = [f"palabra{i}" for i in range(5000)]
+    pesos = [1 / (rango + 1) for rango in range(len(vocabulario))]
+    for i in range(1, n + 1):
+        titulo = rnd.choices(vocabulario, pesos, k=7) + rnd.sample(TEMAS, 2)
+        resumen = rnd.choices(vocabulario, pesos, k=38) + rnd.sample(TEMAS, 2)
+        rnd.shuffle(titulo)
+        rnd.shuffle(resumen)
+        yield {
+            "id": i,
+            "titulo": " ".join(titulo),
+            "resumen": " ".join(resumen),
+            "categoria": rnd.choice(["nacional", "regional", "internacional"]),
+            "departamento": None, "fuente": "RPP", "tipo": "general",
+            "fecha": f"2024-05-{rnd.randint(1, 28):02d}",
+            "fecha_scraping": f"2024-05-28 {rnd.randint(0, 23):02d}:00:00",
+        }
+
+
+def _medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tiempos), max(tiempos)
+
+
+def _reportar(nombre, q, mediana, maximo, total):
+    print(f"   {nombre:<7} q={q!r:<22} mediana={mediana:8.2f} ms  max={maximo:8.2f} ms  resultados={total}")
+
+
+def bench_sintetico(docs, repeticiones):
+    print(f"📚 Corpus sintético: {docs} noticias")
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE noticias (id INTEGER PRIMARY KEY, titulo TEXT, resumen TEXT, fecha_scraping TEXT)")
+    indice = IndiceBusqueda()
+    filas = list(_corpus(docs))
+    conn.executemany("INSERT INTO noticias VALUES (:id, :titulo, :resumen, :fecha_scraping)", filas)
+
+    inicio = time.perf_counter()
+    indice.agregar(filas)
+    print(f"🔎 Índice construido en {time.perf_counter() - inicio:.2f} s\n")
+
+    for q in CONSULTAS:
+        like = f"%{q}%"
+        # Misma forma que la API: página + total en la misma consulta
+        sql = ("SELECT id, COUNT(*) OVER() AS total FROM noticias WHERE titulo LIKE ? OR resumen LIKE ? "
+               "ORDER BY fecha_scraping DESC LIMIT 10")
+        filas_like = conn.execute(sql, (like, like)).fetchall()
+        total_like = filas_like[0][1] if filas_like else 0
+        _reportar("LIKE", q, *_medir(lambda: conn.execute(sql, (like, like)).fetchall(), repeticiones), total_like)
+        total_indice = indice.buscar(q)[1]
+        _reportar("indice", q, *_medir(lambda: indice.buscar(q, ordenar="fecha_desc"), repeticiones), total_indice)
+
+
+def bench_mysql(repeticiones):
+    from db import conectar
+    from consultas import ConsultaNoticias
+
+    if not calentar_indice():
+        print("❌ No se pudo cargar el índice desde MySQL")
+        return
+    indice = obtener_indice()
+    conn = conectar()
+    if not conn:
+        return
+    cursor = conn.cursor(dictionary=True)
+    print()
+    for q in CONSULTAS:
+        consulta = lambda: ConsultaNoticias(filtros={"q": q}, modo="like").ejecutar(cursor)
+        _reportar("LIKE", q, *_medir(consulta, repeticiones), consulta()[2])
+        _reportar("indice", q, *_medir(lambda: indice.buscar(q, ordenar="fecha_desc"), repeticiones), indice.buscar(q)[1])
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara la latencia del índice de búsqueda con LIKE")
+    parser.add_argument("--docs", type=int, default=20000, help="noticias del corpus sintético")
+    parser.add_argument("--repeticiones", type=int, default=10)
+    parser.add_argument("--mysql", action="store_true", help="usar la tabla noticias real")
+    args = parser.parse_args()
+
+    if args.mysql:
+        bench_mysql(args.repeticiones)
+    else:
+        bench_sintetico(args.docs, args.repeticiones)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Benchmark de extracción de noticias: planes compilados (extraccion.py)
+frente al recorrido anterior, que releía la configuración de la fuente y
+volvía a interpretar cada selector CSS en cada noticia. También compara el
+parseo de la página entera con el de solo los contenedores.
+
+Usa las páginas guardadas en --paginas (un .html por fuente, con el nombre
+que da --descargar); las fuentes sin página guardada usan una sintética con
+sus selectores.
+
+    python bench_extraccion.py --descargar paginas/   # guardar las portadas actuales
+    python bench_extraccion.py --paginas paginas/
+    python bench_extraccion.py                        # solo páginas sintéticas
+"""
+
+import sys
+import os
+import re
+import time
+import argparse
+from datetime import datetime
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sources import FUENTES
+from extraccion import Extraccion, parsear, _fecha
+
+
+def _archivo(fuente):
+    return re.sub(r"[^\w.-]+", "_", fuente["url"].split("://", 1)[-1]).strip("_") + ".html"
+
+
+def _html_para(selector, contenido, link=None):
+    """
+    HTML mínimo que cumple el selector: "h2.news__title a" ->
+    <h2 class="news__title"><a href=...>contenido</a></h2>. Si el contenido es
+    la ruta de una imagen, va en src/data-img-url del elemento más interno.
+    """
+    if not selector:
+        return ""
+    partes = selector.split("::attr(")[0].split()
+    html = None
+    for parte in reversed(partes):
+        etiqueta, _, clases = parte.partition(".")
+        etiqueta = etiqueta or "div"
+        atributos = f' class="{clases.replace(".", " ")}"' if clases else ""
+        if etiqueta == "a":
+            atributos += f' href="{link or "/seccion"}"'
+        if html is None and contenido.startswith("/img/"):
+            atributos += f' src="{contenido}" data-img-url="{contenido}"'
+            html = f"<img{atributos}>" if etiqueta == "img" else f"<{etiqueta}{atributos}></{etiqueta}>"
+        else:
+            html = f"<{etiqueta}{atributos}>{contenido if html is None else html}</{etiqueta}>"
+    return html
+
+
+def _pagina_sintetica(fuente, items=60):
+    cuerpo = []
+    for i in range(items):
+        contenido = (
+            _html_para(fuente.get("title_selector"), f"Titular número {i} de {fuente['fuente']}", f"/nota/{i}")
+            + _html_para(fuente.get("img_selector"), f"/img/{i}.jpg")
+            + _html_para(fuente.get("summary_selector"), f"Resumen de la noticia {i}")
+            + _html_para(fuente.get("author_selector"), "Redacción")
+            + _html_para(fuente.get("date_selector"), "01/05/2024")
+            + _html_para(fuente.get("category_selector"), "Actualidad")
+        )
+        cuerpo.append(_html_para(fuente["container"], "\x00").replace("\x00", contenido))
+    ruido = "<nav>" + "".join(f'<a href="/seccion/{i}">Sección {i}</a>' for i in range(80)) + "</nav>"
+    return f"<html><body>{ruido}{''.join(cuerpo)}<footer>{ruido}</footer></body></html>"
+
+
+def extraer_antes(fuente, soup):
+    """
+    Recorrido anterior a los planes compilados, como estaba en scrape_fuente.
+    """
+    noticias = []
+    use_container = bool(fuente.get("container"))
+    items = soup.select(fuente["container"]) if use_container else soup.select(fuente.get("selector", "a"))
+    for item in items:
+        if use_container and fuente.get("title_selector"):
+            anchor = item.select_one(fuente["title_selector"]) or item.find('a', href=True)
+        else:
+            anchor = item if getattr(item, 'name', None) == 'a' else item.find('a', href=True)
+        link = anchor.get('href') if anchor and anchor.has_attr('href') else None
+        titulo = anchor.get_text(strip=True) if anchor else (item.get_text(strip=True) if item else None)
+        if not titulo or not link:
+            continue
+        link = urljoin(fuente["base"], link)
+        imagen = None
+        if use_container and fuente.get("img_selector"):
+            img_el = item.select_one(fuente["img_selector"].split("::attr(")[0].strip())
+            if img_el:
+                imagen = img_el.get("src") or img_el.get("data-src") or img_el.get("data-img-url")
+            if not imagen and "::attr(" in fuente["img_selector"]:
+                attr_name = fuente["img_selector"].split("::attr(", 1)[1][:-1]
+                if img_el and img_el.get(attr_name):
+                    imagen = img_el.get(attr_name)
+        if imagen:
+            imagen = urljoin(fuente["base"], imagen)
+        categoria = None
+        if use_container and fuente.get("category_selector"):
+            cat_el = item.select_one(fuente["category_selector"])
+            if cat_el:
+                categoria = cat_el.get_text(strip=True)
+        resumen = autor = None
+        if use_container and fuente.get("summary_selector"):
+            sum_el = item.select_one(fuente["summary_selector"])
+            if sum_el:
+                resumen = sum_el.get_text(strip=True)
+        if use_container and fuente.get("author_selector"):
+            aut_el = item.select_one(fuente["author_selector"])
+            if aut_el:
+                autor = aut_el.get_text(strip=True)
+        fecha = datetime.today().date()
+        if use_container and fuente.get("date_selector"):
+            date_el = item.select_one(fuente["date_selector"])
+            if date_el:
+                fecha = _fecha(date_el.get_text(strip=True)) or fecha
+        noticias.append({"titulo": titulo, "link": link, "categoria": categoria or fuente.get("categoria"),
+                         "fecha": fecha, "resumen": resumen, "autor": autor,
+                         "imagen": imagen, "fuente": fuente["fuente"]})
+    return noticias
+
+
+def _medir(funcion, paginas, repeticiones):
+    items = 0
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for fuente, soup in paginas:
+            items += len(funcion(fuente, soup))
+    return items / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mide noticias/segundo de la extracción antes y después de los planes")
+    parser.add_argument("--paginas", help="directorio con páginas guardadas (un .html por fuente)")
+    parser.add_argument("--descargar", metavar="DIR", help="descargar las portadas actuales a DIR y salir")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.descargar:
+        from descargas import descargar
+        os.makedirs(args.descargar, exist_ok=True)
+        for fuente in FUENTES:
+            try:
+                with open(os.path.join(args.descargar, _archivo(fuente)), "w", encoding="utf-8") as f:
+                    f.write(descargar(fuente["url"], usar_cache=False)[0])
+                print(f"💾 {fuente['url']}")
+            except Exception as e:
+                print(f"❌ {fuente['url']}: {e}")
+        return
+
+    paginas = []
+    htmls = []
+    guardadas = 0
+    for fuente in FUENTES:
+        ruta = os.path.join(args.paginas, _archivo(fuente)) if args.paginas else None
+        if ruta and os.path.exists(ruta):
+            with open(ruta, encoding="utf-8") as f:
+                html = f.read()
+            guardadas += 1
+        else:
+            html = _pagina_sintetica(fuente)
+        htmls.append((fuente, html))
+        paginas.append((fuente, BeautifulSoup(html, "html.parser")))
+    print(f"📄 {len(paginas)} páginas ({guardadas} guardadas, {len(paginas) - guardadas} sintéticas)")
+
+    # Mismo resultado con los dos recorridos
+    for fuente, soup in paginas:
+        assert extraer_antes(fuente, soup) == list(Extraccion(fuente, soup)), fuente["url"]
+
+    antes = _medir(extraer_antes, paginas, args.repeticiones)
+    despues = _medir(lambda fuente, soup: list(Extraccion(fuente, soup)), paginas, args.repeticiones)
+    print(f"🐢 Antes:   {antes:,.0f} noticias/s")
+    print(f"⚡ Después: {despues:,.0f} noticias/s ({despues / antes:.2f}x)")
+
+    # Parseo de la página entera frente a solo los contenedores (SoupStrainer)
+    totales = {False: [0.0, 0, 0], True: [0.0, 0, 0]}
+    for fuente, html in htmls:
+        for parcial in (False, True):
+            _, parseo = parsear(dict(fuente, parseo_parcial=parcial), html, medir_memoria=True)
+            totales[parcial][0] += parseo["segundos"]
+            totales[parcial][1] = max(totales[parcial][1], parseo["pico"])
+            totales[parcial][2] += parseo["memoria"]
+    for parcial, (segundos, pico, memoria) in totales.items():
+        print(f"{'✂️ Solo contenedores' if parcial else '📄 Página entera'}: {segundos * 1000:.0f} ms en total, "
+              f"pico máx. {pico / 1024:.0f} KB, árboles {memoria / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,475 @@
+import re
+import html
+import math
+import threading
+from datetime import date, datetime
+from dedup import quitar_tildes
+
+# ----------------- ÍNDICE DE BÚSQUEDA EN MEMORIA -----------------
+# Índice invertido de titulo + resumen para /api/noticias/buscar. El parser
+# FULLTEXT de MySQL no pliega tildes ("huánuco" / "huanuco"), ignora tokens
+# de menos de 3 letras y usa stopwords en inglés; aquí se tokeniza en
+# español y se actualiza con cada lote que guarda el scraper.
+
+# Stopwords frecuentes del español (ya sin tildes)
+STOPWORDS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante antes asi aun bajo cada como con contra cual cuando de del
+desde donde dos el ella ellas ellos en entre era eran es esa esas ese eso esos esta estaba estan estas este esto
+estos fue fueron ha habia han hasta hay la las le les lo los mas me mi mientras muy nada ni no nos o otra otras
+otro otros para pero poco por porque que quien se segun ser si sin sino sobre solo su sus tambien tan te tiene
+todo todos tras tu u un una unas uno unos y ya e
+""".split())
+
+_TOKEN = re.compile(r"[0-9a-z]+")
+_PALABRA = re.compile(r"\w+", re.UNICODE)
+_FRASE = re.compile(r'"([^"]+)"')
+
+# BM25
+K1 = 1.2
+B = 0.75
+PESO_TITULO = 2      # las apariciones en el título cuentan doble
+SEPARACION_CAMPOS = 1000  # las frases no cruzan de título a resumen
+
+# Noticias similares (similares): términos más representativos por TF-IDF
+MAX_TERMINOS_SIMILARES = 25
+MAX_DF_SIMILARES = 0.1    # términos en más del 10% de las noticias no aportan
+CANDIDATOS_POR_VECINO = 5  # candidatos que se puntúan con el coseno exacto por vecino pedido
+
+FILTROS_INDICE = ("categoria", "departamento", "fuente", "tipo")
+FUENTES_EXCLUIDAS = ("peru21", "peru 21")
+
+
+def raiz(token):
+    """
+    Stemming ligero: quita el plural ('regiones' -> 'region', 'luces' -> 'luz').
+    """
+    if len(token) > 4 and token.endswith("ces"):
+        return token[:-3] + "z"
+    if len(token) > 4 and token.endswith("es") and token[-3] not in "aeiou":
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and token[-2] in "aeiou":
+        return token[:-1]
+    return token
+
+
+def tokenizar(texto, con_stopwords=False):
+    """
+    Devuelve las raíces de las palabras del texto: minúsculas, sin tildes y
+    sin stopwords. Conserva tokens cortos como 'ica' o 'bcr'.
+    """
+    plano = quitar_tildes((texto or "").lower())
+    tokens = _TOKEN.findall(plano)
+    if not con_stopwords:
+        tokens = [t for t in tokens if t not in STOPWORDS]
+    return [raiz(t) for t in tokens]
+
+
+def analizar_consulta(q):
+    """
+    Devuelve (terminos, frases): todos los términos deben aparecer (AND) y
+    cada frase "entre comillas" debe aparecer en orden.
+    """
+    texto = q or ""
+    frases = [tokenizar(crudo) for crudo in _FRASE.findall(texto)]
+    terminos = []
+    for token in tokenizar(_FRASE.sub(" ", texto)) + [t for frase in frases for t in frase]:
+        if token not in terminos:
+            terminos.append(token)
+    frases = [frase for frase in frases if len(frase) > 1]
+    return terminos, frases
+
+
+def _texto_fecha(valor):
+    if isinstance(valor, datetime):
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return str(valor) if valor else None
+
+
+def resaltar(texto, terminos, max_palabras=None):
+    """
+    Escapa el texto y envuelve en <mark> las palabras que coinciden con los
+    términos. Con max_palabras devuelve un fragmento centrado en la primera
+    coincidencia.
+    """
+    texto = texto or ""
+    terminos = set(terminos)
+    palabras = list(_PALABRA.finditer(texto))
+    coincide = [any(t in terminos for t in tokenizar(p.group(), con_stopwords=True)) for p in palabras]
+
+    inicio, fin = 0, len(texto)
+    prefijo = sufijo = ""
+    if max_palabras and len(palabras) > max_palabras:
+        primera = coincide.index(True) if True in coincide else 0
+        desde = max(0, min(primera - max_palabras // 3, len(palabras) - max_palabras))
+        hasta = desde + max_palabras
+        inicio = palabras[desde].start()
+        fin = palabras[hasta - 1].end()
+        prefijo = "… " if desde > 0 else ""
+        sufijo = " …" if hasta < len(palabras) else ""
+
+    partes = []
+    cursor = inicio
+    for palabra, es_termino in zip(palabras, coincide):
+        if palabra.start() < inicio or palabra.end() > fin:
+            continue
+        partes.append(html.escape(texto[cursor:palabra.start()]))
+        if es_termino:
+            partes.append(f"<mark>{html.escape(palabra.group())}</mark>")
+        else:
+            partes.append(html.escape(palabra.group()))
+        cursor = palabra.end()
+    partes.append(html.escape(texto[cursor:fin]))
+    return prefijo + "".join(partes) + sufijo
+
+
+class IndiceBusqueda:
+    """
+    Índice invertido término -> {id: (tf, [posiciones])} con puntuación BM25.
+
+    Seguro entre hilos: el scraper agrega noticias mientras la API busca.
+    """
+
+    def __init__(self):
+        self._postings = {}
+        self._docs = {}       # id -> metadatos para filtrar, ordenar y resaltar
+        self._longitud_total = 0
+        self._lock = threading.RLock()
+        self.listo = False
+        # Mayor id leído de la BD: refrescar_indice lee solo los posteriores
+        # (los que llegan por oyente de ingesta no cuentan: otro proceso pudo
+        # insertar ids menores que aún no se leyeron)
+        self.ultimo_id = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def ids(self):
+        with self._lock:
+            return list(self._docs)
+
+    def agregar(self, noticias):
+        """
+        Indexa (o reindexa) noticias: dicts con id, titulo y resumen.
+        """
+        with self._lock:
+            for noticia in noticias:
+                fuente = (noticia.get("fuente") or "")
+                if quitar_tildes(fuente.strip().lower()) in FUENTES_EXCLUIDAS:
+                    continue
+                doc_id = noticia["id"]
+                if doc_id in self._docs:
+                    self._eliminar(doc_id)
+
+                tokens_titulo = tokenizar(noticia.get("titulo"))
+                tokens_resumen = tokenizar(noticia.get("resumen"))
+                posiciones = {}
+                norma_tf = 0
+                for pos, token in enumerate(tokens_titulo):
+                    posiciones.setdefault(token, []).append(pos)
+                for pos, token in enumerate(tokens_resumen, start=SEPARACION_CAMPOS):
+                    posiciones.setdefault(token, []).append(pos)
+                for token, lista in posiciones.items():
+                    tf = sum(PESO_TITULO if p < SEPARACION_CAMPOS else 1 for p in lista)
+                    self._postings.setdefault(token, {})[doc_id] = (tf, lista)
+                    norma_tf += tf * tf
+
+                longitud = PESO_TITULO * len(tokens_titulo) + len(tokens_resumen)
+                self._docs[doc_id] = {
+                    "titulo": noticia.get("titulo") or "",
+                    "resumen": noticia.get("resumen") or "",
+                    "categoria": noticia.get("categoria"),
+                    "departamento": noticia.get("departamento"),
+                    "fuente": noticia.get("fuente"),
+                    "tipo": noticia.get("tipo"),
+                    "fecha": _texto_fecha(noticia.get("fecha")),
+                    "fecha_scraping": _texto_fecha(noticia.get("fecha_scraping")),
+                    "longitud": longitud,
+                    "norma_tf": math.sqrt(norma_tf),
+                    "terminos": list(posiciones),
+                }
+                self._longitud_total += longitud
+
+    def eliminar(self, doc_id):
+        with self._lock:
+            if doc_id in self._docs:
+                self._eliminar(doc_id)
+
+    def _eliminar(self, doc_id):
+        doc = self._docs.pop(doc_id)
+        self._longitud_total -= doc["longitud"]
+        for token in doc["terminos"]:
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[token]
+
+    def _cumple_filtros(self, doc, filtros):
+        for campo in FILTROS_INDICE:
+            if filtros.get(campo) and doc[campo] != filtros[campo]:
+                return False
+        if filtros.get("fecha") and doc["fecha"] != filtros["fecha"]:
+            return False
+        if filtros.get("fecha_desde") and (not doc["fecha"] or doc["fecha"] < filtros["fecha_desde"]):
+            return False
+        if filtros.get("fecha_hasta") and (not doc["fecha"] or doc["fecha"] > filtros["fecha_hasta"]):
+            return False
+        return True
+
+    @staticmethod
+    def _contiene_frase(posiciones_por_token, frase):
+        return any(
+            all(p + i in posiciones_por_token[t] for i, t in enumerate(frase[1:], start=1))
+            for p in posiciones_por_token[frase[0]]
+        )
+
+    def buscar(self, q, filtros=None, ordenar="relevancia", limit=10, offset=0):
+        """
+        Busca noticias que contengan todos los términos (y frases) de q.
+
+        Args:
+            q: texto de búsqueda; "entre comillas" exige la frase exacta
+            filtros: categoria, departamento, fuente, tipo, fecha, fecha_desde, fecha_hasta
+            ordenar: relevancia (BM25) o un modo de paginacion.ORDENES
+
+        Returns:
+            tuple: (resultados, total) con resultados = [{'id', 'puntuacion',
+            'titulo_resaltado', 'snippet'}] de la página pedida
+        """
+        filtros = filtros or {}
+        terminos, frases = analizar_consulta(q)
+        if not terminos:
+            return [], 0
+
+        with self._lock:
+            listas = [self._postings.get(t) for t in terminos]
+            if any(lista is None for lista in listas):
+                return [], 0
+
+            # Intersección empezando por el término menos frecuente
+            listas_ordenadas = sorted(listas, key=len)
+            candidatos = set(listas_ordenadas[0])
+            for lista in listas_ordenadas[1:]:
+                candidatos &= lista.keys()
+                if not candidatos:
+                    return [], 0
+
+            n_docs = len(self._docs)
+            media = self._longitud_total / n_docs if n_docs else 0
+            idfs = [math.log(1 + (n_docs - len(lista) + 0.5) / (len(lista) + 0.5)) for lista in listas]
+            hay_filtros = any(filtros.values())
+            puntuados = []
+            for doc_id in candidatos:
+                doc = self._docs[doc_id]
+                if hay_filtros and not self._cumple_filtros(doc, filtros):
+                    continue
+                if frases:
+                    posiciones = {t: set(lista[doc_id][1]) for t, lista in zip(terminos, listas)}
+                    if any(not self._contiene_frase(posiciones, frase) for frase in frases):
+                        continue
+                norma = K1 * (1 - B + B * doc["longitud"] / media) if media else K1
+                puntuacion = 0.0
+                for lista, idf in zip(listas, idfs):
+                    tf = lista[doc_id][0]
+                    puntuacion += idf * tf * (K1 + 1) / (tf + norma)
+                puntuados.append((doc_id, puntuacion, doc))
+
+            _ordenar_resultados(puntuados, ordenar)
+            pagina = puntuados[offset:offset + limit]
+            resultados = [{
+                "id": doc_id,
+                "puntuacion": round(puntuacion, 4),
+                "titulo_resaltado": resaltar(doc["titulo"], terminos),
+                "snippet": resaltar(doc["resumen"], terminos, max_palabras=30),
+            } for doc_id, puntuacion, doc in pagina]
+            return resultados, len(puntuados)
+
+    def _idf(self, termino):
+        return math.log(len(self._docs) / len(self._postings[termino]))
+
+    def _norma_tfidf(self, doc_id):
+        return math.sqrt(sum(
+            (self._postings[t][doc_id][0] * self._idf(t)) ** 2 for t in self._docs[doc_id]["terminos"]
+        ))
+
+    def similares(self, doc_id, limit=10):
+        """
+        Noticias más parecidas a doc_id por similitud coseno de TF-IDF.
+
+        Solo se usan los MAX_TERMINOS_SIMILARES términos de mayor peso de la
+        noticia y se descartan los muy frecuentes, así que los candidatos salen
+        de listas cortas. Los candidatos se preordenan con la norma de tf
+        guardada al indexar y solo los mejores se puntúan con el coseno exacto.
+
+        Returns:
+            list: [(id, puntuacion)] de mayor a menor, sin doc_id
+        """
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            if not doc:
+                return []
+            max_df = max(2, MAX_DF_SIMILARES * len(self._docs))
+            pesos = []
+            for termino in doc["terminos"]:
+                postings = self._postings[termino]
+                if 2 <= len(postings) <= max_df:
+                    idf = self._idf(termino)
+                    # En corpus chicos un término puede estar en todas (idf 0): no aporta
+                    if idf > 0:
+                        pesos.append((postings[doc_id][0] * idf, idf, postings))
+            pesos.sort(key=lambda p: p[0], reverse=True)
+            pesos = pesos[:MAX_TERMINOS_SIMILARES]
+            if not pesos:
+                return []
+
+            acumulado = {}
+            for peso, idf, postings in pesos:
+                for otro, (tf, _) in postings.items():
+                    if otro != doc_id:
+                        acumulado[otro] = acumulado.get(otro, 0.0) + peso * tf * idf
+
+            candidatos = sorted(acumulado, key=lambda o: acumulado[o] / self._docs[o]["norma_tf"], reverse=True)
+            norma = self._norma_tfidf(doc_id)
+            if not norma:
+                return []
+            puntuados = []
+            for otro in candidatos[:limit * CANDIDATOS_POR_VECINO]:
+                norma_otro = self._norma_tfidf(otro)
+                if norma_otro:
+                    puntuados.append((otro, acumulado[otro] / (norma * norma_otro)))
+            puntuados.sort(key=lambda r: (r[1], r[0]), reverse=True)
+            return [(otro, round(puntuacion, 4)) for otro, puntuacion in puntuados[:limit]]
+
+    def estadisticas(self):
+        with self._lock:
+            return {"documentos": len(self._docs), "terminos": len(self._postings), "listo": self.listo}
+
+
+def _ordenar_resultados(puntuados, ordenar):
+    # Mismo criterio que paginacion.ORDENES (NULL primero en ASC, último en DESC)
+    if ordenar == "fecha_asc":
+        puntuados.sort(key=lambda r: -r[0])
+        puntuados.sort(key=lambda r: r[2]["fecha_scraping"] or "", reverse=True)
+        puntuados.sort(key=lambda r: (r[2]["fecha"] is not None, r[2]["fecha"] or ""))
+    elif ordenar in ("titulo_asc", "titulo_desc"):
+        puntuados.sort(key=lambda r: -r[0])
+        puntuados.sort(key=lambda r: r[2]["fecha_scraping"] or "", reverse=True)
+        puntuados.sort(key=lambda r: r[2]["titulo"].lower(), reverse=ordenar == "titulo_desc")
+    elif ordenar == "fecha_desc":
+        puntuados.sort(key=lambda r: (r[2]["fecha_scraping"] or "", r[2]["fecha"] or "", r[0]), reverse=True)
+    else:
+        puntuados.sort(key=lambda r: (r[1], r[2]["fecha_scraping"] or "", r[0]), reverse=True)
+
+
+# ----------------- ÍNDICE DEL PROCESO -----------------
+_indice = IndiceBusqueda()
+TAM_LOTE_CARGA = 5000
+
+
+def obtener_indice():
+    return _indice
+
+
+def _cargar_desde(ultimo_id, tam_lote):
+    # Agrega al índice las noticias con id > ultimo_id, por lotes de id.
+    # Import diferido: buscador no necesita MySQL para indexar ni buscar
+    from db import conectar
+
+    conn = conectar()
+    if not conn:
+        return None
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        cargadas = 0
+        while True:
+            cursor.execute("""
+                SELECT id, titulo, resumen, categoria, departamento, fuente, tipo, fecha, fecha_scraping
+                FROM noticias WHERE id > %s ORDER BY id LIMIT %s
+            """, (ultimo_id, tam_lote))
+            filas = cursor.fetchall()
+            if not filas:
+                break
+            _indice.agregar(filas)
+            cargadas += len(filas)
+            ultimo_id = _indice.ultimo_id = filas[-1]["id"]
+        return cargadas
+    finally:
+        if conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+def calentar_indice(tam_lote=TAM_LOTE_CARGA):
+    """
+    Carga todas las noticias de la BD en el índice del proceso (por lotes de
+    id) y lo marca como listo. Pensado para correr en un hilo al iniciar la app.
+    """
+    try:
+        if _cargar_desde(0, tam_lote) is None:
+            return False
+        _indice.listo = True
+        print(f"🔎 Índice de búsqueda listo: {len(_indice)} noticias")
+        return True
+    except Exception as e:
+        print(f"❌ Error al cargar el índice de búsqueda: {e}")
+        return False
+
+
+_calentamiento = None
+_calentamiento_lock = threading.Lock()
+
+
+def iniciar_calentamiento():
+    """
+    Lanza calentar_indice en un hilo la primera vez que se llama (también
+    bajo WSGI, donde no corre el __main__ de app.py). Si la carga falló, la
+    reintenta en la siguiente llamada.
+    """
+    global _calentamiento
+    with _calentamiento_lock:
+        if _calentamiento is None or (not _calentamiento.is_alive() and not _indice.listo):
+            _calentamiento = threading.Thread(target=calentar_indice, daemon=True)
+            _calentamiento.start()
+
+
+_refresco_lock = threading.Lock()
+
+
+def refrescar_indice(tam_lote=TAM_LOTE_CARGA):
+    """
+    Agrega las noticias que otro proceso (scraper.py) insertó después de la
+    última indexada. Si ya hay un refresco en curso no espera. Devuelve
+    cuántas agregó, o None si no corrió (índice sin cargar, refresco en
+    curso o error).
+    """
+    if not _indice.listo or not _refresco_lock.acquire(blocking=False):
+        return None
+    try:
+        return _cargar_desde(_indice.ultimo_id, tam_lote)
+    except Exception as e:
+        print(f"⚠️ No se pudo refrescar el índice de búsqueda: {e}")
+        return None
+    finally:
+        _refresco_lock.release()
+
+
+def reindexar_indice(tam_lote=TAM_LOTE_CARGA):
+    """
+    Vuelve a leer todas las noticias sobre el índice cargado, para cuando
+    otro proceso reescribió filas ya indexadas (clasificador.reclasificar_todo):
+    refrescar_indice solo lee las de id posterior. Las búsquedas siguen
+    respondiendo mientras tanto. Devuelve cuántas leyó, o None si no corrió
+    (índice sin cargar, refresco en curso o error).
+    """
+    if not _indice.listo or not _refresco_lock.acquire(blocking=False):
+        return None
+    try:
+        return _cargar_desde(0, tam_lote)
+    except Exception as e:
+        print(f"⚠️ No se pudo reindexar el índice de búsqueda: {e}")
+        return None
+    finally:
+        _refresco_lock.release()
@@ -0,0 +1,137 @@
+import os
+import json
+import hashlib
+import threading
+
+# ----------------- CONFIG CACHE HTTP -----------------
+# Validadores HTTP (ETag / Last-Modified) y hash del cuerpo de cada página de
+# listado, persistidos en disco para que sobrevivan entre ciclos y reinicios.
+RUTA_CACHE = os.getenv(
+    "SCRAPER_CACHE_HTTP",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "validadores_http.json")
+)
+
+
+class CacheValidadores:
+    """
+    Cache de validadores por URL de fuente.
+
+    Cada entrada guarda etag, last_modified, hash del cuerpo y los conteos
+    acumulados de hits (304 o cuerpo idéntico) y misses (página nueva).
+    """
+
+    def __init__(self, ruta=RUTA_CACHE):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._entradas = self._cargar()
+
+    def _cargar(self):
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _guardar(self):
+        # Escritura atómica: un archivo a medio escribir no debe romper el próximo arranque
+        try:
+            os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+            tmp = f"{self.ruta}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entradas, f, ensure_ascii=False, indent=1)
+            os.replace(tmp, self.ruta)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la cache HTTP: {e}")
+
+    def cabeceras_condicionales(self, url):
+        """
+        Devuelve las cabeceras If-None-Match / If-Modified-Since para la URL.
+        """
+        with self._lock:
+            entrada = self._entradas.get(url) or {}
+        headers = {}
+        if entrada.get("etag"):
+            headers["If-None-Match"] = entrada["etag"]
+        if entrada.get("last_modified"):
+            headers["If-Modified-Since"] = entrada["last_modified"]
+        return headers
+
+    def registrar_respuesta(self, url, response):
+        """
+        Cuenta la respuesta como hit o miss y devuelve (cambio, validadores).
+
+        Si la página cambió, sus validadores no se guardan todavía: el
+        llamador los pasa a confirmar() cuando el listado quedó guardado en la
+        BD. Si el guardado falla, la próxima descarga vuelve a traer la página
+        completa en lugar de un 304.
+        """
+        with self._lock:
+            entrada = self._entradas.setdefault(url, {"hits": 0, "misses": 0})
+            if response.status_code == 304:
+                entrada["hits"] = entrada.get("hits", 0) + 1
+                self._guardar()
+                return False, None
+
+            validadores = {
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "hash": hashlib.sha1(response.content).hexdigest(),
+            }
+            if validadores["hash"] != entrada.get("hash"):
+                entrada["misses"] = entrada.get("misses", 0) + 1
+                self._guardar()
+                return True, validadores
+
+            # Mismo cuerpo que el último listado guardado: los validadores nuevos ya valen
+            entrada.update(validadores)
+            entrada["hits"] = entrada.get("hits", 0) + 1
+            self._guardar()
+            return False, None
+
+    def confirmar(self, url, validadores):
+        """
+        Guarda los validadores de una página ya procesada y guardada.
+        """
+        if not validadores:
+            return
+        with self._lock:
+            self._entradas.setdefault(url, {"hits": 0, "misses": 0}).update(validadores)
+            self._guardar()
+
+    def validadores(self, url):
+        """
+        Devuelve (etag, last_modified, hash del cuerpo) guardados para la URL.
+        """
+        with self._lock:
+            entrada = self._entradas.get(url) or {}
+        return entrada.get("etag"), entrada.get("last_modified"), entrada.get("hash")
+
+    def estadisticas(self, urls=None):
+        """
+        Devuelve {url: {"hits": n, "misses": n}} para las URLs pedidas (o todas).
+        """
+        with self._lock:
+            urls = list(self._entradas) if urls is None else urls
+            return {
+                url: {
+                    "hits": self._entradas.get(url, {}).get("hits", 0),
+                    "misses": self._entradas.get(url, {}).get("misses", 0),
+                }
+                for url in urls
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache():
+    """
+    Devuelve la cache de validadores compartida del proceso.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CacheValidadores()
+    return _cache
@@ -0,0 +1,250 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+# ----------------- CONFIG CACHE DE RESPUESTAS -----------------
+# Cache de las respuestas de lectura de la API en dos niveles:
+#   1. LRU en memoria del proceso.
+#   2. SQLite local compartido por todos los workers WSGI de la máquina.
+# Cada entrada guarda la "generación" de datos con la que se calculó. La
+# generación vive en el SQLite y solo sube cuando se insertan noticias, así
+# que las entradas caducan exactamente cuando cambian los datos. La
+# generación de reescritura sube además cuando cambian filas ya guardadas
+# (reclasificación): los índices en memoria deben releerlas, no solo leer
+# las nuevas.
+CAPACIDAD_LRU = int(os.getenv("API_CACHE_LRU", "512"))
+RUTA_SQLITE = os.getenv(
+    "API_CACHE_SQLITE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "respuestas.sqlite3")
+)
+
+
+def clave_cache(ruta, args):
+    """
+    Clave normalizada: ruta + parámetros no vacíos ordenados.
+    ('/api/noticias', {'page': '1', 'categoria': ''}) -> '/api/noticias?page=1'
+    """
+    pares = []
+    for nombre in sorted(args.keys()):
+        valores = args.getlist(nombre) if hasattr(args, "getlist") else [args[nombre]]
+        pares += [f"{nombre}={valor}" for valor in sorted(valores) if valor not in (None, "")]
+    return f"{ruta}?{'&'.join(pares)}" if pares else ruta
+
+
+class CacheRespuestas:
+    """
+    Cache LRU + SQLite de respuestas (estado, cuerpo, mimetype) por clave.
+
+    Si el SQLite no está disponible sigue funcionando solo con el LRU (y una
+    generación local al proceso).
+    """
+
+    def __init__(self, ruta=RUTA_SQLITE, capacidad=CAPACIDAD_LRU):
+        self.ruta = ruta
+        self.capacidad = max(1, capacidad)
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._generacion_local = 0
+        self._reescritura_local = 0
+        self._validadores = {}
+        self.compartida = True
+        self.hits_memoria = 0
+        self.hits_compartida = 0
+        self.misses = 0
+        self._inicializar()
+
+    # ---- nivel compartido (SQLite) ----
+    def _conexion(self):
+        # sqlite3 no comparte conexiones entre hilos: una por hilo
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.ruta, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _inicializar(self):
+        try:
+            os.makedirs(os.path.dirname(self.ruta) or ".", exist_ok=True)
+            conn = self._conexion()
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    clave TEXT PRIMARY KEY, generacion INTEGER, estado INTEGER,
+                    cuerpo BLOB, mimetype TEXT, creado REAL
+                )
+            """)
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (nombre TEXT PRIMARY KEY, valor INTEGER)")
+            conn.execute("INSERT OR IGNORE INTO meta VALUES ('generacion', 0), ('reescritura', 0)")
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache compartida de respuestas no disponible ({e}), se usa solo memoria")
+            self.compartida = False
+
+    def _desactivar_compartida(self, e):
+        print(f"⚠️ Error en la cache compartida de respuestas: {e}")
+        self.compartida = False
+
+    def _leer_meta(self, nombre, local):
+        if self.compartida:
+            try:
+                fila = self._conexion().execute("SELECT valor FROM meta WHERE nombre = ?", (nombre,)).fetchone()
+                return fila[0] if fila else 0
+            except sqlite3.Error as e:
+                self._desactivar_compartida(e)
+        return local
+
+    def generacion(self):
+        """
+        Devuelve la generación actual de los datos.
+        """
+        return self._leer_meta("generacion", self._generacion_local)
+
+    def generacion_reescritura(self):
+        """
+        Devuelve cuántas veces se reescribieron filas ya guardadas.
+        """
+        return self._leer_meta("reescritura", self._reescritura_local)
+
+    def incrementar_generacion(self, reescritura=False):
+        """
+        Invalida todas las entradas (llamar cuando cambian las noticias).
+        Con reescritura=True también sube la generación de reescritura
+        (cambiaron filas que ya existían, no solo llegaron nuevas).
+        """
+        with self._lock:
+            self._generacion_local += 1
+            self._reescritura_local += reescritura
+            self._lru.clear()
+        if self.compartida:
+            try:
+                conn = self._conexion()
+                # Una sola sentencia: nadie ve la reescritura sin la generación nueva
+                conn.execute("UPDATE meta SET valor = valor + 1 WHERE nombre = 'generacion' OR (nombre = 'reescritura' AND ?)",
+                             (reescritura,))
+                conn.execute("DELETE FROM respuestas WHERE generacion < (SELECT valor FROM meta WHERE nombre = 'generacion')")
+            except sqlite3.Error as e:
+                self._desactivar_compartida(e)
+
+    def obtener(self, clave):
+        """
+        Devuelve (estado, cuerpo, mimetype) si hay una entrada vigente, o None.
+        """
+        generacion = self.generacion()
+        with self._lock:
+            entrada = self._lru.get(clave)
+            if entrada and entrada[0] == generacion:
+                self._lru.move_to_end(clave)
+                self.hits_memoria += 1
+                return entrada[1:]
+
+        if self.compartida:
+            try:
+                fila = self._conexion().execute(
+                    "SELECT estado, cuerpo, mimetype FROM respuestas WHERE clave = ? AND generacion = ?",
+                    (clave, generacion)
+                ).fetchone()
+            except sqlite3.Error as e:
+                self._desactivar_compartida(e)
+                fila = None
+            if fila:
+                estado, cuerpo, mimetype = fila[0], bytes(fila[1]), fila[2]
+                self._guardar_lru(clave, generacion, estado, cuerpo, mimetype)
+                with self._lock:
+                    self.hits_compartida += 1
+                return estado, cuerpo, mimetype
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def guardar(self, clave, generacion, estado, cuerpo, mimetype):
+        """
+        Guarda una respuesta calculada con la generación indicada (leída antes
+        de consultar la BD). Si entretanto cambió la generación no se guarda.
+        """
+        if generacion != self.generacion():
+            return
+        self._guardar_lru(clave, generacion, estado, cuerpo, mimetype)
+        if self.compartida:
+            try:
+                self._conexion().execute(
+                    "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?, ?)",
+                    (clave, generacion, estado, cuerpo, mimetype, time.time())
+                )
+            except sqlite3.Error as e:
+                self._desactivar_compartida(e)
+
+    def validador(self, clave, calcular):
+        """
+        Devuelve el validador (p. ej. MAX(fecha_scraping) de un filtro) de la
+        generación actual, llamando a calcular() solo la primera vez.
+        """
+        generacion = self.generacion()
+        with self._lock:
+            guardado = self._validadores.get(clave)
+            if guardado and guardado[0] == generacion:
+                return guardado[1]
+        valor = calcular()
+        if valor is not None:
+            with self._lock:
+                if len(self._validadores) >= self.capacidad:
+                    self._validadores.clear()
+                self._validadores[clave] = (generacion, valor)
+        return valor
+
+    def _guardar_lru(self, clave, generacion, estado, cuerpo, mimetype):
+        with self._lock:
+            self._lru[clave] = (generacion, estado, cuerpo, mimetype)
+            self._lru.move_to_end(clave)
+            while len(self._lru) > self.capacidad:
+                self._lru.popitem(last=False)
+
+    def estadisticas(self):
+        """
+        Devuelve hits por nivel, misses, tasa de acierto, generación y tamaños.
+        """
+        entradas_compartida = None
+        if self.compartida:
+            try:
+                entradas_compartida = self._conexion().execute("SELECT COUNT(*) FROM respuestas").fetchone()[0]
+            except sqlite3.Error as e:
+                self._desactivar_compartida(e)
+        with self._lock:
+            hits = self.hits_memoria + self.hits_compartida
+            total = hits + self.misses
+            return {
+                "hits_memoria": self.hits_memoria,
+                "hits_compartida": self.hits_compartida,
+                "misses": self.misses,
+                "tasa_acierto": round(hits / total, 3) if total else 0.0,
+                "entradas_memoria": len(self._lru),
+                "entradas_compartida": entradas_compartida,
+                "generacion": self.generacion(),
+                "compartida": self.compartida,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache_respuestas():
+    """
+    Devuelve la cache de respuestas del proceso.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CacheRespuestas()
+    return _cache
+
+
+def invalidar_por_ingesta(noticias):
+    """
+    Oyente de ingesta (db.registrar_oyente_ingesta): nuevas noticias -> nueva generación.
+    """
+    obtener_cache_respuestas().incrementar_generacion()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Clasificación de noticias por tipo (deporte, política, salud...).
+
+Las reglas se compilan una sola vez en una expresión regular con un grupo
+por tipo: cada palabra clave coincide solo como palabra completa ("gol" no
+está en "golpe" ni "liga" en "obligan"), con o sin tilde y en plural. Una
+pasada sobre el texto puntúa todos los tipos a la vez; gana el de más
+puntos y, a igualdad, el que va primero en REGLAS_TIPO.
+
+Para volver a clasificar la tabla tras cambiar las reglas:
+
+    python clasificador.py
+"""
+
+import sys
+import os
+import re
+import bisect
+import unicodedata
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mysql.connector import Error
+from lugares import minusculas, _normalizar_nombre, _regex_trie
+
+# ----------------- REGLAS DE TIPO -----------------
+# En orden de prioridad (desempate)
+REGLAS_TIPO = (
+    ("deporte", ("deporte", "futbol", "liga", "partido", "gol", "selección", "mundial")),
+    ("comedia", ("humor", "broma", "meme", "parodia", "sátira", "chiste")),
+    ("economía", ("economía", "dólar", "inflación", "bcr", "mercado", "bolsa")),
+    ("política", ("congreso", "presidente", "ministro", "política", "gobierno", "elecciones")),
+    ("policial", ("policía", "pnp", "homicidio", "robo", "capturan", "detienen")),
+    ("salud", ("salud", "hospital", "covid", "vacuna", "epidemia")),
+    ("educación", ("educación", "universidad", "colegio", "estudiantes", "sunedu")),
+)
+TIPO_POR_DEFECTO = "informativo"
+
+# Una palabra del título pesa más que una del resumen, la categoría o la fuente
+PESOS_CAMPOS = (("titulo", 2), ("resumen", 1), ("categoria", 1), ("fuente", 1))
+
+TAM_LOTE_RECLASIFICAR = 1000
+
+
+class ClasificadorTipo:
+    """
+    Reglas de tipo compiladas en una sola expresión regular.
+    """
+
+    def __init__(self, reglas=REGLAS_TIPO, defecto=TIPO_POR_DEFECTO, pesos=PESOS_CAMPOS):
+        self._tipos = [tipo for tipo, _ in reglas]
+        self._defecto = defecto
+        self._campos = [campo for campo, _ in pesos]
+        self._pesos = [peso for _, peso in pesos]
+        # Un grupo de captura por tipo: lastindex dice qué tipo coincidió
+        grupos = "|".join(f"({_regex_trie({_normalizar_nombre(p) for p in palabras})})"
+                          for _, palabras in reglas)
+        self._patron = re.compile(r"(?<!\w)(?:" + grupos + r")(?:e?s)?(?!\w)")
+
+    def puntuar(self, titulo, resumen=None, categoria=None, fuente=None):
+        """
+        Devuelve {tipo: puntos} con los tipos que tienen alguna coincidencia.
+        """
+        return self.puntuar_lote([{"titulo": titulo, "resumen": resumen,
+                                   "categoria": categoria, "fuente": fuente}])[0]
+
+    def puntuar_lote(self, noticias):
+        """
+        Igual que puntuar() para una lista de dicts (titulo, resumen,
+        categoria, fuente), con una sola pasada de la expresión regular.
+        """
+        textos = [unicodedata.normalize("NFC", str(n.get(campo) or ""))
+                  for n in noticias for campo in self._campos]
+        # \x00 no es \w: ninguna palabra cruza de un campo al siguiente
+        plano = minusculas("\x00".join(textos))
+        inicios = []
+        posicion = 0
+        for texto in textos:
+            inicios.append(posicion)
+            posicion += len(texto) + 1
+
+        puntos = [{} for _ in noticias]
+        por_noticia = len(self._campos)
+        for coincidencia in self._patron.finditer(plano):
+            indice = bisect.bisect_right(inicios, coincidencia.start()) - 1
+            noticia, campo = divmod(indice, por_noticia)
+            tipo = self._tipos[coincidencia.lastindex - 1]
+            puntos[noticia][tipo] = puntos[noticia].get(tipo, 0) + self._pesos[campo]
+        return puntos
+
+    def _elegir(self, puntos):
+        if not puntos:
+            return self._defecto
+        # max() devuelve el primero de los empatados: el orden de las reglas
+        return max((t for t in self._tipos if t in puntos), key=lambda t: puntos[t])
+
+    def clasificar(self, titulo, resumen=None, categoria=None, fuente=None):
+        return self._elegir(self.puntuar(titulo, resumen, categoria, fuente))
+
+    def clasificar_lote(self, noticias):
+        return [self._elegir(p) for p in self.puntuar_lote(noticias)]
+
+
+_clasificador = ClasificadorTipo()
+
+
+def clasificar_tipo(titulo, resumen, categoria, fuente):
+    """
+    Tipo de la noticia ('deporte', 'política', ... o 'informativo').
+    """
+    return _clasificador.clasificar(titulo, resumen, categoria, fuente)
+
+
+def clasificar_tipos_lote(noticias):
+    """
+    Igual que clasificar_tipo para una lista de dicts con las claves
+    titulo, resumen, categoria y fuente.
+    """
+    return _clasificador.clasificar_lote(noticias)
+
+
+# ----------------- RECLASIFICACIÓN -----------------
+def reclasificar_todo(tam_lote=TAM_LOTE_RECLASIFICAR):
+    """
+    Recalcula categoria, departamento y tipo de toda la tabla en orden de
+    id, por lotes, con las mismas reglas que la ingesta, y actualiza solo
+    las filas que cambian. La categoría guardada hace de categoría de la
+    fuente: el nombre de la fuente no basta porque RPP, La República y
+    Correo tienen listados nacionales y regionales.
+    """
+    from db import conectar
+    from sources import clasificar_noticias_lote
+
+    conn = conectar()
+    if not conn:
+        return False
+    revisadas = cambiadas = 0
+    try:
+        lectura = conn.cursor(dictionary=True)
+        escritura = conn.cursor()
+        ultimo_id = 0
+        while True:
+            lectura.execute(
+                "SELECT id, titulo, resumen, categoria, fuente, tipo, departamento "
+                "FROM noticias WHERE id > %s ORDER BY id LIMIT %s",
+                (ultimo_id, tam_lote)
+            )
+            filas = lectura.fetchall()
+            if not filas:
+                break
+            # Como en la ingesta: primero categoría y departamento, luego el tipo con la nueva categoría
+            clasificadas = [dict(f, **c) for f, c in zip(filas, clasificar_noticias_lote(filas))]
+            cambios = []
+            for fila, nueva, tipo in zip(filas, clasificadas, clasificar_tipos_lote(clasificadas)):
+                valores = (nueva["categoria"], tipo, nueva["departamento"])
+                if valores != (fila["categoria"], fila["tipo"], fila["departamento"]):
+                    cambios.append(valores + (fila["id"],))
+            if cambios:
+                escritura.executemany(
+                    "UPDATE noticias SET categoria = %s, tipo = %s, departamento = %s WHERE id = %s", cambios)
+            conn.commit()
+            revisadas += len(filas)
+            cambiadas += len(cambios)
+            ultimo_id = filas[-1]["id"]
+            print(f"   {revisadas} noticias revisadas, {cambiadas} actualizadas")
+        print(f"✅ {cambiadas} de {revisadas} noticias reclasificadas")
+        if cambiadas:
+            # Los filtros por categoría, tipo y departamento cambian: invalidar las
+            # respuestas cacheadas y que los índices en memoria relean las filas
+            from cache_respuestas import obtener_cache_respuestas
+            obtener_cache_respuestas().incrementar_generacion(reescritura=True)
+        return True
+    except Error as e:
+        print(f"❌ Error al reclasificar noticias: {e}")
+        return False
+    finally:
+        if conn.is_connected():
+            conn.close()
+
+
+if __name__ == "__main__":
+    exit(0 if reclasificar_todo() else 1)
@@ -0,0 +1,351 @@
+from mysql.connector import Error
+from paginacion import ORDENES, CursorInvalido, normalizar_orden, clausula_orden, codificar_cursor, decodificar_cursor, condicion_keyset
+
+# ----------------- COMPILADOR DE CONSULTAS DE LISTADO -----------------
+# Un solo lugar donde los filtros de la query string se convierten en SQL,
+# compartido por /api/noticias, /filtrar, /buscar y los listados por
+# categoría / departamento (antes cada ruta repetía su WHERE y su COUNT).
+
+FILTROS_IGUALDAD = ("fuente", "categoria", "tipo", "departamento", "fecha")
+FUENTES_EXCLUIDAS = ("Perú21", "Peru21")
+
+# ?count= : exact (por defecto) | none | estimate
+CONTEOS = ("exact", "none", "estimate")
+
+# ----------------- PROYECCIONES (?fields=) -----------------
+# Columnas que la API expone (link_hash / titulo_hash son internas y binarias).
+COLUMNAS_PUBLICAS = (
+    "id", "titulo", "link", "categoria", "tipo", "fecha", "resumen",
+    "autor", "imagen", "fuente", "departamento", "fecha_scraping", "cluster_id",
+)
+# Campos calculados: nombre -> expresión ({p} es el prefijo de tabla)
+CAMPOS_CALCULADOS = {
+    "extracto": "SUBSTR({p}resumen, 1, 240)",
+}
+# "card" es lo que dibuja una tarjeta del listado; el resumen completo se
+# pide aparte (vista previa / detalle).
+PROYECCIONES = {
+    "card": ("id", "titulo", "link", "imagen", "fuente", "fecha", "categoria", "departamento", "tipo", "fecha_scraping", "extracto"),
+    "completa": COLUMNAS_PUBLICAS,
+}
+PROYECCION_POR_DEFECTO = "card"
+
+
+class CampoInvalido(ValueError):
+    """El parámetro ?fields= pide columnas que no existen."""
+
+
+class ParametroInvalido(ValueError):
+    """?limit= o ?page= no es un entero mayor o igual a 1."""
+
+
+def entero_positivo(args, nombre, por_defecto):
+    """
+    Lee un parámetro entero >= 1 (limit, page). Un valor negativo o cero
+    terminaría en un LIMIT/OFFSET inválido para MySQL.
+    """
+    try:
+        valor = int(args.get(nombre, por_defecto))
+    except (TypeError, ValueError):
+        raise ParametroInvalido(f"{nombre} debe ser un número entero")
+    if valor < 1:
+        raise ParametroInvalido(f"{nombre} debe ser mayor o igual a 1")
+    return valor
+
+
+def resolver_campos(fields, por_defecto=PROYECCION_POR_DEFECTO):
+    """
+    Convierte ?fields= ('card', 'completa' o 'titulo,imagen') en la tupla de
+    campos. El id se incluye siempre.
+    """
+    fields = fields or por_defecto
+    if fields in PROYECCIONES:
+        return PROYECCIONES[fields]
+    campos = tuple(dict.fromkeys(c.strip() for c in fields.split(",") if c.strip()))
+    invalidos = [c for c in campos if c not in COLUMNAS_PUBLICAS and c not in CAMPOS_CALCULADOS]
+    if invalidos or not campos:
+        raise CampoInvalido(f"Campos no válidos en fields: {', '.join(invalidos) or fields}")
+    return tuple(dict.fromkeys(("id",) + campos))
+
+
+def lista_select(campos, prefijo=""):
+    """
+    Devuelve la lista de columnas del SELECT para los campos.
+    """
+    return ", ".join(
+        f"{CAMPOS_CALCULADOS[c].format(p=prefijo)} AS {c}" if c in CAMPOS_CALCULADOS else f"{prefijo}{c}"
+        for c in campos
+    )
+
+# ----------------- BÚSQUEDA (?q=) -----------------
+# ?modo= : natural (por defecto) | booleano | like
+# natural y booleano usan el índice FULLTEXT ft_titulo_resumen (MATCH ... AGAINST);
+# like es el recorrido completo de antes y queda como respaldo.
+MODOS_BUSQUEDA = {
+    "natural": "IN NATURAL LANGUAGE MODE",
+    "booleano": "IN BOOLEAN MODE",
+}
+MODO_BUSQUEDA_POR_DEFECTO = "natural"
+COLUMNAS_FULLTEXT = "titulo, resumen"
+
+# ?ordenar=relevancia solo tiene sentido con búsqueda FULLTEXT. La puntuación
+# es un float que cambia al crecer la tabla, así que no se pagina por cursor.
+ORDEN_RELEVANCIA = "relevancia"
+CLAUSULA_RELEVANCIA = "ORDER BY relevancia DESC, fecha_scraping DESC, id DESC"
+
+# Errores de MySQL ante los que se repite la búsqueda con LIKE:
+# 1191 = no existe el índice FULLTEXT, 1064 = sintaxis booleana inválida
+ERRORES_RESPALDO_LIKE = (1191, 1064)
+_fulltext_disponible = True
+
+
+class ConsultaNoticias:
+    """
+    Filtros, orden y paginación de un listado de noticias, compilados a SQL.
+    """
+
+    def __init__(self, filtros=None, ordenar=None, limit=10, page=1, cursor=None, conteo="exact", modo=None, campos=None,
+                 agrupar=False):
+        self.filtros = {k: v for k, v in (filtros or {}).items() if v}
+        self.limit = limit
+        self.page = page
+        self.conteo = conteo if conteo in CONTEOS else "exact"
+        self.agrupar = agrupar
+        self.hay_mas = False
+
+        self.modo = None
+        if "q" in self.filtros:
+            self.modo = modo if modo in MODOS_BUSQUEDA or modo == "like" else MODO_BUSQUEDA_POR_DEFECTO
+            if self.modo != "like" and not _fulltext_disponible:
+                self.modo = "like"
+
+        if ordenar == ORDEN_RELEVANCIA and self.modo in MODOS_BUSQUEDA:
+            if cursor:
+                raise CursorInvalido("El orden por relevancia no admite cursor")
+            self.ordenar = ORDEN_RELEVANCIA
+            self.valores_cursor = None
+        else:
+            self.ordenar = normalizar_orden(ordenar)
+            # Se decodifica aquí para rechazar cursores inválidos antes de abrir la conexión
+            self.valores_cursor = decodificar_cursor(cursor, self.ordenar) if cursor else None
+
+        # id y las columnas del orden van siempre: el cursor se arma con ellas
+        campos = campos or PROYECCIONES[PROYECCION_POR_DEFECTO]
+        orden = [col for col, _ in ORDENES.get(self.ordenar, [])]
+        agrupacion = ("cluster_id",) if agrupar else ()
+        self.campos = tuple(dict.fromkeys(("id",) + tuple(campos) + tuple(orden) + agrupacion))
+
+    @classmethod
+    def desde_args(cls, args, fijos=None):
+        """
+        Construye la consulta desde request.args; fijos son filtros de la ruta
+        (p. ej. {'categoria': 'nacional'}) que tienen prioridad sobre la query string.
+        """
+        filtros = {k: args.get(k) for k in FILTROS_IGUALDAD + ("fecha_desde", "fecha_hasta", "q")}
+        filtros.update(fijos or {})
+        return cls(
+            filtros=filtros,
+            ordenar=args.get("ordenar"),
+            limit=entero_positivo(args, "limit", 10),
+            page=entero_positivo(args, "page", 1),
+            cursor=args.get("cursor"),
+            conteo=args.get("count", "exact"),
+            modo=args.get("modo"),
+            campos=resolver_campos(args.get("fields")),
+            agrupar=args.get("agrupar") in ("1", "true"),
+        )
+
+    def where(self):
+        """
+        Devuelve (sql, params) con la cláusula WHERE de los filtros (sin keyset).
+        """
+        condiciones = ["(fuente IS NULL OR fuente NOT IN (%s, %s))"]
+        params = list(FUENTES_EXCLUIDAS)
+        if "ids" in self.filtros:
+            # Lote de ids (favoritos): IN sobre la clave primaria
+            condiciones.append(f"id IN ({', '.join(['%s'] * len(self.filtros['ids']))})")
+            params += list(self.filtros["ids"])
+        for campo in FILTROS_IGUALDAD:
+            if campo in self.filtros:
+                condiciones.append(f"{campo} = %s")
+                params.append(self.filtros[campo])
+        if "fecha_desde" in self.filtros:
+            condiciones.append("fecha >= %s")
+            params.append(self.filtros["fecha_desde"])
+        if "fecha_hasta" in self.filtros:
+            condiciones.append("fecha <= %s")
+            params.append(self.filtros["fecha_hasta"])
+        if self.modo in MODOS_BUSQUEDA:
+            condiciones.append(self._match())
+            params.append(self.filtros["q"])
+        elif self.modo == "like":
+            patron = f"%{self.filtros['q']}%"
+            condiciones.append("(titulo LIKE %s OR resumen LIKE %s)")
+            params += [patron, patron]
+        if self.agrupar:
+            # Una noticia por grupo: la primera (menor id) del grupo que cumple
+            # los mismos filtros. Dentro de la subconsulta las columnas sin
+            # prefijo son las de o; noticias.* es la fila de fuera.
+            condiciones.append(
+                "(cluster_id IS NULL OR NOT EXISTS (SELECT 1 FROM noticias AS o WHERE o.cluster_id = noticias.cluster_id "
+                f"AND o.id < noticias.id AND {' AND '.join(condiciones)}))"
+            )
+            params += params
+        return "WHERE " + " AND ".join(condiciones), params
+
+    def _match(self):
+        return f"MATCH({COLUMNAS_FULLTEXT}) AGAINST (%s {MODOS_BUSQUEDA[self.modo]})"
+
+    def _total_en_ventana(self):
+        # Con cursor la ventana solo vería las filas restantes, no el total del filtro
+        return self.conteo == "exact" and self.valores_cursor is None
+
+    def sql_filas(self):
+        """
+        Devuelve (sql, params) de la página de filas (limit+1 para saber si hay más).
+
+        Con count=exact y sin cursor el total viaja en la misma consulta como
+        COUNT(*) OVER() (columna _total), calculado antes del LIMIT.
+
+        Join diferido: la subconsulta resuelve filtros, orden y LIMIT leyendo
+        solo índices (en InnoDB todo índice secundario lleva el id) y las
+        columnas de la proyección se leen únicamente para las filas de la página.
+        """
+        where, params = self.where()
+        total = ", COUNT(*) OVER() AS _total" if self._total_en_ventana() else ""
+        offset = (self.page - 1) * self.limit
+
+        if self.ordenar == ORDEN_RELEVANCIA:
+            # La puntuación se calcula en la misma pasada que el filtro: sin join diferido
+            columnas = f"{lista_select(self.campos)}, {self._match()} AS relevancia{total}"
+            sql = f"SELECT {columnas} FROM noticias {where} {CLAUSULA_RELEVANCIA} LIMIT %s OFFSET %s"
+            return sql, [self.filtros["q"]] + params + [self.limit + 1, offset]
+
+        if self.valores_cursor is not None:
+            condicion, extra = condicion_keyset(self.ordenar, self.valores_cursor)
+            where += f" AND {condicion}"
+            params += extra
+        subconsulta = f"SELECT id{total} FROM noticias {where} {clausula_orden(self.ordenar)} LIMIT %s"
+        params.append(self.limit + 1)
+        if self.valores_cursor is None:
+            subconsulta += " OFFSET %s"
+            params.append(offset)
+        columnas = lista_select(self.campos, "n.") + (", k._total" if total else "")
+        sql = (f"SELECT {columnas} FROM ({subconsulta}) AS k "
+               f"JOIN noticias AS n ON n.id = k.id {clausula_orden(self.ordenar, 'n.')}")
+        return sql, params
+
+    def sql_conteo(self):
+        where, params = self.where()
+        return f"SELECT COUNT(*) AS total FROM noticias {where}", params
+
+    def sql_ultima_modificacion(self):
+        where, params = self.where()
+        return f"SELECT MAX(fecha_scraping) AS ultima FROM noticias {where}", params
+
+    def sql_estimacion(self):
+        where, params = self.where()
+        return f"EXPLAIN SELECT id FROM noticias {where}", params
+
+    def ejecutar(self, cursor_db):
+        """
+        Ejecuta el listado con un cursor dictionary=True.
+
+        Si el índice FULLTEXT no existe (o la consulta booleana es inválida)
+        repite la búsqueda con LIKE.
+
+        Returns:
+            tuple: (rows, next_cursor, total, total_estimado)
+            total es None con count=none.
+        """
+        global _fulltext_disponible
+        sql, params = self.sql_filas()
+        try:
+            cursor_db.execute(sql, tuple(params))
+        except Error as e:
+            if self.modo not in MODOS_BUSQUEDA or e.errno not in ERRORES_RESPALDO_LIKE:
+                raise
+            if e.errno == 1191:
+                print("⚠️ Índice FULLTEXT ft_titulo_resumen no disponible, se busca con LIKE")
+                _fulltext_disponible = False
+            self.modo = "like"
+            if self.ordenar == ORDEN_RELEVANCIA:
+                self.ordenar = normalizar_orden(None)
+            sql, params = self.sql_filas()
+            cursor_db.execute(sql, tuple(params))
+        rows = cursor_db.fetchall()
+
+        total = None
+        estimado = False
+        if self._total_en_ventana():
+            if rows:
+                total = rows[0]["_total"]
+            elif self.page == 1:
+                total = 0
+            else:
+                # Página fuera de rango: la ventana no devolvió filas
+                total = self._contar(cursor_db)
+            for row in rows:
+                row.pop("_total", None)
+        elif self.conteo == "exact":
+            total = self._contar(cursor_db)
+        elif self.conteo == "estimate":
+            total = self._estimar(cursor_db)
+            estimado = True
+
+        next_cursor = None
+        self.hay_mas = len(rows) > self.limit
+        if self.hay_mas:
+            rows = rows[:self.limit]
+            if self.ordenar != ORDEN_RELEVANCIA:
+                next_cursor = codificar_cursor(self.ordenar, rows[-1])
+        if self.agrupar:
+            self._agregar_otras_fuentes(cursor_db, rows)
+        return rows, next_cursor, total, estimado
+
+    def _agregar_otras_fuentes(self, cursor_db, rows):
+        # Las demás copias de cada grupo de la página, en una sola consulta
+        grupos = {row["cluster_id"] for row in rows if row.get("cluster_id") is not None}
+        copias = {}
+        if grupos:
+            marcadores = ", ".join(["%s"] * len(grupos))
+            cursor_db.execute(
+                f"SELECT id, cluster_id, fuente, link FROM noticias WHERE cluster_id IN ({marcadores}) "
+                "AND (fuente IS NULL OR fuente NOT IN (%s, %s)) ORDER BY id",
+                tuple(grupos) + FUENTES_EXCLUIDAS
+            )
+            for copia in cursor_db.fetchall():
+                copias.setdefault(copia.pop("cluster_id"), []).append(copia)
+        for row in rows:
+            row["otras_fuentes"] = [c for c in copias.get(row.get("cluster_id"), []) if c["id"] != row["id"]]
+
+    def _contar(self, cursor_db):
+        sql, params = self.sql_conteo()
+        cursor_db.execute(sql, tuple(params))
+        return cursor_db.fetchone()["total"]
+
+    def _estimar(self, cursor_db):
+        # Estimación del optimizador: no recorre filas
+        sql, params = self.sql_estimacion()
+        cursor_db.execute(sql, tuple(params))
+        plan = cursor_db.fetchall()
+        if not plan:
+            return 0
+        filtradas = float(plan[0].get("filtered") or 100.0)
+        return int((plan[0].get("rows") or 0) * filtradas / 100)
+
+    def paginacion(self, total, next_cursor, estimado=False):
+        """
+        Devuelve el bloque "pagination" de la respuesta.
+        """
+        total_pages = (total + self.limit - 1) // self.limit if total is not None else None
+        return {
+            "page": self.page,
+            "limit": self.limit,
+            "total": total,
+            "total_estimado": estimado,
+            "total_pages": total_pages,
+            "has_next": self.hay_mas,
+            "has_prev": self.page > 1,
+            "next_cursor": next_cursor
+        }
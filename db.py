@@ -1,8 +1,13 @@
-import mysql.connector
 from mysql.connector import Error
+from mysql.connector.pooling import MySQLConnectionPool, CNX_POOL_MAXSIZE
+from mysql.connector.errors import PoolError
 from datetime import datetime
 import os
+import re
+import time
 from dotenv import load_dotenv
+import threading
+from dedup import hash_link, hash_titulo, FiltroEnlacesConocidos
 
 # ----------------- CONFIG DB -----------------
 load_dotenv()
@@ -10,65 +15,290 @@ db_config = {
     "host": os.getenv("DB_HOST", "localhost"),
     "user": os.getenv("DB_USER", "root"),
     "password": os.getenv("DB_PASSWORD", ""),
-    "database": os.getenv("DB_NAME", "noticiero_db")
+    # Mismo saneamiento que app.py: solo letras, números y guiones bajos
+    "database": re.sub(r"[^0-9A-Za-z_]", "", os.getenv("DB_NAME", "noticiero_db")) or "noticiero_db",
+    "connection_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "10"))
 }
 
+# Pool de conexiones compartido por la API y los scrapers
+DB_POOL_SIZE = min(max(1, int(os.getenv("DB_POOL_SIZE", "10"))), CNX_POOL_MAXSIZE)
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))  # segundos esperando una conexión libre
+
+_pool = None
+_pool_lock = threading.Lock()
+
 # ----------------- FUNCIONES -----------------
+def _obtener_pool():
+    """
+    Crea el pool la primera vez que se necesita (la BD puede no existir aún al importar).
+    """
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = MySQLConnectionPool(
+                    pool_name="noticiero",
+                    pool_size=DB_POOL_SIZE,
+                    pool_reset_session=True,  # al devolverla se descarta el estado de sesión
+                    **db_config
+                )
+    return _pool
+
+
 def conectar():
     """
-    Establece conexión con la BD MySQL
+    Obtiene una conexión del pool. conn.close() la devuelve al pool.
+
+    Si el pool está agotado espera hasta DB_POOL_TIMEOUT segundos, y antes de
+    entregarla verifica que siga viva (ping con reconexión).
     """
     try:
-        conn = mysql.connector.connect(**db_config)
-        return conn
+        pool = _obtener_pool()
     except Error as e:
         print(f"❌ Error al conectar con MySQL: {e}")
         return None
 
+    limite = time.monotonic() + DB_POOL_TIMEOUT
+    while True:
+        try:
+            conn = pool.get_connection()
+        except PoolError:
+            if time.monotonic() >= limite:
+                print(f"❌ Pool de conexiones agotado ({DB_POOL_SIZE}) tras {DB_POOL_TIMEOUT}s")
+                return None
+            time.sleep(0.05)
+            continue
+        except Error as e:
+            print(f"❌ Error al conectar con MySQL: {e}")
+            return None
+
+        try:
+            conn.ping(reconnect=True, attempts=2, delay=0)
+            return conn
+        except Error as e:
+            print(f"❌ Conexión del pool inválida: {e}")
+            try:
+                conn.close()
+            except Error:
+                pass
+            return None
+
+
+_filtro_enlaces = FiltroEnlacesConocidos()
+_filtro_lock = threading.Lock()
 
-def guardar_noticia(titulo, link, categoria, fecha, resumen, autor, imagen, fuente, departamento=None):
+
+def obtener_filtro_enlaces():
     """
-    Inserta una noticia en la base de datos, evitando duplicados.
+    Devuelve el filtro de enlaces conocidos del proceso, precargado la primera
+    vez con los link_hash más recientes de la BD.
+    """
+    if not _filtro_enlaces.calentado:
+        with _filtro_lock:
+            if not _filtro_enlaces.calentado:
+                hashes = cargar_link_hashes_recientes(_filtro_enlaces.capacidad)
+                if hashes is not None:
+                    # Del más antiguo al más reciente: el FIFO descarta primero los viejos
+                    _filtro_enlaces.agregar(reversed(hashes))
+                    _filtro_enlaces.calentado = True
+                    print(f"🧠 Filtro de enlaces precargado con {len(hashes)} links")
+    return _filtro_enlaces
+
+
+def cargar_link_hashes_recientes(limite):
+    """
+    Devuelve los link_hash de las noticias más recientes (o None si falla la BD).
     """
     conn = conectar()
     if not conn:
-        return False
+        return None
 
     try:
         cursor = conn.cursor()
-
-        # Bloquear cualquier noticia de Peru21/Perú21
-        if fuente and fuente.strip().lower() in ("peru21", "perú21"):
+        cursor.execute("""
+            SELECT link_hash FROM noticias
+            WHERE link_hash IS NOT NULL
+            ORDER BY id DESC LIMIT %s
+        """, (limite,))
+        return [bytes(row[0]) for row in cursor.fetchall()]
+    except Error as e:
+        print(f"❌ Error al cargar links conocidos: {e}")
+        return None
+    finally:
+        if conn.is_connected():
             cursor.close()
             conn.close()
-            return False
 
-        # Verificar duplicados (por título y link)
-        cursor.execute("SELECT id FROM noticias WHERE titulo = %s AND link = %s", (titulo, link))
-        existe = cursor.fetchone()
 
-        if not existe:
-            cursor.execute("""
-                INSERT INTO noticias (titulo, link, categoria, fecha, resumen, autor, imagen, fuente, departamento, fecha_scraping)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-            """, (
-                titulo, link, categoria, fecha, resumen, autor, imagen, fuente, departamento, datetime.now()
-            ))
-            conn.commit()
-            print(f"✅ Noticia guardada: {titulo} [{departamento or 'nacional'}]")
-            return True
-        else:
-            print(f"⚠️ Noticia duplicada (omitida): {titulo}")
-            return False
+# ----------------- OYENTES DE INGESTA -----------------
+# Funciones que se llaman con las filas recién insertadas por
+# guardar_noticias_lote (índice de búsqueda, caches, ...).
+_oyentes_ingesta = []
 
+
+def registrar_oyente_ingesta(funcion):
+    """
+    Registra funcion(noticias), llamada tras cada lote con inserciones con
+    las filas nuevas tal como quedaron en la BD (dicts con id). Si no se
+    pudieron releer, noticias llega vacía.
+    """
+    if funcion not in _oyentes_ingesta:
+        _oyentes_ingesta.append(funcion)
+
+
+def _releer_ingesta(conn, link_hashes, fecha_scraping):
+    # El lote ya está confirmado: un fallo aquí no debe contarse como error de guardado
+    cursor = conn.cursor(dictionary=True)
+    try:
+        marcadores = ", ".join(["%s"] * len(link_hashes))
+        # Solo las de este lote: las que ya existían tienen otra fecha_scraping
+        cursor.execute(
+            f"SELECT * FROM noticias WHERE link_hash IN ({marcadores}) AND fecha_scraping = %s",
+            list(link_hashes) + [fecha_scraping]
+        )
+        filas = cursor.fetchall()
     except Error as e:
-        print(f"❌ Error al guardar noticia: {e}")
-        return False
+        # Se avisa igual (sin filas): los oyentes que solo invalidan no deben perderse el cambio
+        print(f"⚠️ No se pudieron releer las noticias insertadas: {e}")
+        filas = []
+    finally:
+        cursor.close()
+    return filas
+
+
+def _notificar_ingesta(filas):
+    for oyente in list(_oyentes_ingesta):
+        try:
+            oyente(filas)
+        except Exception as e:
+            print(f"⚠️ Error en oyente de ingesta {getattr(oyente, '__name__', oyente)}: {e}")
+
+
+COLUMNAS_NOTICIA = ("titulo", "link", "categoria", "tipo", "fecha", "resumen", "autor", "imagen", "fuente", "departamento")
+FUENTES_BLOQUEADAS = ("peru21", "perú21")
+
+
+def guardar_noticias_lote(noticias, usar_filtro=True):
+    """
+    Inserta en una sola transacción todas las noticias de una fuente.
+
+    Es idempotente: los duplicados por link y por título normalizado los
+    descarta ON DUPLICATE KEY UPDATE sobre las claves únicas link_hash y
+    titulo_hash, por lo que dos hilos o procesos de scraping simultáneos no
+    pueden insertar la misma noticia. Antes, una consulta sobre titulo_hash
+    aparta los títulos ya guardados para no agregar sus links al filtro.
+
+    Con usar_filtro, los links ya vistos por este proceso (precargados desde
+    la BD o guardados antes en el mismo ciclo) se descartan sin consultar
+    MySQL; solo las noticias probablemente nuevas abren conexión.
+
+    Args:
+        noticias: lista de dicts con las claves de COLUMNAS_NOTICIA
+        usar_filtro: descartar links conocidos con el filtro en memoria
+
+    Returns:
+        dict: {'insertadas': n, 'duplicadas': n, 'conocidas': n, 'bloqueadas': n, 'errores': n}
+        ('conocidas' son duplicados descartados por el filtro, incluidos en 'duplicadas')
+    """
+    resultado = {"insertadas": 0, "duplicadas": 0, "conocidas": 0, "bloqueadas": 0, "errores": 0}
+    filtro = obtener_filtro_enlaces() if usar_filtro else None
+
+    # Bloquear cualquier noticia de Peru21/Perú21 y repetidas dentro del lote
+    candidatas = []
+    links_vistos = set()
+    titulos_vistos = set()
+    for noticia in noticias:
+        fuente = noticia.get("fuente")
+        if fuente and fuente.strip().lower() in FUENTES_BLOQUEADAS:
+            resultado["bloqueadas"] += 1
+            continue
+        link_hash = hash_link(noticia["link"])
+        if filtro is not None and filtro.contiene(link_hash):
+            resultado["conocidas"] += 1
+            resultado["duplicadas"] += 1
+            continue
+        titulo_hash = hash_titulo(noticia["titulo"])
+        if link_hash in links_vistos or titulo_hash in titulos_vistos:
+            resultado["duplicadas"] += 1
+            continue
+        links_vistos.add(link_hash)
+        titulos_vistos.add(titulo_hash)
+        candidatas.append((noticia, link_hash, titulo_hash))
+    if not candidatas:
+        return resultado
+
+    conn = conectar()
+    if not conn:
+        resultado["errores"] += len(candidatas)
+        return resultado
+
+    filas_nuevas = None
+    try:
+        cursor = conn.cursor()
+
+        # Títulos ya guardados: una sola consulta indexada para todo el lote (los que
+        # otro proceso guarde entre esta consulta y el INSERT los frena uq_titulo_hash)
+        marcadores = ", ".join(["%s"] * len(titulos_vistos))
+        cursor.execute(f"SELECT titulo_hash FROM noticias WHERE titulo_hash IN ({marcadores})", list(titulos_vistos))
+        titulos_existentes = {bytes(row[0]) for row in cursor.fetchall()}
+        nuevas = [c for c in candidatas if c[2] not in titulos_existentes]
+        resultado["duplicadas"] += len(candidatas) - len(nuevas)
+
+        insertadas = 0
+        if nuevas:
+            # Sin microsegundos: DATETIME los descarta y se usa para releer el lote
+            fecha_scraping = datetime.now().replace(microsecond=0)
+            filas = [
+                tuple(n.get(col) for col in COLUMNAS_NOTICIA) + (link_hash, titulo_hash, fecha_scraping)
+                for n, link_hash, titulo_hash in nuevas
+            ]
+            cursor.executemany(f"""
+                INSERT INTO noticias ({", ".join(COLUMNAS_NOTICIA)}, link_hash, titulo_hash, fecha_scraping)
+                VALUES ({", ".join(["%s"] * (len(COLUMNAS_NOTICIA) + 3))})
+                ON DUPLICATE KEY UPDATE id = id
+            """, filas)
+            # Con "id = id" las filas duplicadas no cuentan como afectadas
+            insertadas = max(cursor.rowcount, 0)
+            resultado["insertadas"] += insertadas
+            resultado["duplicadas"] += len(nuevas) - insertadas
+
+        conn.commit()
+        # Tras el commit los links de "nuevas" están en la BD (insertados o ya
+        # existentes por link_hash). Los descartados por título repetido no:
+        # su link podría guardarse más adelante con otro título. (Si otro
+        # proceso guardó el título tras la consulta, su link entra igual.)
+        if filtro is not None:
+            filtro.agregar(link_hash for _, link_hash, _ in nuevas)
+        if insertadas and _oyentes_ingesta:
+            filas_nuevas = _releer_ingesta(conn, [link_hash for _, link_hash, _ in nuevas], fecha_scraping)
+
+    except Error as e:
+        print(f"❌ Error al guardar lote de noticias: {e}")
+        conn.rollback()
+        resultado["errores"] += len(candidatas)
+        return resultado
     finally:
         if conn.is_connected():
             cursor.close()
             conn.close()
 
+    # Con la conexión ya devuelta al pool: cada oyente pide la suya
+    if filas_nuevas is not None:
+        _notificar_ingesta(filas_nuevas)
+    return resultado
+
+
+def guardar_noticia(titulo, link, categoria, fecha, resumen, autor, imagen, fuente, departamento=None, tipo=None):
+    """
+    Inserta una noticia en la base de datos, evitando duplicados.
+    Atajo de guardar_noticias_lote para una sola noticia.
+    """
+    resultado = guardar_noticias_lote([{
+        "titulo": titulo, "link": link, "categoria": categoria, "tipo": tipo, "fecha": fecha,
+        "resumen": resumen, "autor": autor, "imagen": imagen, "fuente": fuente, "departamento": departamento,
+    }])
+    return resultado["insertadas"] == 1
+
 
 def obtener_noticias(limit=20, categoria=None, departamento=None):
     """
@@ -174,8 +404,9 @@ def crear_tabla_si_no_existe():
             CREATE TABLE IF NOT EXISTS noticias (
                 id INT AUTO_INCREMENT PRIMARY KEY,
                 titulo VARCHAR(500) NOT NULL,
-                link VARCHAR(1000) NOT NULL,
+                link VARCHAR(500) NOT NULL,
                 categoria VARCHAR(100),
+                tipo VARCHAR(50),
                 fecha DATE,
                 resumen TEXT,
                 autor VARCHAR(200),
@@ -183,8 +414,12 @@ def crear_tabla_si_no_existe():
                 fuente VARCHAR(100),
                 departamento VARCHAR(50),
                 fecha_scraping TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE KEY unique_news (titulo, link)
-            )
+                link_hash BINARY(16),
+                titulo_hash BINARY(16),
+                cluster_id INT,
+                UNIQUE KEY uq_link_hash (link_hash),
+                UNIQUE KEY uq_titulo_hash (titulo_hash)
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
         """)
         
         # Agregar columna departamento si no existe (para bases de datos existentes)
@@ -194,10 +429,23 @@ def crear_tabla_si_no_existe():
         except Error:
             # La columna ya existe, no hay problema
             pass
+
+        # El guardado por lotes inserta también el tipo
+        try:
+            cursor.execute("ALTER TABLE noticias ADD COLUMN tipo VARCHAR(50)")
+        except Error:
+            pass
+
+        # Grupo de la misma historia en varias fuentes (ver agrupamiento.py)
+        try:
+            cursor.execute("ALTER TABLE noticias ADD COLUMN cluster_id INT")
+        except Error:
+            pass
             
         conn.commit()
         print("✅ Tabla 'noticias' verificada/creada correctamente")
-        return True
+        return (migrar_claves_hash() and asegurar_indices_listado() and asegurar_tabla_relacionadas()
+                and asegurar_tabla_crawl_state())
     except Error as e:
         print(f"❌ Error al crear tabla: {e}")
         return False
@@ -205,3 +453,249 @@ def crear_tabla_si_no_existe():
         if conn.is_connected():
             cursor.close()
             conn.close()
+
+
+def migrar_claves_hash(tam_lote=1000):
+    """
+    Agrega las columnas link_hash / titulo_hash a tablas existentes, rellena
+    las filas antiguas por lotes y reemplaza las claves sobre VARCHAR largos
+    (unique_link, unique_news) por claves únicas sobre los hashes.
+    """
+    conn = conectar()
+    if not conn:
+        return False
+
+    try:
+        cursor = conn.cursor()
+        for ddl in (
+            "ALTER TABLE noticias ADD COLUMN link_hash BINARY(16)",
+            "ALTER TABLE noticias ADD COLUMN titulo_hash BINARY(16)",
+        ):
+            try:
+                cursor.execute(ddl)
+            except Error:
+                # La columna ya existe
+                pass
+
+        # Rellenar hashes faltantes recorriendo por id (sin OFFSET). Ambos se
+        # escriben juntos: titulo_hash en NULL con link_hash es un título repetido.
+        # IGNORE: una fila que repetiría una clave única se deja sin hashes
+        ultimo_id = 0
+        rellenadas = 0
+        while True:
+            cursor.execute("""
+                SELECT id, titulo, link FROM noticias
+                WHERE id > %s AND link_hash IS NULL
+                ORDER BY id LIMIT %s
+            """, (ultimo_id, tam_lote))
+            filas = cursor.fetchall()
+            if not filas:
+                break
+            cursor.executemany(
+                "UPDATE IGNORE noticias SET link_hash = %s, titulo_hash = %s WHERE id = %s",
+                [(hash_link(link), hash_titulo(titulo), id_) for id_, titulo, link in filas]
+            )
+            conn.commit()
+            rellenadas += len(filas)
+            ultimo_id = filas[-1][0]
+        if rellenadas:
+            print(f"✅ Claves hash calculadas para {rellenadas} noticias existentes")
+
+        try:
+            cursor.execute("ALTER TABLE noticias ADD UNIQUE KEY uq_link_hash (link_hash)")
+        except Error:
+            # El índice ya existe
+            pass
+
+        # Clave única sobre el título: dos lotes simultáneos no pueden guardar el
+        # mismo título (ON DUPLICATE KEY en guardar_noticias_lote)
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'noticias' AND index_name = 'uq_titulo_hash'
+        """)
+        if not cursor.fetchone()[0]:
+            # Títulos repetidos de antes de la clave: la noticia más antigua conserva el hash
+            cursor.execute("""
+                UPDATE noticias AS n
+                JOIN (
+                    SELECT titulo_hash, MIN(id) AS primera FROM noticias
+                    WHERE titulo_hash IS NOT NULL
+                    GROUP BY titulo_hash HAVING COUNT(*) > 1
+                ) AS d ON n.titulo_hash = d.titulo_hash AND n.id > d.primera
+                SET n.titulo_hash = NULL
+            """)
+            if cursor.rowcount:
+                print(f"✅ {cursor.rowcount} noticias con título repetido quedan sin titulo_hash")
+            conn.commit()
+            try:
+                cursor.execute("ALTER TABLE noticias ADD UNIQUE KEY uq_titulo_hash (titulo_hash)")
+            except Error as e:
+                print(f"⚠️ No se pudo crear uq_titulo_hash ({e}); se conserva idx_titulo_hash")
+            else:
+                # La clave única reemplaza al índice simple anterior
+                try:
+                    cursor.execute("ALTER TABLE noticias DROP INDEX idx_titulo_hash")
+                except Error:
+                    pass
+
+        # Las claves antiguas quedan redundantes una vez que existe uq_link_hash
+        cursor.execute("""
+            SELECT COUNT(*) FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = 'noticias' AND index_name = 'uq_link_hash'
+        """)
+        if cursor.fetchone()[0]:
+            for indice in ("unique_link", "unique_news"):
+                try:
+                    cursor.execute(f"ALTER TABLE noticias DROP INDEX {indice}")
+                except Error:
+                    pass
+        else:
+            print("⚠️ No se pudo crear uq_link_hash (¿links duplicados?); se conservan las claves antiguas")
+
+        conn.commit()
+        return True
+    except Error as e:
+        print(f"❌ Error al migrar claves hash: {e}")
+        return False
+    finally:
+        if conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+# Índices alineados con paginacion.ORDENES: permiten recorrer cada orden por
+# rango (keyset) sin ordenar en memoria. InnoDB agrega el id al final.
+INDICES_LISTADO = {
+    "idx_orden_fecha_scraping": "(fecha_scraping, fecha)",
+    "idx_orden_fecha": "(fecha, fecha_scraping DESC)",
+    "idx_orden_titulo": "(titulo, fecha_scraping DESC)",
+    # Filtro + orden por defecto: la subconsulta del join diferido (consultas.py)
+    # se resuelve solo con el índice (id va implícito en InnoDB)
+    "idx_categoria_orden": "(categoria, fecha_scraping, fecha, fuente)",
+    "idx_departamento_orden": "(departamento, fecha_scraping, fecha, fuente)",
+    "idx_fuente_orden": "(fuente, fecha_scraping, fecha)",
+    # agrupar=1: "¿hay una copia anterior del grupo?" y las otras fuentes del grupo
+    "idx_cluster": "(cluster_id, id)",
+}
+
+
+def asegurar_indices_listado():
+    """
+    Crea los índices de ordenamiento de los listados y el FULLTEXT de
+    búsqueda si no existen.
+    """
+    conn = conectar()
+    if not conn:
+        return False
+
+    try:
+        cursor = conn.cursor()
+        for nombre, columnas in INDICES_LISTADO.items():
+            try:
+                cursor.execute(f"CREATE INDEX {nombre} ON noticias {columnas}")
+            except Error:
+                # El índice ya existe
+                pass
+        # Búsqueda con MATCH ... AGAINST (ver consultas.py)
+        try:
+            cursor.execute("CREATE FULLTEXT INDEX ft_titulo_resumen ON noticias (titulo, resumen)")
+        except Error:
+            pass
+        conn.commit()
+        return True
+    except Error as e:
+        print(f"❌ Error al crear índices de listado: {e}")
+        return False
+    finally:
+        if conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+def asegurar_tabla_relacionadas():
+    """
+    Crea las tablas de vecinos precalculados de /api/noticias/relacionadas
+    (ver relacionadas.py) si no existen: los vecinos y las noticias cuyos
+    vecinos ya se calcularon.
+    """
+    conn = conectar()
+    if not conn:
+        return False
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS noticias_relacionadas (
+                noticia_id INT NOT NULL,
+                relacionada_id INT NOT NULL,
+                puntuacion FLOAT NOT NULL,
+                PRIMARY KEY (noticia_id, relacionada_id),
+                KEY idx_relacionada (relacionada_id)
+            ) ENGINE=InnoDB
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS vecinos_calculados (
+                noticia_id INT NOT NULL PRIMARY KEY
+            ) ENGINE=InnoDB
+        """)
+        conn.commit()
+        return True
+    except Error as e:
+        print(f"❌ Error al crear la tabla de relacionadas: {e}")
+        return False
+    finally:
+        if conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+def asegurar_tabla_crawl_state():
+    """
+    Crea la tabla con el estado de rastreo de cada URL de fuente (ver
+    estado_rastreo.py) si no existe.
+    """
+    conn = conectar()
+    if not conn:
+        return False
+
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS crawl_state (
+                url_hash BINARY(16) PRIMARY KEY,
+                url VARCHAR(1000) NOT NULL,
+                fuente VARCHAR(100),
+                ultima_descarga DATETIME,
+                ultimo_exito DATETIME,
+                links_vistos BLOB,
+                nuevas_ultima INT NOT NULL DEFAULT 0,
+                descargas INT NOT NULL DEFAULT 0,
+                errores_consecutivos INT NOT NULL DEFAULT 0,
+                errores_total INT NOT NULL DEFAULT 0,
+                ultimo_error VARCHAR(500),
+                tasa_nuevas FLOAT,
+                proxima_descarga DATETIME
+            ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+        """)
+
+        # Planificación adaptativa (ver planificador.py)
+        for columna in ("tasa_nuevas FLOAT", "proxima_descarga DATETIME"):
+            try:
+                cursor.execute(f"ALTER TABLE crawl_state ADD COLUMN {columna}")
+            except Error:
+                pass
+        # Los validadores HTTP se guardan solo en cache_http (.cache/validadores_http.json)
+        for columna in ("etag", "last_modified", "hash_cuerpo"):
+            try:
+                cursor.execute(f"ALTER TABLE crawl_state DROP COLUMN {columna}")
+            except Error:
+                pass
+        conn.commit()
+        return True
+    except Error as e:
+        print(f"❌ Error al crear la tabla crawl_state: {e}")
+        return False
+    finally:
+        if conn.is_connected():
+            cursor.close()
+            conn.close()
@@ -0,0 +1,127 @@
+import os
+import re
+import hashlib
+import threading
+import unicodedata
+from collections import deque
+
+# ----------------- CLAVES DE DEDUPLICACIÓN -----------------
+# link_hash y titulo_hash son MD5 de 16 bytes (BINARY(16) en MySQL): los
+# índices y la clave única trabajan sobre claves cortas de ancho fijo en vez
+# de VARCHAR(500) en utf8mb4. No se usan con fines criptográficos.
+
+_NO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+
+def quitar_tildes(texto):
+    """
+    Elimina tildes y diacríticos: 'Huánuco' -> 'Huanuco'.
+    """
+    descompuesto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def normalizar_link(link):
+    """
+    Normaliza un link para deduplicar: sin espacios ni fragmento (#...).
+    """
+    return (link or "").strip().split("#", 1)[0]
+
+
+def normalizar_titulo(titulo):
+    """
+    Normaliza un título: minúsculas, sin tildes ni puntuación, espacios simples.
+    """
+    texto = quitar_tildes((titulo or "").lower())
+    return _NO_ALFANUMERICO.sub(" ", texto).strip()
+
+
+def hash_link(link):
+    """
+    Devuelve la clave link_hash (16 bytes) de un link.
+    """
+    return hashlib.md5(normalizar_link(link).encode("utf-8")).digest()
+
+
+def hash_titulo(titulo):
+    """
+    Devuelve la clave titulo_hash (16 bytes) de un título normalizado.
+    """
+    return hashlib.md5(normalizar_titulo(titulo).encode("utf-8")).digest()
+
+
+# ----------------- FILTRO DE ENLACES CONOCIDOS -----------------
+CAPACIDAD_FILTRO = int(os.getenv("SCRAPER_FILTRO_ENLACES", "100000"))
+
+
+class FiltroEnlacesConocidos:
+    """
+    Conjunto acotado en memoria de link_hash ya guardados.
+
+    Al llenarse descarta los más antiguos (FIFO), así que el consumo de
+    memoria está acotado por la capacidad. No tiene falsos positivos: un
+    enlace desconocido nunca se descarta, como mucho llega a MySQL y la
+    clave única lo resuelve.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_FILTRO):
+        self.capacidad = max(1, capacidad)
+        self.calentado = False
+        self._conjunto = set()
+        self._orden = deque()
+        self._lock = threading.Lock()
+        self.consultados = 0
+        self.omitidos = 0
+
+    def __len__(self):
+        return len(self._conjunto)
+
+    def __contains__(self, link_hash):
+        # Sin contar en las estadísticas
+        with self._lock:
+            return link_hash in self._conjunto
+
+    def contiene(self, link_hash):
+        """
+        Indica si el enlace ya es conocido y lo cuenta en las estadísticas.
+        """
+        with self._lock:
+            self.consultados += 1
+            if link_hash in self._conjunto:
+                self.omitidos += 1
+                return True
+            return False
+
+    def agregar(self, hashes):
+        """
+        Marca como conocidos uno o varios link_hash.
+        """
+        if isinstance(hashes, (bytes, bytearray)):
+            hashes = [hashes]
+        with self._lock:
+            for link_hash in hashes:
+                link_hash = bytes(link_hash)
+                if link_hash in self._conjunto:
+                    continue
+                self._conjunto.add(link_hash)
+                self._orden.append(link_hash)
+                if len(self._orden) > self.capacidad:
+                    self._conjunto.discard(self._orden.popleft())
+
+    def estadisticas(self):
+        """
+        Devuelve consultados, omitidos, tasa de omisión y tamaño del filtro.
+        """
+        with self._lock:
+            tasa = self.omitidos / self.consultados if self.consultados else 0.0
+            return {
+                "consultados": self.consultados,
+                "omitidos": self.omitidos,
+                "tasa_omision": round(tasa, 3),
+                "tamano": len(self._conjunto),
+            }
+
+    def reiniciar_estadisticas(self):
+        with self._lock:
+            self.consultados = 0
+            self.omitidos = 0
@@ -0,0 +1,100 @@
+import os
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlparse
+import http_client
+from cache_http import obtener_cache
+
+# ----------------- CONFIG DESCARGAS -----------------
+# Límite global de descargas simultáneas y límite por dominio, para no
+# saturar a un mismo medio (rpp.pe y larepublica.pe tienen varias páginas).
+MAX_DESCARGAS = int(os.getenv("SCRAPER_MAX_DESCARGAS", "8"))
+MAX_POR_HOST = int(os.getenv("SCRAPER_MAX_POR_HOST", "2"))
+TIMEOUT = http_client.TIMEOUT
+
+
+# ----------------- FUNCIONES -----------------
+def host_de(url):
+    """
+    Devuelve el dominio de una URL, usado como clave del límite por host.
+    """
+    return urlparse(url).netloc.lower()
+
+
+def descargar(url, timeout=TIMEOUT, usar_cache=True):
+    """
+    Descarga una página y devuelve (html, validadores). Lanza excepción si falla.
+    Usa la sesión compartida, así que reutiliza conexiones por dominio.
+
+    Con usar_cache envía If-None-Match / If-Modified-Since y html es None si
+    la página no cambió desde el último listado guardado (304 o cuerpo
+    idéntico). Los validadores de una página nueva se guardan recién con
+    cache_http.confirmar(), después de guardar sus noticias.
+    """
+    cache = obtener_cache() if usar_cache else None
+    headers = cache.cabeceras_condicionales(url) if cache else None
+    response = http_client.get(url, timeout=timeout, headers=headers)
+    if response.status_code != 304:
+        response.raise_for_status()
+    if not cache:
+        return response.text, None
+    cambio, validadores = cache.registrar_respuesta(url, response)
+    return (response.text if cambio else None), validadores
+
+
+def descargar_fuentes(fuentes, max_descargas=None, max_por_host=None, usar_cache=True):
+    """
+    Descarga en paralelo las páginas de varias fuentes.
+
+    Genera tuplas (fuente, html, validadores, error) a medida que cada descarga termina,
+    de modo que el parseo y el guardado avanzan mientras las demás siguen en
+    curso. Un ciclo completo tarda aproximadamente lo que la fuente más lenta.
+    html es None cuando la página no cambió desde el ciclo anterior; los
+    validadores se confirman en la cache HTTP tras guardar el listado.
+
+    Args:
+        fuentes: lista de diccionarios de FUENTES
+        max_descargas: máximo de descargas simultáneas en total
+        max_por_host: máximo de descargas simultáneas contra un mismo dominio
+        usar_cache: enviar GET condicional con los validadores guardados
+    """
+    max_descargas = max(1, max_descargas or MAX_DESCARGAS)
+    max_por_host = max(1, max_por_host or MAX_POR_HOST)
+
+    # Colas por dominio: solo se lanza una descarga si su host tiene cupo,
+    # así ningún hilo del pool queda bloqueado esperando a otro host.
+    pendientes = {}
+    for fuente in fuentes:
+        pendientes.setdefault(host_de(fuente["url"]), deque()).append(fuente)
+
+    activos = Counter()
+    en_curso = {}
+    executor = ThreadPoolExecutor(max_workers=max_descargas, thread_name_prefix="descarga")
+
+    def lanzar():
+        for host, cola in pendientes.items():
+            while cola and activos[host] < max_por_host and len(en_curso) < max_descargas:
+                fuente = cola.popleft()
+                en_curso[executor.submit(descargar, fuente["url"], usar_cache=usar_cache)] = fuente
+                activos[host] += 1
+
+    try:
+        lanzar()
+        while en_curso:
+            hechos, _ = wait(list(en_curso), return_when=FIRST_COMPLETED)
+            terminados = []
+            for futuro in hechos:
+                fuente = en_curso.pop(futuro)
+                activos[host_de(fuente["url"])] -= 1
+                terminados.append((futuro, fuente))
+            # Reponer descargas antes de ceder el control al consumidor
+            lanzar()
+            for futuro, fuente in terminados:
+                try:
+                    html, validadores = futuro.result()
+                except Exception as e:
+                    yield fuente, None, None, e
+                else:
+                    yield fuente, html, validadores, None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
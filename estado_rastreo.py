@@ -0,0 +1,285 @@
+"""
+Estado de rastreo por URL de fuente (tabla crawl_state).
+
+Cada página de listado guarda cuándo se descargó por última vez, los
+link_hash que mostraba y los errores acumulados (los validadores HTTP viven
+solo en cache_http). El estado de todas las fuentes de un ciclo se lee con
+una sola consulta y se escribe al final en una transacción que actualiza
+solo las columnas que cambiaron; los contadores se suman en la BD, así que
+dos procesos que rastrean a la vez no se pisan los totales.
+
+La decisión incremental es por noticia: un link que ya estaba en el listado
+anterior de la misma URL se salta sin extraer el resto de sus datos; los
+demás pasan a guardar_noticias_lote, que deduplica contra la BD.
+"""
+
+from datetime import datetime
+from mysql.connector import Error
+from dedup import hash_link
+
+# ----------------- CONFIG ESTADO DE RASTREO -----------------
+# Links recordados por URL: holgura sobre los ~20-60 de una portada
+LINKS_POR_FUENTE = 500
+TAM_HASH = 16
+MAX_LARGO_ERROR = 500
+
+COLUMNAS_ESTADO = (
+    "url", "fuente", "ultima_descarga", "ultimo_exito", "links_vistos", "nuevas_ultima", "descargas",
+    "errores_consecutivos", "errores_total", "ultimo_error", "tasa_nuevas", "proxima_descarga",
+)
+# Se escriben como incremento (c = c + VALUES(c)), no como valor absoluto
+CONTADORES = ("descargas", "errores_total")
+
+
+class EstadoFuente:
+    """
+    Estado de rastreo de una URL de fuente.
+    """
+
+    def __init__(self, url, fuente=None, ultima_descarga=None, ultimo_exito=None, links_vistos=b"",
+                 nuevas_ultima=0, descargas=0, errores_consecutivos=0, errores_total=0, ultimo_error=None,
+                 tasa_nuevas=None, proxima_descarga=None):
+        self.url = url
+        self.fuente = fuente
+        self.ultima_descarga = ultima_descarga
+        self.ultimo_exito = ultimo_exito
+        # Del más reciente al más antiguo
+        links_vistos = bytes(links_vistos or b"")
+        self.links = [links_vistos[i:i + TAM_HASH] for i in range(0, len(links_vistos), TAM_HASH)]
+        self._conocidos = set(self.links)
+        self.nuevas_ultima = nuevas_ultima or 0
+        self.descargas = descargas or 0
+        self.errores_consecutivos = errores_consecutivos or 0
+        self.errores_total = errores_total or 0
+        self.ultimo_error = ultimo_error
+        # Noticias nuevas por hora y próxima descarga (ver planificador.py)
+        self.tasa_nuevas = tasa_nuevas
+        self.proxima_descarga = proxima_descarga
+        # ultimo_exito anterior a la última descarga (solo en memoria)
+        self.exito_anterior = None
+        # Links saltados por conocidos y contenedores sin recorrer por la
+        # parada temprana (ver extraccion.py), en la última descarga y en el proceso
+        self.conocidas_ultima = self.omitidas_ultima = 0
+        self.conocidas_total = self.omitidas_total = 0
+        # Tiempo y memoria del último parseo (ver extraccion.parsear)
+        self.parseo = None
+        # Columnas modificadas e incrementos de los contadores desde el último guardado
+        self.cambios = set()
+        self._incrementos = dict.fromkeys(CONTADORES, 0)
+
+    @property
+    def modificado(self):
+        return bool(self.cambios)
+
+    def marcar(self, *columnas):
+        """
+        Anota columnas de COLUMNAS_ESTADO modificadas fuera de esta clase
+        (p. ej. el planificador) para que entren en el próximo guardado.
+        """
+        self.cambios.update(columnas)
+
+    def _sumar(self, contador):
+        setattr(self, contador, getattr(self, contador) + 1)
+        self._incrementos[contador] += 1
+        self.cambios.add(contador)
+
+    def conoce(self, link_hash):
+        """
+        True si el link estaba en un listado anterior de esta URL.
+        """
+        return link_hash in self._conocidos
+
+    def registrar_listado(self, link_hashes, nuevas, ahora=None, conocidas=0, omitidas=0):
+        """
+        Descarga con listado procesado: recuerda sus links (primero los del
+        listado, luego los anteriores hasta LINKS_POR_FUENTE).
+        """
+        ahora = ahora or datetime.now()
+        links = []
+        vistos = set()
+        for link_hash in list(link_hashes) + self.links:
+            if link_hash not in vistos:
+                vistos.add(link_hash)
+                links.append(link_hash)
+        self.links = links[:LINKS_POR_FUENTE]
+        self._conocidos = set(self.links)
+        self.nuevas_ultima = nuevas
+        self.conocidas_ultima, self.omitidas_ultima = conocidas, omitidas
+        self.conocidas_total += conocidas
+        self.omitidas_total += omitidas
+        self.marcar("links_vistos")
+        self._exito(ahora)
+
+    def registrar_sin_cambios(self, ahora=None):
+        """
+        304 o cuerpo idéntico: cuenta como descarga sin noticias nuevas.
+        """
+        self.nuevas_ultima = 0
+        self._exito(ahora or datetime.now())
+
+    def registrar_error(self, error, ahora=None):
+        self.ultima_descarga = ahora or datetime.now()
+        self._sumar("descargas")
+        self._sumar("errores_total")
+        self.errores_consecutivos += 1
+        self.ultimo_error = str(error)[:MAX_LARGO_ERROR]
+        self.marcar("ultima_descarga", "errores_consecutivos", "ultimo_error")
+
+    def _exito(self, ahora):
+        self.exito_anterior = self.ultimo_exito
+        self.ultima_descarga = self.ultimo_exito = ahora
+        self._sumar("descargas")
+        self.errores_consecutivos = 0
+        self.marcar("nuevas_ultima", "ultima_descarga", "ultimo_exito", "errores_consecutivos")
+
+    def _valor(self, columna):
+        return b"".join(self.links) if columna == "links_vistos" else getattr(self, columna)
+
+    def fila(self):
+        """
+        Valores de todas las columnas, en el orden de COLUMNAS_ESTADO, precedidos de url_hash.
+        """
+        return (hash_link(self.url),) + tuple(self._valor(c) for c in COLUMNAS_ESTADO)
+
+    def columnas_modificadas(self):
+        """
+        Columnas modificadas desde el último guardado, en el orden de COLUMNAS_ESTADO.
+        """
+        return tuple(c for c in COLUMNAS_ESTADO[2:] if c in self.cambios)
+
+    def fila_cambios(self):
+        """
+        Valores para el upsert parcial: url_hash, url, fuente y las columnas
+        de columnas_modificadas(). Los contadores van como incremento.
+        """
+        return (hash_link(self.url), self.url, self.fuente) + tuple(
+            self._incrementos[c] if c in CONTADORES else self._valor(c) for c in self.columnas_modificadas())
+
+    def guardado(self):
+        self.cambios.clear()
+        self._incrementos = dict.fromkeys(CONTADORES, 0)
+
+
+class EstadoRastreo:
+    """
+    Estados de las fuentes de un ciclo de scraping, indexados por URL.
+    """
+
+    def __init__(self, estados=None):
+        self._estados = {e.url: e for e in (estados or [])}
+
+    @classmethod
+    def cargar(cls, fuentes):
+        """
+        Lee en una sola consulta el estado de todas las fuentes. Si la BD no
+        responde, empieza sin estado (todas las noticias se consideran nuevas).
+        """
+        rastreo = cls()
+        urls = list({f["url"]: None for f in fuentes})
+        for fila in cargar_filas_estado(urls):
+            fila.pop("url_hash", None)
+            rastreo._estados[fila["url"]] = EstadoFuente(**fila)
+        for fuente in fuentes:
+            rastreo.obtener(fuente).fuente = fuente["fuente"]
+        return rastreo
+
+    def obtener(self, fuente):
+        """
+        Devuelve el estado de la URL de la fuente (vacío si nunca se rastreó).
+        """
+        estado = self._estados.get(fuente["url"])
+        if estado is None:
+            estado = self._estados[fuente["url"]] = EstadoFuente(fuente["url"], fuente["fuente"])
+        return estado
+
+    def __iter__(self):
+        return iter(self._estados.values())
+
+    def guardar(self):
+        """
+        Escribe en una sola transacción los estados modificados: un
+        executemany por cada combinación de columnas modificadas.
+        """
+        modificados = [e for e in self._estados.values() if e.modificado]
+        if not modificados:
+            return True
+        grupos = {}
+        for estado in modificados:
+            grupos.setdefault(estado.columnas_modificadas(), []).append(estado.fila_cambios())
+        if not guardar_filas_estado(grupos):
+            return False
+        for estado in modificados:
+            estado.guardado()
+        return True
+
+
+# ----------------- BD -----------------
+def sql_guardar_estado(columnas):
+    """
+    Upsert de url_hash, url, fuente y columnas. En una fila existente solo se
+    tocan fuente y esas columnas; los contadores se suman.
+    """
+    todas = ("url", "fuente") + tuple(columnas)
+    actualizar = ", ".join(
+        f"{c} = {c} + VALUES({c})" if c in CONTADORES else f"{c} = VALUES({c})" for c in todas[1:])
+    return f"""
+        INSERT INTO crawl_state (url_hash, {", ".join(todas)})
+        VALUES ({", ".join(["%s"] * (len(todas) + 1))})
+        ON DUPLICATE KEY UPDATE {actualizar}
+    """
+
+
+def cargar_filas_estado(urls):
+    """
+    Devuelve las filas de crawl_state de las URLs (lista vacía si falla la BD).
+    """
+    from db import conectar
+
+    if not urls:
+        return []
+    conn = conectar()
+    if not conn:
+        return []
+
+    try:
+        cursor = conn.cursor(dictionary=True)
+        marcadores = ", ".join(["%s"] * len(urls))
+        cursor.execute(
+            f"SELECT url_hash, {', '.join(COLUMNAS_ESTADO)} FROM crawl_state WHERE url_hash IN ({marcadores})",
+            [hash_link(url) for url in urls]
+        )
+        return cursor.fetchall()
+    except Error as e:
+        print(f"❌ Error al cargar el estado de rastreo: {e}")
+        return []
+    finally:
+        if conn.is_connected():
+            cursor.close()
+            conn.close()
+
+
+def guardar_filas_estado(grupos):
+    """
+    Inserta o actualiza filas de crawl_state en una sola transacción.
+    grupos: {columnas: [filas]}, con las filas de EstadoFuente.fila_cambios.
+    """
+    from db import conectar
+
+    conn = conectar()
+    if not conn:
+        return False
+
+    try:
+        cursor = conn.cursor()
+        for columnas, filas in grupos.items():
+            cursor.executemany(sql_guardar_estado(columnas), filas)
+        conn.commit()
+        return True
+    except Error as e:
+        print(f"❌ Error al guardar el estado de rastreo: {e}")
+        conn.rollback()
+        return False
+    finally:
+        if conn.is_connected():
+            cursor.close()
+            conn.close()
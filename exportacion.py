@@ -0,0 +1,173 @@
+import io
+import csv
+import json
+import zlib
+from datetime import date, datetime
+import mysql.connector
+from mysql.connector import Error
+from db import db_config
+from consultas import ConsultaNoticias, resolver_campos, lista_select
+
+# ----------------- EXPORTACIÓN EN STREAMING -----------------
+# Compartido por /api/export y exportar_noticias.py. Las filas se leen con un
+# cursor sin buffer (el servidor las envía a medida que se consumen) en lotes
+# de TAM_LOTE y se escriben en trozos de ~TAM_TROZO bytes, así que la memoria
+# no depende del tamaño de la tabla.
+FORMATOS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+TAM_LOTE = 1000
+TAM_TROZO = 64 * 1024
+
+
+def _valor(valor):
+    if isinstance(valor, datetime):
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def serializar(filas, campos, formato):
+    """
+    Convierte un iterable de filas (dicts) en trozos de texto NDJSON o CSV.
+    """
+    buffer = io.StringIO()
+    escritor = None
+    if formato == "csv":
+        escritor = csv.writer(buffer)
+        escritor.writerow(campos)
+
+    for fila in filas:
+        if escritor:
+            escritor.writerow([_valor(fila.get(c)) for c in campos])
+        else:
+            buffer.write(json.dumps({c: _valor(fila.get(c)) for c in campos}, ensure_ascii=False))
+            buffer.write("\n")
+        if buffer.tell() >= TAM_TROZO:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def codificar(trozos, comprimir=False):
+    """
+    Codifica los trozos en UTF-8 y, con comprimir, los pasa por gzip al vuelo.
+    """
+    compresor = zlib.compressobj(6, zlib.DEFLATED, 31) if comprimir else None  # 31 = cabecera gzip
+    for trozo in trozos:
+        datos = trozo.encode("utf-8")
+        if compresor:
+            datos = compresor.compress(datos)
+        if datos:
+            yield datos
+    if compresor:
+        yield compresor.flush()
+
+
+class Exportacion:
+    """
+    Exportación de noticias con los filtros de ConsultaNoticias, en orden de id.
+
+    La conexión se abre dentro del generador de bytes y se cierra en su
+    finally. abrir() arranca el generador hasta el primer trozo (para poder
+    responder un error antes de empezar a enviar); cerrar() lo cierra aunque
+    no se haya terminado de iterar (cliente desconectado o respuesta nunca
+    enviada: /api/export lo registra con response.call_on_close).
+    """
+
+    def __init__(self, filtros=None, fields=None, formato="ndjson", comprimir=False):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato} (use {', '.join(FORMATOS)})")
+        self.formato = formato
+        self.comprimir = comprimir
+        # Por defecto se exportan todas las columnas públicas
+        self.campos = resolver_campos(fields, por_defecto="completa")
+        self.consulta = ConsultaNoticias(filtros=filtros, modo="like" if (filtros or {}).get("q") else None)
+        self._conn = None
+        self._cursor = None
+        self._generador = None
+        self._primero = None
+
+    @property
+    def mimetype(self):
+        return "application/gzip" if self.comprimir else FORMATOS[self.formato]
+
+    @property
+    def nombre_archivo(self):
+        return f"noticias.{self.formato}" + (".gz" if self.comprimir else "")
+
+    def abrir(self):
+        """
+        Lanza la consulta y prepara el primer trozo. Devuelve False si falla
+        (la conexión ya queda cerrada).
+        """
+        self._generador = self._generar()
+        try:
+            self._primero = next(self._generador, b"")
+            return True
+        except Error as e:
+            print(f"❌ Error al iniciar la exportación: {e}")
+            self.cerrar()
+            return False
+
+    def _generar(self):
+        # Conexión propia (no del pool: una exportación larga no debe ocupar
+        # una conexión de la API), abierta y cerrada dentro del generador
+        where, params = self.consulta.where()
+        sql = f"SELECT {lista_select(self.campos)} FROM noticias {where} ORDER BY id"
+        try:
+            self._conn = mysql.connector.connect(**db_config)
+            self._cursor = self._conn.cursor(dictionary=True, buffered=False)
+            self._cursor.execute(sql, tuple(params))
+            yield from codificar(serializar(self._filas(), self.campos, self.formato), self.comprimir)
+        finally:
+            self._cerrar_conexion()
+
+    def _filas(self):
+        while True:
+            lote = self._cursor.fetchmany(TAM_LOTE)
+            if not lote:
+                break
+            yield from lote
+
+    def __iter__(self):
+        if self._generador is None:
+            self._generador = self._generar()
+        elif self._primero:
+            yield self._primero
+        self._primero = None
+        try:
+            yield from self._generador
+        finally:
+            self.cerrar()
+
+    def cerrar(self):
+        """
+        Cierra el generador (si quedó a medias) y la conexión. Se puede llamar varias veces.
+        """
+        generador, self._generador = self._generador, None
+        if generador is not None:
+            try:
+                generador.close()
+            except ValueError:
+                # Se está iterando en otro hilo: su propio finally cierra la conexión
+                return
+        self._cerrar_conexion()
+
+    def _cerrar_conexion(self):
+        try:
+            if self._cursor is not None:
+                self._cursor.close()
+        except Error:
+            pass
+        try:
+            if self._conn is not None and self._conn.is_connected():
+                self._conn.close()
+        except Error:
+            pass
+        self._cursor = None
+        self._conn = None
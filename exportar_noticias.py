@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Script para exportar el archivo de noticias a NDJSON o CSV
+
+Lee la tabla con un cursor sin buffer y escribe en streaming, así que la
+memoria usada no depende del número de noticias.
+
+    python exportar_noticias.py --formato csv --categoria regional -o regional.csv
+    python exportar_noticias.py --gzip -o noticias.ndjson.gz
+    python exportar_noticias.py --fecha-desde 2024-05-01 | head
+"""
+
+import sys
+import os
+import time
+import argparse
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from exportacion import Exportacion, FORMATOS
+from consultas import FILTROS_IGUALDAD, CampoInvalido
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exporta las noticias a NDJSON o CSV")
+    parser.add_argument("--formato", choices=list(FORMATOS), default="ndjson")
+    parser.add_argument("--gzip", action="store_true", help="comprimir la salida con gzip")
+    parser.add_argument("-o", "--salida", help="archivo de salida (por defecto la salida estándar)")
+    parser.add_argument("--fields", help="columnas separadas por comas (por defecto todas)")
+    for campo in FILTROS_IGUALDAD:
+        parser.add_argument(f"--{campo}")
+    parser.add_argument("--fecha-desde", dest="fecha_desde")
+    parser.add_argument("--fecha-hasta", dest="fecha_hasta")
+    parser.add_argument("--q", help="texto a buscar en título o resumen")
+    args = parser.parse_args()
+
+    filtros = {k: getattr(args, k) for k in FILTROS_IGUALDAD + ("fecha_desde", "fecha_hasta", "q")}
+    # Los mensajes van a stderr para no mezclarse con la exportación en stdout
+    try:
+        exportacion = Exportacion(filtros, args.fields, args.formato, comprimir=args.gzip)
+    except CampoInvalido as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+    if not exportacion.abrir():
+        print("❌ No se pudo conectar a la base de datos", file=sys.stderr)
+        return 1
+
+    inicio = time.perf_counter()
+    escritos = 0
+    destino = open(args.salida, "wb") if args.salida else sys.stdout.buffer
+    try:
+        for trozo in exportacion:
+            destino.write(trozo)
+            escritos += len(trozo)
+    except BrokenPipeError:
+        # p. ej. "| head": el lector se fue, no es un error
+        return 0
+    finally:
+        exportacion.cerrar()
+        if args.salida:
+            destino.close()
+
+    print(f"✅ Exportación {exportacion.nombre_archivo}: {escritos / 1024:.1f} KB en "
+          f"{time.perf_counter() - inicio:.1f} s", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+Extracción de noticias de una página de listado.
+
+Los listados van de la más reciente a la más antigua, así que la extracción
+es un generador: cada contenedor se lee solo hasta su link y, si el link ya
+es conocido (estado de rastreo o filtro de enlaces), se salta sin extraer el
+resto. Tras PARADA_CONOCIDAS links conocidos seguidos se deja de recorrer la
+página; lo que queda ya se guardó en descargas anteriores.
+
+Cada fuente se compila una sola vez en un PlanExtraccion inmutable, con los
+selectores CSS ya compilados por soupsieve, los atributos de imagen resueltos
+y la unión con su URL base; las de FUENTES, al importar este módulo.
+
+parsear() construye solo los subárboles de los contenedores de la fuente
+(SoupStrainer) en lugar del DOM completo de la portada, con el parser
+elegido por fuente ("parser": html.parser, lxml o html5lib).
+"""
+
+import os
+import re
+import time
+import tracemalloc
+import importlib.util
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial, lru_cache
+from typing import Callable, Optional
+from urllib.parse import urljoin
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+from dedup import hash_link
+from sources import FUENTES
+
+# ----------------- CONFIG EXTRACCIÓN -----------------
+# Links conocidos seguidos que detienen la extracción (0 = recorrer todo)
+PARADA_CONOCIDAS = int(os.getenv("SCRAPER_PARADA_CONOCIDAS", "5"))
+ATRIBUTOS_IMAGEN = ("src", "data-src", "data-img-url")
+# Parser por defecto; cada fuente puede elegir otro con la clave "parser".
+# lxml y html5lib son opcionales: si no están instalados se usa html.parser.
+PARSER_POR_DEFECTO = os.getenv("SCRAPER_PARSER", "html.parser")
+PARSERS = ("html.parser", "lxml", "html5lib")
+# Medir memoria del parseo con tracemalloc (lento: solo para diagnóstico y bench_extraccion.py)
+MEDIR_MEMORIA = os.getenv("SCRAPER_MEDIR_MEMORIA", "0") == "1"
+# Claves de una fuente que definen su plan de extracción
+CLAVES_PLAN = ("fuente", "base", "categoria", "container", "selector", "title_selector", "img_selector",
+               "selector_img", "category_selector", "summary_selector", "author_selector", "date_selector",
+               "parser", "parseo_parcial")
+
+
+def _selector_y_atributo(selector):
+    if "::attr(" in selector and selector.endswith(")"):
+        css, atributo = selector.split("::attr(", 1)
+        return css.strip(), atributo[:-1]
+    return selector, None
+
+
+@lru_cache(maxsize=None)
+def _resolver_parser(nombre):
+    if nombre not in PARSERS:
+        print(f"⚠️ Parser desconocido '{nombre}'; se usa html.parser")
+        return "html.parser"
+    if nombre != "html.parser" and importlib.util.find_spec(nombre) is None:
+        print(f"⚠️ Parser '{nombre}' no instalado; se usa html.parser")
+        return "html.parser"
+    return nombre
+
+
+def _colador(container):
+    """
+    SoupStrainer que conserva solo los contenedores ("article.news",
+    "div.story-item") y sus subárboles. None si el selector no es una
+    etiqueta con clases: entonces se parsea la página entera.
+    """
+    coincidencia = re.fullmatch(r"([a-zA-Z][\w-]*)?((?:\.[\w-]+)+)?", (container or "").strip())
+    if not coincidencia or not any(coincidencia.groups()):
+        return None
+    etiqueta, clases = coincidencia.groups()
+    if not clases:
+        return SoupStrainer(etiqueta)
+    # Basta con la primera clase: soup.select(container) filtra el resto
+    clase = clases.split(".")[1]
+    return SoupStrainer(etiqueta, class_=lambda valor: valor is not None and clase in valor.split())
+
+
+def _compilar(selector):
+    return soupsieve.compile(selector) if selector else None
+
+
+def _texto(selector, item):
+    el = selector.select_one(item) if selector is not None else None
+    return el.get_text(strip=True) if el is not None else None
+
+
+def _fecha(texto):
+    """
+    Fecha de un texto 'dd/mm/aaaa' o 'aaaa-mm-dd' (None si no se reconoce).
+    """
+    try:
+        if "/" in texto:
+            partes = [p for p in texto.replace("\u00a0", " ").split("/") if p]
+            if len(partes) >= 3:
+                return datetime(int(partes[2][:4]), int(partes[1]), int(partes[0])).date()
+        elif "-" in texto:
+            partes = [p for p in texto.split("-") if p]
+            if len(partes) >= 3 and len(partes[0]) == 4:
+                return datetime(int(partes[0]), int(partes[1]), int(partes[2][:2])).date()
+    except (ValueError, IndexError):
+        pass
+    return None
+
+
+# ----------------- PLANES DE EXTRACCIÓN -----------------
+@dataclass(frozen=True, slots=True)
+class PlanExtraccion:
+    """
+    Configuración de una fuente resuelta una sola vez: selectores CSS ya
+    compilados con soupsieve, atributos de imagen y unión con la URL base.
+    """
+    fuente: str
+    categoria: Optional[str]
+    con_contenedor: bool
+    items: soupsieve.SoupSieve
+    titulo: Optional[soupsieve.SoupSieve]
+    imagen: Optional[soupsieve.SoupSieve]
+    atributos_imagen: tuple
+    categoria_item: Optional[soupsieve.SoupSieve]
+    resumen: Optional[soupsieve.SoupSieve]
+    autor: Optional[soupsieve.SoupSieve]
+    fecha: Optional[soupsieve.SoupSieve]
+    unir: Callable[[str], str]
+    parser: str
+    colador: Optional[SoupStrainer]
+
+    @classmethod
+    def compilar(cls, fuente):
+        # Nuevo esquema basado en container/title_selector/img_selector;
+        # sin container, esquema antiguo con selector/selector_img
+        con_contenedor = bool(fuente.get("container"))
+        selector_img = fuente.get("img_selector") if con_contenedor else fuente.get("selector_img")
+        css_img, atributo = _selector_y_atributo(selector_img) if selector_img else (None, None)
+        parser = _resolver_parser(fuente.get("parser") or PARSER_POR_DEFECTO)
+        return cls(
+            fuente=fuente["fuente"],
+            categoria=fuente.get("categoria"),
+            con_contenedor=con_contenedor,
+            items=soupsieve.compile(fuente["container"] if con_contenedor else fuente.get("selector") or "a"),
+            titulo=_compilar(fuente.get("title_selector")) if con_contenedor else None,
+            imagen=_compilar(css_img),
+            # Si el selector especifica ::attr(attr), se prueba después de los habituales
+            atributos_imagen=ATRIBUTOS_IMAGEN + ((atributo,) if atributo else ()),
+            categoria_item=_compilar(fuente.get("category_selector")) if con_contenedor else None,
+            resumen=_compilar(fuente.get("summary_selector")) if con_contenedor else None,
+            autor=_compilar(fuente.get("author_selector")) if con_contenedor else None,
+            fecha=_compilar(fuente.get("date_selector")) if con_contenedor else None,
+            unir=partial(urljoin, fuente["base"]),
+            parser=parser,
+            # html5lib no admite parse_only
+            colador=(_colador(fuente["container"])
+                     if con_contenedor and fuente.get("parseo_parcial", True) and parser != "html5lib" else None),
+        )
+
+    def titulo_y_link(self, item):
+        if self.titulo is not None:
+            anchor = self.titulo.select_one(item) or item.find('a', href=True)
+        else:
+            anchor = item if item.name == 'a' else item.find('a', href=True)
+        link = anchor.get('href') if anchor is not None else None
+        titulo = anchor.get_text(strip=True) if anchor is not None else item.get_text(strip=True)
+        return titulo, link
+
+    def noticia(self, item, titulo, link):
+        """
+        Extrae el resto de los datos del item en una sola pasada por el plan.
+        """
+        imagen = None
+        if self.imagen is not None:
+            el = self.imagen.select_one(item)
+            if el is not None:
+                for atributo in self.atributos_imagen:
+                    imagen = el.get(atributo)
+                    if imagen:
+                        imagen = self.unir(imagen)
+                        break
+        texto_fecha = _texto(self.fecha, item)
+        fecha = (texto_fecha and _fecha(texto_fecha)) or datetime.today().date()
+        return {
+            "titulo": titulo, "link": link,
+            # category_selector si existe, si no, la fija de la fuente (si la hubiera)
+            "categoria": _texto(self.categoria_item, item) or self.categoria,
+            "fecha": fecha, "resumen": _texto(self.resumen, item), "autor": _texto(self.autor, item),
+            "imagen": imagen, "fuente": self.fuente,
+        }
+
+
+_planes = {}
+
+
+def plan_de(fuente):
+    """
+    Devuelve el plan compilado de la fuente. Los de FUENTES se compilan al
+    importar; una fuente con otra configuración compila el suyo la primera vez.
+    """
+    clave = tuple(fuente.get(k) for k in CLAVES_PLAN)
+    plan = _planes.get(clave)
+    if plan is None:
+        plan = _planes[clave] = PlanExtraccion.compilar(fuente)
+    return plan
+
+
+for _fuente in FUENTES:
+    plan_de(_fuente)
+
+
+def parsear(fuente, html, medir_memoria=None):
+    """
+    Parsea la página con el parser de la fuente, construyendo solo los
+    contenedores si el plan tiene colador. Mide siempre el tiempo; la
+    memoria (pico durante el parseo y lo que queda ocupando el árbol) solo
+    con medir_memoria o SCRAPER_MEDIR_MEMORIA=1, porque tracemalloc hace el
+    parseo varias veces más lento y sus contadores son de todo el proceso.
+
+    Returns:
+        (soup, {'parser', 'parcial', 'segundos', 'pico', 'memoria'}) con la
+        memoria en bytes, o None si no se midió
+    """
+    plan = plan_de(fuente)
+    if medir_memoria is None:
+        medir_memoria = MEDIR_MEMORIA
+    if not medir_memoria:
+        inicio = time.perf_counter()
+        soup = BeautifulSoup(html, plan.parser, parse_only=plan.colador)
+        return soup, {
+            "parser": plan.parser, "parcial": plan.colador is not None,
+            "segundos": time.perf_counter() - inicio, "pico": None, "memoria": None,
+        }
+
+    iniciado = not tracemalloc.is_tracing()
+    if iniciado:
+        tracemalloc.start()
+    else:
+        tracemalloc.reset_peak()
+    antes, _ = tracemalloc.get_traced_memory()
+    inicio = time.perf_counter()
+    try:
+        soup = BeautifulSoup(html, plan.parser, parse_only=plan.colador)
+        segundos = time.perf_counter() - inicio
+        actual, pico = tracemalloc.get_traced_memory()
+    finally:
+        if iniciado:
+            tracemalloc.stop()
+    return soup, {
+        "parser": plan.parser, "parcial": plan.colador is not None, "segundos": segundos,
+        "pico": max(0, pico - antes), "memoria": max(0, actual - antes),
+    }
+
+
+class Extraccion:
+    """
+    Noticias de la página de una fuente, extraídas de a una al iterar.
+
+    Args:
+        fuente: diccionario de FUENTES
+        soup: página ya parseada
+        conocido: función link_hash -> bool; None extrae todo (modo --full)
+        parada: links conocidos seguidos que detienen la extracción
+
+    Tras iterar, link_hashes tiene los links recorridos (en orden), conocidas
+    los saltados por conocidos y omitidas los contenedores no recorridos por
+    la parada temprana.
+    """
+
+    def __init__(self, fuente, soup, conocido=None, parada=PARADA_CONOCIDAS):
+        self.fuente = fuente
+        self.soup = soup
+        self.conocido = conocido
+        self.parada = parada
+        self.link_hashes = []
+        self.conocidas = 0
+        self.omitidas = 0
+
+    def __iter__(self):
+        plan = plan_de(self.fuente)
+        items = plan.items.select(self.soup)
+        seguidas = 0
+        for posicion, item in enumerate(items):
+            titulo, link = plan.titulo_y_link(item)
+            if not titulo or not link:
+                continue
+            # Normalizar URL absoluta
+            link = plan.unir(link)
+            link_hash = hash_link(link)
+            self.link_hashes.append(link_hash)
+            if self.conocido is not None and self.conocido(link_hash):
+                # Ya guardada: no hace falta extraer el resto
+                self.conocidas += 1
+                seguidas += 1
+                if self.parada and seguidas >= self.parada:
+                    self.omitidas = len(items) - posicion - 1
+                    return
+                continue
+            seguidas = 0
+            yield plan.noticia(item, titulo, link)
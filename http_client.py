@@ -0,0 +1,77 @@
+import os
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# ----------------- CONFIG HTTP -----------------
+# Una sola sesión para todos los scrapers: las conexiones TCP+TLS a un mismo
+# dominio se reutilizan entre las páginas de un ciclo (keep-alive).
+POOL_HOSTS = int(os.getenv("SCRAPER_POOL_HOSTS", "20"))
+POOL_POR_HOST = int(os.getenv("SCRAPER_POOL_POR_HOST", "4"))
+TIMEOUT = 12
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0 Safari/537.36 NoticieroBot/1.0"
+
+
+def _accept_encoding():
+    """
+    urllib3 solo descomprime brotli si está instalado 'brotli' o 'brotlicffi'.
+    """
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        pass
+    try:
+        import brotlicffi  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        return "gzip, deflate"
+
+
+HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "es-PE,es;q=0.9",
+    "Accept-Encoding": _accept_encoding(),
+    "Connection": "keep-alive",
+}
+
+_session = None
+_lock = threading.Lock()
+
+
+# ----------------- FUNCIONES -----------------
+def obtener_sesion():
+    """
+    Devuelve la sesión HTTP compartida, creándola la primera vez.
+    """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=POOL_POR_HOST)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update(HEADERS)
+                _session = session
+    return _session
+
+
+def get(url, timeout=TIMEOUT, headers=None):
+    """
+    GET usando la sesión compartida.
+    """
+    return obtener_sesion().get(url, timeout=timeout, headers=headers)
+
+
+def cerrar_sesion():
+    """
+    Cierra la sesión compartida y libera sus conexiones.
+    """
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,229 @@
+import re
+import bisect
+import unicodedata
+from dedup import quitar_tildes
+
+# ----------------- PROVINCIAS Y CIUDADES DEL PERÚ -----------------
+# Provincias (196) por departamento, con la clave de sources.DEPARTAMENTOS
+PROVINCIAS = {
+    "amazonas": ("Chachapoyas", "Bagua", "Bongará", "Condorcanqui", "Luya", "Rodríguez de Mendoza", "Utcubamba"),
+    "ancash": ("Huaraz", "Aija", "Antonio Raimondi", "Asunción", "Bolognesi", "Carhuaz", "Carlos Fermín Fitzcarrald",
+               "Casma", "Corongo", "Huari", "Huarmey", "Huaylas", "Mariscal Luzuriaga", "Ocros", "Pallasca",
+               "Pomabamba", "Recuay", "Santa", "Sihuas", "Yungay"),
+    "apurimac": ("Abancay", "Andahuaylas", "Antabamba", "Aymaraes", "Cotabambas", "Chincheros", "Grau"),
+    "arequipa": ("Arequipa", "Camaná", "Caravelí", "Castilla", "Caylloma", "Condesuyos", "Islay", "La Unión"),
+    "ayacucho": ("Huamanga", "Cangallo", "Huanca Sancos", "Huanta", "La Mar", "Lucanas", "Parinacochas",
+                 "Páucar del Sara Sara", "Sucre", "Víctor Fajardo", "Vilcas Huamán"),
+    "cajamarca": ("Cajamarca", "Cajabamba", "Celendín", "Chota", "Contumazá", "Cutervo", "Hualgayoc", "Jaén",
+                  "San Ignacio", "San Marcos", "San Miguel", "San Pablo", "Santa Cruz"),
+    "callao": ("Callao",),
+    "cusco": ("Cusco", "Acomayo", "Anta", "Calca", "Canas", "Canchis", "Chumbivilcas", "Espinar", "La Convención",
+              "Paruro", "Paucartambo", "Quispicanchi", "Urubamba"),
+    "huancavelica": ("Huancavelica", "Acobamba", "Angaraes", "Castrovirreyna", "Churcampa", "Huaytará", "Tayacaja"),
+    "huanuco": ("Huánuco", "Ambo", "Dos de Mayo", "Huacaybamba", "Huamalíes", "Leoncio Prado", "Marañón",
+                "Pachitea", "Puerto Inca", "Lauricocha", "Yarowilca"),
+    "ica": ("Ica", "Chincha", "Nasca", "Palpa", "Pisco"),
+    "junin": ("Huancayo", "Concepción", "Chanchamayo", "Jauja", "Junín", "Satipo", "Tarma", "Yauli", "Chupaca"),
+    "la-libertad": ("Trujillo", "Ascope", "Bolívar", "Chepén", "Julcán", "Otuzco", "Pacasmayo", "Pataz",
+                    "Sánchez Carrión", "Santiago de Chuco", "Gran Chimú", "Virú"),
+    "lambayeque": ("Chiclayo", "Ferreñafe", "Lambayeque"),
+    "lima": ("Lima", "Barranca", "Cajatambo", "Canta", "Cañete", "Huaral", "Huarochirí", "Huaura", "Oyón", "Yauyos"),
+    "loreto": ("Maynas", "Alto Amazonas", "Loreto", "Mariscal Ramón Castilla", "Requena", "Ucayali",
+               "Datem del Marañón", "Putumayo"),
+    "madre-de-dios": ("Tambopata", "Manu", "Tahuamanu"),
+    "moquegua": ("Mariscal Nieto", "General Sánchez Cerro", "Ilo"),
+    "pasco": ("Pasco", "Daniel Alcides Carrión", "Oxapampa"),
+    "piura": ("Piura", "Ayabaca", "Huancabamba", "Morropón", "Paita", "Sullana", "Talara", "Sechura"),
+    "puno": ("Puno", "Azángaro", "Carabaya", "Chucuito", "El Collao", "Huancané", "Lampa", "Melgar", "Moho",
+             "San Antonio de Putina", "San Román", "Sandia", "Yunguyo"),
+    "san-martin": ("Moyobamba", "Bellavista", "El Dorado", "Huallaga", "Lamas", "Mariscal Cáceres", "Picota",
+                   "Rioja", "San Martín", "Tocache"),
+    "tacna": ("Tacna", "Candarave", "Jorge Basadre", "Tarata"),
+    "tumbes": ("Tumbes", "Contralmirante Villar", "Zarumilla"),
+    "ucayali": ("Coronel Portillo", "Atalaya", "Padre Abad", "Purús"),
+}
+
+# Provincias cuyo nombre es una palabra común, un personaje, otro país o otro
+# departamento ("moho", "sandía", "Grau", "Bolívar", "Manu", "Ucayali"): solo cuentan
+# escritas como "provincia de X".
+PROVINCIAS_AMBIGUAS = frozenset(quitar_tildes(p.lower()) for p in (
+    "Ambo", "Antonio Raimondi", "Asunción", "Atalaya", "Barranca", "Bellavista", "Bolívar", "Bolognesi", "Calca",
+    "Canas", "Canta", "Castilla", "Concepción", "Daniel Alcides Carrión", "Dos de Mayo", "El Dorado", "Espinar",
+    "General Sánchez Cerro", "Grau", "Huallaga", "Jorge Basadre", "La Mar", "La Unión", "Lamas", "Lampa",
+    "Leoncio Prado", "Manu", "Marañón", "Mariscal Cáceres", "Melgar", "Moho", "Palpa", "Picota", "Pisco", "Putumayo",
+    "Requena", "Rioja", "San Ignacio", "San Marcos", "San Miguel", "San Pablo", "San Román", "Sánchez Carrión",
+    "Sandia", "Santa", "Santa Cruz", "Sucre", "Ucayali", "Víctor Fajardo",
+))
+
+# Ciudades y distritos que las noticias nombran más que a su provincia
+CIUDADES = {
+    "Juliaca": ("puno", "San Román"),
+    "Ilave": ("puno", "El Collao"),
+    "Ayaviri": ("puno", "Melgar"),
+    "Desaguadero": ("puno", "Chucuito"),
+    "Chimbote": ("ancash", "Santa"),
+    "Nuevo Chimbote": ("ancash", "Santa"),
+    "Tarapoto": ("san-martin", "San Martín"),
+    "Iquitos": ("loreto", "Maynas"),
+    "Yurimaguas": ("loreto", "Alto Amazonas"),
+    "Pucallpa": ("ucayali", "Coronel Portillo"),
+    "Puerto Maldonado": ("madre-de-dios", "Tambopata"),
+    "Tingo María": ("huanuco", "Leoncio Prado"),
+    "La Oroya": ("junin", "Yauli"),
+    "Pichanaki": ("junin", "Chanchamayo"),
+    "Huacho": ("lima", "Huaura"),
+    "Chancay": ("lima", "Huaral"),
+    "Chosica": ("lima", "Lima"),
+    "Quillabamba": ("cusco", "La Convención"),
+    "Sicuani": ("cusco", "Canchis"),
+    "Machu Picchu": ("cusco", "Urubamba"),
+    "Cuzco": ("cusco", "Cusco"),
+    "Nazca": ("ica", "Nasca"),
+    "Máncora": ("piura", "Talara"),
+    "Catacaos": ("piura", "Piura"),
+    "Cerro de Pasco": ("pasco", "Pasco"),
+    "Bagua Grande": ("amazonas", "Utcubamba"),
+    "Huamachuco": ("la-libertad", "Sánchez Carrión"),
+    "Puquio": ("ayacucho", "Lucanas"),
+    "Parque Nacional del Manu": ("madre-de-dios", "Manu"),
+    # Distrito de Lima, no el departamento de San Martín
+    "San Martín de Porres": ("lima", "Lima"),
+    "San Martín de Porras": ("lima", "Lima"),
+}
+
+# Expresiones que contienen un lugar pero no hablan de él: se consumen sin coincidencia
+EXCLUSIONES = (
+    "José de San Martín", "General San Martín", "Plaza San Martín", "Libertador San Martín",
+    "río Amazonas", "selva del Amazonas",
+)
+
+# Nombres que también son frases comunes ("la libertad de expresión"): solo
+# cuentan con la última palabra en mayúscula, como nombre propio
+REQUIEREN_MAYUSCULA = frozenset(("la libertad",))
+
+# La expresión acepta las letras con y sin tilde, así que el texto solo se
+# pasa a minúsculas (sin cambiar su longitud: las posiciones son las del original)
+_VARIANTES = {"a": "[aáà]", "e": "[eéè]", "i": "[iíì]", "o": "[oóò]", "u": "[uúüù]", "n": "[nñ]"}
+_SEPARADOR = re.compile(r"[\s\-]+")
+
+
+def minusculas(texto):
+    plano = texto.lower()
+    if len(plano) != len(texto):
+        # lower() cambió la longitud (caracteres raros): carácter por carácter
+        plano = "".join(c.lower() if len(c.lower()) == 1 else c for c in texto)
+    return plano
+
+
+def _normalizar_nombre(nombre):
+    return _SEPARADOR.sub(" ", quitar_tildes(nombre.lower()).strip())
+
+
+def _regex_trie(nombres):
+    """
+    Una sola expresión regular con los nombres factorizados por prefijo
+    común ('puno|putina' -> 'pu(?:no|tina)'); los espacios aceptan guiones y
+    las vocales (y la n) aceptan tilde.
+    """
+    trie = {}
+    for nombre in nombres:
+        nodo = trie
+        for caracter in nombre:
+            nodo = nodo.setdefault(caracter, {})
+        nodo[""] = {}
+
+    def compilar(nodo):
+        final = "" in nodo
+        ramas = [(r"[\s\-]+" if c == " " else _VARIANTES.get(c) or re.escape(c)) + compilar(hijo)
+                 for c, hijo in sorted(nodo.items()) if c != ""]
+        if not ramas:
+            return ""
+        patron = ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+        # Greedy: se prefiere el nombre más largo ("san antonio de putina" sobre "san")
+        return f"(?:{patron})?" if final else patron
+
+    return compilar(trie)
+
+
+class DetectorLugares:
+    """
+    Detecta departamentos, provincias y ciudades del Perú en textos con una
+    sola expresión regular compilada (límites de palabra, sin tildes).
+    """
+
+    def __init__(self, departamentos_map, provincias=PROVINCIAS, ciudades=CIUDADES, exclusiones=EXCLUSIONES):
+        # nombre normalizado -> (departamento, provincia) o None para exclusiones
+        self._lugares = {}
+        for departamento, provincias_dep in provincias.items():
+            for provincia in provincias_dep:
+                nombre = _normalizar_nombre(provincia)
+                self._lugares[f"provincia de {nombre}"] = (departamento, provincia)
+                if nombre not in PROVINCIAS_AMBIGUAS:
+                    self._lugares[nombre] = (departamento, provincia)
+        for ciudad, (departamento, provincia) in ciudades.items():
+            self._lugares[_normalizar_nombre(ciudad)] = (departamento, provincia)
+        # Los nombres de departamento tienen prioridad (Lima, Puno, Ica...)
+        for departamento, variantes in departamentos_map.items():
+            for variante in variantes:
+                self._lugares[_normalizar_nombre(variante)] = (departamento, None)
+        for exclusion in exclusiones:
+            self._lugares[_normalizar_nombre(exclusion)] = None
+        self._patron = re.compile(r"(?<!\w)" + _regex_trie(self._lugares) + r"(?!\w)")
+
+    def buscar(self, texto):
+        """
+        Devuelve todas las coincidencias del texto, en orden:
+        [{'lugar', 'departamento', 'provincia', 'inicio', 'fin'}]. Las
+        posiciones son sobre el texto recibido (normalizado a NFC).
+        """
+        return self.buscar_lote([texto])[0]
+
+    def buscar_lote(self, textos):
+        """
+        Igual que buscar() para una lista de textos, con una sola pasada de la
+        expresión regular sobre todos ellos.
+        """
+        textos = [unicodedata.normalize("NFC", t or "") for t in textos]
+        # \x00 no es \w: ningún nombre cruza de un texto al siguiente
+        plano = minusculas("\x00".join(textos))
+        inicios = []
+        posicion = 0
+        for texto in textos:
+            inicios.append(posicion)
+            posicion += len(texto) + 1
+
+        resultados = [[] for _ in textos]
+        for coincidencia in self._patron.finditer(plano):
+            nombre = _normalizar_nombre(coincidencia.group())
+            lugar = self._lugares.get(nombre)
+            if lugar is None:
+                continue
+            indice = bisect.bisect_right(inicios, coincidencia.start()) - 1
+            desplazamiento = inicios[indice]
+            inicio, fin = coincidencia.start() - desplazamiento, coincidencia.end() - desplazamiento
+            if nombre in REQUIEREN_MAYUSCULA and not _SEPARADOR.split(textos[indice][inicio:fin])[-1][:1].isupper():
+                continue
+            resultados[indice].append({
+                "lugar": textos[indice][inicio:fin],
+                "departamento": lugar[0],
+                "provincia": lugar[1],
+                "inicio": inicio,
+                "fin": fin,
+            })
+        return resultados
+
+    @staticmethod
+    def _principal(coincidencias):
+        # El departamento más mencionado; a igualdad, el que aparece primero
+        conteo = {}
+        for c in coincidencias:
+            conteo[c["departamento"]] = conteo.get(c["departamento"], 0) + 1
+        if not conteo:
+            return None
+        return max(conteo, key=lambda d: conteo[d])
+
+    def departamento(self, texto):
+        return self._principal(self.buscar(texto))
+
+    def departamentos_lote(self, textos):
+        return [self._principal(c) for c in self.buscar_lote(textos)]
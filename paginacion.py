@@ -0,0 +1,105 @@
+import json
+import base64
+from datetime import date, datetime
+
+# ----------------- ORDENAMIENTOS -----------------
+# Cada modo de ?ordenar= es una lista de (columna, dirección). El id final
+# desempata y hace que la clave de orden sea única, requisito del keyset.
+ORDENES = {
+    "fecha_desc": [("fecha_scraping", "DESC"), ("fecha", "DESC"), ("id", "DESC")],
+    "fecha_asc": [("fecha", "ASC"), ("fecha_scraping", "DESC"), ("id", "DESC")],
+    "titulo_asc": [("titulo", "ASC"), ("fecha_scraping", "DESC"), ("id", "DESC")],
+    "titulo_desc": [("titulo", "DESC"), ("fecha_scraping", "DESC"), ("id", "DESC")],
+}
+ORDEN_POR_DEFECTO = "fecha_desc"
+
+
+class CursorInvalido(ValueError):
+    """El parámetro ?cursor= no se pudo decodificar o no corresponde al orden pedido."""
+
+
+def normalizar_orden(ordenar):
+    """
+    Devuelve un modo de orden válido (fecha_desc por defecto).
+    """
+    return ordenar if ordenar in ORDENES else ORDEN_POR_DEFECTO
+
+
+def clausula_orden(ordenar, prefijo=""):
+    """
+    Devuelve la cláusula ORDER BY para el modo de orden.
+    """
+    columnas = ORDENES[normalizar_orden(ordenar)]
+    return "ORDER BY " + ", ".join(f"{prefijo}{col} {direccion}" for col, direccion in columnas)
+
+
+def _serializar(valor):
+    if isinstance(valor, datetime):
+        return valor.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor
+
+
+def codificar_cursor(ordenar, fila):
+    """
+    Construye el cursor opaco con los valores de la clave de orden de la fila.
+    """
+    ordenar = normalizar_orden(ordenar)
+    valores = [_serializar(fila.get(col)) for col, _ in ORDENES[ordenar]]
+    crudo = json.dumps([ordenar, valores], ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(crudo.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decodificar_cursor(cursor, ordenar):
+    """
+    Devuelve los valores de la clave de orden guardados en el cursor.
+    """
+    ordenar = normalizar_orden(ordenar)
+    try:
+        relleno = "=" * (-len(cursor) % 4)
+        modo, valores = json.loads(base64.urlsafe_b64decode(cursor + relleno).decode("utf-8"))
+    except (ValueError, TypeError):
+        raise CursorInvalido("Cursor inválido")
+    if modo != ordenar or not isinstance(valores, list) or len(valores) != len(ORDENES[ordenar]):
+        raise CursorInvalido("El cursor no corresponde al orden solicitado")
+    return valores
+
+
+def condicion_keyset(ordenar, valores, prefijo=""):
+    """
+    Devuelve (sql, params) con la condición "fila posterior al cursor".
+
+    Se expande como OR de prefijos iguales, (a > x) OR (a = x AND b < y) ...,
+    en lugar de una comparación de filas (a, b, id) < (x, y, z): fecha puede
+    ser NULL y la comparación de filas descartaría esas noticias. Se respeta
+    que MySQL ordena NULL primero en ASC y último en DESC.
+    """
+    columnas = ORDENES[normalizar_orden(ordenar)]
+
+    alternativas = []
+    params = []
+    iguales_sql = []
+    iguales_params = []
+    for (col, direccion), valor in zip(columnas, valores):
+        col = f"{prefijo}{col}"
+        if valor is None:
+            # NULL va primero en ASC: después vienen los no nulos. En DESC va al final.
+            posterior = (f"{col} IS NOT NULL", []) if direccion == "ASC" else None
+            igual = (f"{col} IS NULL", [])
+        elif direccion == "DESC":
+            posterior = (f"({col} < %s OR {col} IS NULL)", [valor])
+            igual = (f"{col} = %s", [valor])
+        else:
+            posterior = (f"{col} > %s", [valor])
+            igual = (f"{col} = %s", [valor])
+
+        if posterior:
+            alternativas.append("(" + " AND ".join(iguales_sql + [posterior[0]]) + ")")
+            params.extend(iguales_params + posterior[1])
+        iguales_sql.append(igual[0])
+        iguales_params.extend(igual[1])
+
+    if not alternativas:
+        return "1=0", []
+    return "(" + " OR ".join(alternativas) + ")", params
@@ -0,0 +1,127 @@
+"""
+Planificador adaptativo del scraping automático.
+
+Cada URL de fuente tiene su propia próxima descarga en una cola de prioridad
+(heapq). El intervalo sale de la tasa de noticias nuevas observada en esa URL
+(media móvil exponencial, noticias por hora): una portada nacional que
+publica a cada rato se revisa cada pocos minutos y una radio regional que
+publica un par de veces al día, cada pocas horas. Las fuentes que fallan se
+reintentan con espera exponencial y jitter. La tasa y la próxima descarga se
+guardan en crawl_state (ver estado_rastreo.py) y sobreviven a reinicios.
+"""
+
+import os
+import heapq
+import random
+from datetime import datetime, timedelta
+
+# ----------------- CONFIG PLANIFICADOR -----------------
+INTERVALO_MIN = timedelta(minutes=int(os.getenv("SCRAPER_INTERVALO_MIN", "5")))
+INTERVALO_MAX = timedelta(minutes=int(os.getenv("SCRAPER_INTERVALO_MAX", "240")))
+INTERVALO_INICIAL = timedelta(minutes=30)
+# Se busca encontrar unas 3 noticias nuevas por descarga
+NUEVAS_POR_DESCARGA = 3
+# Peso de la última observación en la media móvil de la tasa
+ALFA_TASA = 0.3
+# Variación aleatoria de los intervalos normales (±10%), para no sincronizar fuentes
+JITTER = 0.1
+
+
+def intervalo_por_tasa(tasa, intervalo_min=INTERVALO_MIN, intervalo_max=INTERVALO_MAX):
+    """
+    Intervalo para encontrar NUEVAS_POR_DESCARGA noticias a la tasa dada
+    (noticias nuevas por hora), dentro de los límites.
+    """
+    if tasa is None:
+        return INTERVALO_INICIAL
+    if tasa <= 0:
+        return intervalo_max
+    return min(intervalo_max, max(intervalo_min, timedelta(hours=NUEVAS_POR_DESCARGA / tasa)))
+
+
+def espera_por_errores(errores, rnd=random, intervalo_min=INTERVALO_MIN, intervalo_max=INTERVALO_MAX):
+    """
+    Espera exponencial tras `errores` fallos seguidos (5, 10, 20... minutos
+    hasta el máximo), con jitter entre la mitad y el total.
+    """
+    espera = min(intervalo_max, intervalo_min * 2 ** min(errores - 1, 16))
+    return espera * rnd.uniform(0.5, 1.0)
+
+
+def actualizar_tasa(tasa, nuevas, horas):
+    """
+    Media móvil exponencial de noticias nuevas por hora.
+    """
+    if horas <= 0:
+        return tasa
+    observada = nuevas / horas
+    if tasa is None:
+        return observada
+    return ALFA_TASA * observada + (1 - ALFA_TASA) * tasa
+
+
+class Planificador:
+    """
+    Cola de prioridad de fuentes por próxima descarga.
+    """
+
+    def __init__(self, fuentes, rastreo, rnd=None, ahora=None):
+        self.rastreo = rastreo
+        self._rnd = rnd or random.Random()
+        self._fuentes = {}
+        self._cola = []
+        ahora = ahora or datetime.now()
+        for orden, fuente in enumerate(fuentes):
+            if fuente["url"] in self._fuentes:
+                continue
+            self._fuentes[fuente["url"]] = fuente
+            estado = rastreo.obtener(fuente)
+            # Próxima descarga guardada, sin pasarse del máximo (p. ej. tras bajar INTERVALO_MAX)
+            proxima = estado.proxima_descarga or ahora
+            proxima = min(proxima, ahora + INTERVALO_MAX)
+            heapq.heappush(self._cola, (proxima, orden, fuente["url"]))
+        self._orden = len(self._cola)
+
+    def __len__(self):
+        return len(self._cola)
+
+    def vencidas(self, ahora=None):
+        """
+        Saca de la cola y devuelve las fuentes cuya descarga ya toca.
+        """
+        ahora = ahora or datetime.now()
+        listas = []
+        while self._cola and self._cola[0][0] <= ahora:
+            _, _, url = heapq.heappop(self._cola)
+            listas.append(self._fuentes[url])
+        return listas
+
+    def espera(self, ahora=None):
+        """
+        Segundos hasta la próxima descarga (0 si ya toca alguna).
+        """
+        if not self._cola:
+            return INTERVALO_MAX.total_seconds()
+        ahora = ahora or datetime.now()
+        return max(0.0, (self._cola[0][0] - ahora).total_seconds())
+
+    def reprogramar(self, fuente, ahora=None):
+        """
+        Vuelve a encolar la fuente tras su descarga, ya registrada en su
+        estado (registrar_listado / registrar_sin_cambios / registrar_error).
+        """
+        ahora = ahora or datetime.now()
+        estado = self.rastreo.obtener(fuente)
+        if estado.errores_consecutivos:
+            intervalo = espera_por_errores(estado.errores_consecutivos, self._rnd)
+        else:
+            if estado.exito_anterior is not None:
+                horas = (estado.ultimo_exito - estado.exito_anterior).total_seconds() / 3600
+                estado.tasa_nuevas = actualizar_tasa(estado.tasa_nuevas, estado.nuevas_ultima, horas)
+            intervalo = intervalo_por_tasa(estado.tasa_nuevas) * self._rnd.uniform(1 - JITTER, 1 + JITTER)
+            intervalo = min(INTERVALO_MAX, max(INTERVALO_MIN, intervalo))
+        estado.proxima_descarga = ahora + intervalo
+        estado.marcar("tasa_nuevas", "proxima_descarga")
+        self._orden += 1
+        heapq.heappush(self._cola, (estado.proxima_descarga, self._orden, fuente["url"]))
+        return intervalo
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+Noticias relacionadas precalculadas para /api/noticias/relacionadas.
+
+Al guardar un lote, el oyente de ingesta busca en el índice en memoria
+(buscador.IndiceBusqueda.similares) los K vecinos por TF-IDF de cada noticia
+nueva y los guarda en noticias_relacionadas en ambos sentidos; las noticias
+así calculadas quedan en vecinos_calculados. modo=similar sirve esa tabla con
+una lectura por clave primaria.
+
+Para rellenar la tabla con las noticias existentes:
+
+    python relacionadas.py
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mysql.connector import Error
+from consultas import FUENTES_EXCLUIDAS, lista_select
+from buscador import obtener_indice, calentar_indice
+
+# ----------------- CONFIG RELACIONADAS -----------------
+VECINOS_POR_NOTICIA = 10
+TAM_LOTE_RELLENO = 500
+SOBREMUESTREO_ALEATORIO = 3   # ids sorteados por cada noticia pedida en modo random
+INTENTOS_ALEATORIO = 3
+
+_EXCLUIR_FUENTES = "(n.fuente IS NULL OR n.fuente NOT IN (%s, %s))"
+
+
+def _por_puntuacion(vecinos):
+    # (relacionada_id, puntuacion) de mayor a menor, con el mismo desempate que leer_similares
+    return sorted(vecinos, key=lambda v: (v[1], v[0]), reverse=True)
+
+
+def calcular_vecinos(ids, indice=None, k=VECINOS_POR_NOTICIA):
+    """
+    Devuelve las filas (noticia_id, relacionada_id, puntuacion) de los K
+    vecinos de cada id, en ambos sentidos: una noticia nueva también pasa a
+    ser vecina de las anteriores que se le parecen. Tras agregar los
+    sentidos inversos, cada lista se recorta de nuevo a sus K mejores.
+    """
+    indice = indice or obtener_indice()
+    vecinos = {}
+    for doc_id in ids:
+        for otro, puntuacion in indice.similares(doc_id, k):
+            vecinos.setdefault(doc_id, {})[otro] = puntuacion
+            vecinos.setdefault(otro, {}).setdefault(doc_id, puntuacion)
+    return [(a, b, p) for a, lista in vecinos.items() for b, p in _por_puntuacion(lista.items())[:k]]
+
+
+def guardar_vecinos(conn, filas, k=VECINOS_POR_NOTICIA, calculadas=()):
+    """
+    Inserta o actualiza los vecinos en noticias_relacionadas y, en la misma
+    transacción, borra los que quedaron fuera de los K mejores de cada
+    noticia tocada (una noticia popular recibe vecinos inversos de cada lote).
+    calculadas son los ids pasados a calcular_vecinos: se marcan en
+    vecinos_calculados aunque no tengan ninguna vecina.
+    """
+    if not filas and not calculadas:
+        return 0
+    cursor = conn.cursor()
+    try:
+        if calculadas:
+            cursor.executemany(
+                "INSERT INTO vecinos_calculados (noticia_id) VALUES (%s) "
+                "ON DUPLICATE KEY UPDATE noticia_id = noticia_id",
+                [(noticia_id,) for noticia_id in calculadas]
+            )
+        if not filas:
+            conn.commit()
+            return 0
+        cursor.executemany(
+            "INSERT INTO noticias_relacionadas (noticia_id, relacionada_id, puntuacion) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE puntuacion = VALUES(puntuacion)",
+            filas
+        )
+        ids = sorted({a for a, _, _ in filas})
+        cursor.execute(
+            f"SELECT noticia_id, relacionada_id, puntuacion FROM noticias_relacionadas "
+            f"WHERE noticia_id IN ({', '.join(['%s'] * len(ids))})",
+            ids
+        )
+        por_noticia = {}
+        for noticia_id, relacionada_id, puntuacion in cursor.fetchall():
+            por_noticia.setdefault(noticia_id, []).append((relacionada_id, puntuacion))
+        sobrantes = [
+            (noticia_id, relacionada_id)
+            for noticia_id, lista in por_noticia.items() if len(lista) > k
+            for relacionada_id, _ in _por_puntuacion(lista)[k:]
+        ]
+        if sobrantes:
+            cursor.executemany(
+                "DELETE FROM noticias_relacionadas WHERE noticia_id = %s AND relacionada_id = %s", sobrantes
+            )
+        conn.commit()
+        return len(filas)
+    finally:
+        cursor.close()
+
+
+def actualizar_por_ingesta(noticias):
+    """
+    Oyente de ingesta (db.registrar_oyente_ingesta). Debe registrarse después
+    del que agrega las noticias al índice. Mientras el índice se calienta no
+    hace nada: el endpoint calcula los vecinos al pedirlos.
+    """
+    indice = obtener_indice()
+    if not noticias or not indice.listo:
+        return
+    from db import conectar
+
+    conn = conectar()
+    if not conn:
+        return
+    ids = [n["id"] for n in noticias]
+    try:
+        guardar_vecinos(conn, calcular_vecinos(ids), calculadas=ids)
+    except Error as e:
+        print(f"⚠️ No se pudieron guardar las noticias relacionadas: {e}")
+    finally:
+        conn.close()
+
+
+def vecinos_calculados(cursor, noticia_id):
+    """
+    True si ya se calcularon los vecinos de noticia_id. Sus filas en
+    noticias_relacionadas no bastan: las crean también los sentidos inversos
+    de noticias posteriores.
+    """
+    cursor.execute("SELECT noticia_id FROM vecinos_calculados WHERE noticia_id = %s", (noticia_id,))
+    return cursor.fetchone() is not None
+
+
+def leer_similares(cursor, noticia_id, limit, campos):
+    """
+    Vecinos precalculados de noticia_id (campos: lista de columnas públicas).
+    """
+    cursor.execute(
+        f"""
+        SELECT {lista_select(campos, "n.")}, r.puntuacion
+        FROM noticias_relacionadas AS r
+        JOIN noticias AS n ON n.id = r.relacionada_id
+        WHERE r.noticia_id = %s AND {_EXCLUIR_FUENTES}
+        ORDER BY r.puntuacion DESC, n.id DESC
+        LIMIT %s
+        """,
+        (noticia_id,) + FUENTES_EXCLUIDAS + (limit,)
+    )
+    return cursor.fetchall()
+
+
+def muestra_aleatoria(cursor, excluir_id, limit, campos, rnd=random):
+    """
+    Noticias al azar sin ORDER BY RAND(): se sortean ids entre MIN(id) y
+    MAX(id) y se leen por clave primaria. Los huecos de ids borrados se
+    cubren sorteando de más y repitiendo hasta INTENTOS_ALEATORIO veces.
+    """
+    cursor.execute("SELECT MIN(id) AS minimo, MAX(id) AS maximo FROM noticias")
+    rango = cursor.fetchone()
+    if not rango or rango["minimo"] is None:
+        return []
+    minimo, maximo = rango["minimo"], rango["maximo"]
+
+    elegidas = {}
+    for _ in range(INTENTOS_ALEATORIO):
+        faltan = limit - len(elegidas)
+        if faltan <= 0:
+            break
+        sorteados = {rnd.randint(minimo, maximo) for _ in range(faltan * SOBREMUESTREO_ALEATORIO)}
+        sorteados -= set(elegidas) | {excluir_id}
+        if not sorteados:
+            continue
+        marcadores = ", ".join(["%s"] * len(sorteados))
+        cursor.execute(
+            f"SELECT {lista_select(campos, 'n.')} FROM noticias AS n WHERE n.id IN ({marcadores}) AND {_EXCLUIR_FUENTES}",
+            tuple(sorteados) + FUENTES_EXCLUIDAS
+        )
+        filas = cursor.fetchall()
+        rnd.shuffle(filas)
+        for fila in filas[:faltan]:
+            elegidas[fila["id"]] = fila
+    return list(elegidas.values())
+
+
+def rellenar_relacionadas(tam_lote=TAM_LOTE_RELLENO):
+    """
+    Calcula los vecinos de todas las noticias del índice y los guarda por lotes.
+    """
+    from db import conectar
+
+    indice = obtener_indice()
+    if not indice.listo and not calentar_indice():
+        return False
+    conn = conectar()
+    if not conn:
+        return False
+
+    ids = indice.ids()
+    guardadas = 0
+    try:
+        for i in range(0, len(ids), tam_lote):
+            lote = ids[i:i + tam_lote]
+            guardadas += guardar_vecinos(conn, calcular_vecinos(lote, indice), calculadas=lote)
+            print(f"   {min(i + tam_lote, len(ids))}/{len(ids)} noticias procesadas")
+        print(f"✅ {guardadas} relaciones guardadas")
+        return True
+    except Error as e:
+        print(f"❌ Error al guardar noticias relacionadas: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    from db import asegurar_tabla_relacionadas
+
+    if not asegurar_tabla_relacionadas():
+        exit(1)
+    exit(0 if rellenar_relacionadas() else 1)
@@ -1,102 +1,97 @@
-import requests
-from bs4 import BeautifulSoup
-from datetime import datetime
-from db import guardar_noticia, crear_tabla_si_no_existe
+from db import guardar_noticias_lote, crear_tabla_si_no_existe, obtener_filtro_enlaces, registrar_oyente_ingesta
+from cache_respuestas import invalidar_por_ingesta
+from agrupamiento import asignar_por_ingesta
+from buscador import obtener_indice, iniciar_calentamiento
+from relacionadas import actualizar_por_ingesta
+from clasificador import clasificar_tipos_lote
+from extraccion import Extraccion, parsear
+from estado_rastreo import EstadoRastreo
+from descargas import descargar, descargar_fuentes
+from cache_http import obtener_cache
 from sources import FUENTES, obtener_fuentes_por_categoria, obtener_categorias_disponibles, clasificar_noticia
-from urllib.parse import urljoin
-import sys
+import argparse
 
 
 # FUENTES importadas desde sources.py
 
 # ----------------- FUNCIÓN GENÉRICA -----------------
-def scrape_fuente(fuente):
+def scrape_fuente(fuente, completo=False):
+    rastreo = EstadoRastreo.cargar([fuente])
+    try:
+        # --full recorre la página aunque no haya cambiado: sin GET condicional
+        html, validadores = descargar(fuente["url"], usar_cache=not completo)
+    except Exception as e:
+        print(f"❌ Error en {fuente['fuente']}: {e}")
+        rastreo.obtener(fuente).registrar_error(e)
+        rastreo.guardar()
+        return
+    if html is None:
+        print(f"♻️ {fuente['fuente']} sin cambios ({fuente['url']})")
+        rastreo.obtener(fuente).registrar_sin_cambios()
+    else:
+        procesar_fuente(fuente, html, rastreo, completo, validadores)
+    rastreo.guardar()
+
+def procesar_fuente(fuente, html, rastreo, completo=False, validadores=None):
+    """
+    Parsea el HTML ya descargado de una fuente y guarda sus noticias.
+
+    En modo incremental los links conocidos (listado anterior de la URL o
+    filtro de enlaces) se saltan y la extracción se detiene tras
+    PARADA_CONOCIDAS seguidos. Con completo se recorre toda la página.
+
+    Los validadores HTTP de la descarga se confirman en la cache solo si el
+    listado se guardó sin errores; si no, la próxima descarga lo vuelve a traer.
+    """
     print(f"🌐 Scrapeando {fuente['fuente']}...")
+    estado = rastreo.obtener(fuente)
 
     try:
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0 Safari/537.36 NoticieroBot/1.0"
-        }
-        response = requests.get(fuente["url"], timeout=12, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        use_container = bool(fuente.get("container"))
-        if use_container:
-            items = soup.select(fuente["container"]) or []
-        else:
-            items = soup.select(fuente.get("selector", "a")) or []
-
-        for item in items:
-            # Título y enlace
-            anchor = None
-            if use_container and fuente.get("title_selector"):
-                anchor = item.select_one(fuente["title_selector"]) or item.find('a', href=True)
-            else:
-                anchor = item if getattr(item, 'name', None) == 'a' else item.find('a', href=True)
-            link = anchor.get('href') if anchor and anchor.has_attr('href') else None
-            titulo = anchor.get_text(strip=True) if anchor else (item.get_text(strip=True) if item else None)
-
-            if not titulo or not link:
-                continue
-            link = urljoin(fuente["base"], link)
-
-            # Imagen
-            imagen = None
-            if use_container and fuente.get("img_selector"):
-                img_sel = fuente["img_selector"]
-                css_sel = img_sel.split("::attr(")[0].strip()
-                img_el = item.select_one(css_sel)
-                if img_el:
-                    imagen = img_el.get("src") or img_el.get("data-src") or img_el.get("data-img-url")
-                if not imagen and "::attr(" in img_sel:
-                    attr_name = img_sel.split("::attr(",1)[1][:-1]
-                    if img_el and img_el.get(attr_name):
-                        imagen = img_el.get(attr_name)
-            elif not use_container and fuente.get("selector_img"):
-                el = item.select_one(fuente["selector_img"]) if hasattr(item, 'select_one') else None
-                if el:
-                    imagen = el.get("src") or el.get("data-src") or el.get("data-img-url")
-            if imagen:
-                imagen = urljoin(fuente["base"], imagen)
-
-            # Otros datos
-            categoria = None
-            if use_container and fuente.get("category_selector"):
-                cat_el = item.select_one(fuente["category_selector"]) 
-                if cat_el:
-                    categoria = cat_el.get_text(strip=True)
-            if not categoria:
-                categoria = fuente.get("categoria")
-            fecha = datetime.today().date()
-            resumen = None
-            if use_container and fuente.get("summary_selector"):
-                sum_el = item.select_one(fuente["summary_selector"]) 
-                if sum_el:
-                    resumen = sum_el.get_text(strip=True)
-            autor = None
-            if use_container and fuente.get("author_selector"):
-                aut_el = item.select_one(fuente["author_selector"]) 
-                if aut_el:
-                    autor = aut_el.get_text(strip=True)
+        # Solo los contenedores de la fuente, con su parser; tiempo y memoria al reporte
+        soup, estado.parseo = parsear(fuente, html)
 
+        conocido = None
+        if not completo:
+            filtro = obtener_filtro_enlaces()
+            conocido = lambda link_hash: estado.conoce(link_hash) or link_hash in filtro
+        extraccion = Extraccion(fuente, soup, conocido)
+
+        noticias = []
+        for noticia in extraccion:
             # Clasificar la noticia automáticamente
-            clasificacion = clasificar_noticia(titulo, resumen, fuente.get("categoria", "nacional"))
-            
-            guardar_noticia(
-                titulo, link, clasificacion["categoria"], fecha, resumen, autor, imagen, fuente["fuente"], clasificacion["departamento"]
-            )
+            clasificacion = clasificar_noticia(noticia["titulo"], noticia["resumen"], fuente.get("categoria", "nacional"))
+            noticia["categoria"] = clasificacion["categoria"]
+            noticia["departamento"] = clasificacion["departamento"]
+            noticias.append(noticia)
+
+        # Tipo de todo el listado en una sola pasada
+        for noticia, tipo in zip(noticias, clasificar_tipos_lote(noticias)):
+            noticia["tipo"] = tipo
+
+        # Guardar todo el listado en una sola transacción
+        resultado = guardar_noticias_lote(noticias)
+        # Con errores de BD no se recuerdan los links: se reintentan en la próxima descarga
+        estado.registrar_listado(extraccion.link_hashes if not resultado["errores"] else [], resultado["insertadas"],
+                                 conocidas=extraccion.conocidas, omitidas=extraccion.omitidas)
+        if not resultado["errores"]:
+            obtener_cache().confirmar(fuente["url"], validadores)
+        print(f"✅ {fuente['fuente']} - Nuevas: {resultado['insertadas']}, Duplicados: {resultado['duplicadas']} "
+              f"(en memoria: {resultado['conocidas']}), Ya vistas: {extraccion.conocidas}, "
+              f"Sin recorrer: {extraccion.omitidas}, Errores: {resultado['errores']}")
+        print(f"   ⏱️ Parseo: {_formato_parseo(estado.parseo)}")
 
     except Exception as e:
         print(f"❌ Error en {fuente['fuente']}: {e}")
+        estado.registrar_error(e)
 
 # ----------------- FUNCIÓN PARA SCRAPING POR CATEGORÍA -----------------
-def scrape_por_categoria(categoria=None):
+def scrape_por_categoria(categoria=None, completo=False):
     """
     Realiza scraping de noticias para una categoría específica o todas las fuentes.
     
     Args:
         categoria: 'nacional', 'internacional', 'regional' o None para todas
+        completo: recorrer cada página entera, sin saltar links conocidos (--full)
     """
     print(f"🚀 Iniciando scraping para: {categoria or 'TODAS LAS CATEGORÍAS'}...")
     
@@ -114,18 +109,94 @@ def scrape_por_categoria(categoria=None):
         fuentes = FUENTES
         print(f"🌍 Scrapeando {len(fuentes)} fuentes de todas las categorías")
     
-    # Realizar scraping
-    for fuente in fuentes:
-        scrape_fuente(fuente)
+    filtro = obtener_filtro_enlaces()
+    filtro.reiniciar_estadisticas()
+    # Estado de todas las fuentes en una consulta; se escribe al final del ciclo
+    rastreo = EstadoRastreo.cargar(fuentes)
+
+    # Descargar en paralelo y procesar cada página en cuanto llega
+    for fuente, html, validadores, error in descargar_fuentes(fuentes, usar_cache=not completo):
+        if error:
+            print(f"❌ Error en {fuente['fuente']}: {error}")
+            rastreo.obtener(fuente).registrar_error(error)
+            continue
+        if html is None:
+            # 304 o cuerpo idéntico: no hace falta parsear ni tocar la BD
+            print(f"♻️ {fuente['fuente']} sin cambios ({fuente['url']})")
+            rastreo.obtener(fuente).registrar_sin_cambios()
+            continue
+        procesar_fuente(fuente, html, rastreo, completo, validadores)
+    rastreo.guardar()
     
+    reportar_cache_http(fuentes)
+    reportar_filtro_enlaces(filtro)
+    reportar_parada_temprana(rastreo)
+    reportar_parseo(rastreo)
     print(f"✅ Finalizó scraping para: {categoria or 'TODAS LAS CATEGORÍAS'}")
 
+def reportar_cache_http(fuentes):
+    """
+    Muestra los hits/misses acumulados de la cache HTTP por fuente.
+    """
+    estadisticas = obtener_cache().estadisticas([f["url"] for f in fuentes])
+    print("📦 Cache HTTP (hits/misses):")
+    for url, conteo in estadisticas.items():
+        print(f"   - {url}: {conteo['hits']}/{conteo['misses']}")
+
+def reportar_filtro_enlaces(filtro):
+    """
+    Muestra cuántos links se descartaron en memoria sin consultar MySQL.
+    """
+    stats = filtro.estadisticas()
+    print(f"🧠 Filtro de enlaces: {stats['omitidos']}/{stats['consultados']} omitidos "
+          f"({stats['tasa_omision']:.0%}), {stats['tamano']} links en memoria")
+
+def reportar_parada_temprana(rastreo):
+    """
+    Muestra por fuente los links conocidos saltados y los contenedores que
+    la parada temprana dejó sin recorrer (acumulados en el proceso).
+    """
+    print("⏭️ Parada temprana (ya vistas / sin recorrer):")
+    for estado in rastreo:
+        print(f"   - {estado.url}: {estado.conocidas_total}/{estado.omitidas_total}")
+
+def _formato_parseo(parseo):
+    memoria = ""
+    if parseo["pico"] is not None:
+        memoria = f", pico {parseo['pico'] / 1024:.0f} KB, árbol {parseo['memoria'] / 1024:.0f} KB"
+    return (f"{parseo['segundos'] * 1000:.0f} ms{memoria} ({parseo['parser']}"
+            f"{', solo contenedores' if parseo['parcial'] else ''})")
+
+def reportar_parseo(rastreo):
+    """
+    Muestra por fuente el tiempo y la memoria del último parseo.
+    """
+    print("⏱️ Parseo (tiempo; con SCRAPER_MEDIR_MEMORIA=1, pico de memoria y memoria del árbol):")
+    for estado in rastreo:
+        if estado.parseo:
+            print(f"   - {estado.url}: {_formato_parseo(estado.parseo)}")
+
 # ----------------- MAIN -----------------
 if __name__ == "__main__":
     # Verificar argumentos de línea de comandos
-    categoria = None
-    if len(sys.argv) > 1:
-        categoria = sys.argv[1].lower()
+    parser = argparse.ArgumentParser(description="Scraping de noticias por categoría")
+    parser.add_argument("categoria", nargs="?", help="nacional, internacional o regional (por defecto, todas)")
+    parser.add_argument("--full", action="store_true",
+                        help="recorrer cada página entera, sin parar en links conocidos (backfill)")
+    args = parser.parse_args()
+    categoria = args.categoria.lower() if args.categoria else None
+    if categoria:
         print(f"📂 Modo categoría: {categoria}")
+    if args.full:
+        print("📜 Modo completo: sin parada temprana")
     
-    scrape_por_categoria(categoria)
+    # Vecinos de las noticias nuevas, como en app.py: el índice se carga en segundo
+    # plano y mientras tanto la API los calcula al pedirlos
+    iniciar_calentamiento()
+    registrar_oyente_ingesta(obtener_indice().agregar)
+    registrar_oyente_ingesta(actualizar_por_ingesta)
+    # cluster_id de las noticias nuevas, antes de invalidar la cache de la API
+    registrar_oyente_ingesta(asignar_por_ingesta)
+    # Las respuestas cacheadas por la API caducan cuando este proceso inserta noticias
+    registrar_oyente_ingesta(invalidar_por_ingesta)
+    scrape_por_categoria(categoria, completo=args.full)
@@ -8,6 +8,8 @@
 #   - categoria: categoría general
 #   - departamento: departamento específico (opcional)
 
+from lugares import DetectorLugares
+
 # ----------------- DEPARTAMENTOS DEL PERÚ (24 DEPARTAMENTOS) -----------------
 DEPARTAMENTOS = [
     "amazonas", "ancash", "apurimac", "arequipa", "ayacucho", "cajamarca", 
@@ -30,8 +32,9 @@ DEPARTAMENTOS_MAP = {
     "huancavelica": ["huancavelica", "huancavelica"],
     "huanuco": ["huanuco", "huanuco", "huánuco"],
     "ica": ["ica", "ica"],
-    "junin": ["junin", "junin", "junjín"],
-    "la-libertad": ["la-libertad", "la libertad", "libertad"],
+    "junin": ["junin", "junín"],
+    # "libertad" sola no: "libertad de expresión", "libertad condicional"...
+    "la-libertad": ["la-libertad", "la libertad"],
     "lambayeque": ["lambayeque", "lambayeque"],
     "lima": ["lima", "lima"],
     "loreto": ["loreto", "loreto"],
@@ -352,22 +355,31 @@ def obtener_categorias_disponibles():
     """
     return list(CATEGORIAS.keys())
 
+# Detector compilado una vez con departamentos, provincias y ciudades (lugares.py)
+_detector_lugares = DetectorLugares(DEPARTAMENTOS_MAP)
+
 def detectar_departamento_en_texto(texto):
     """
-    Detecta si el texto menciona algún departamento del Perú.
-    Retorna el departamento encontrado o None.
+    Detecta si el texto menciona algún departamento del Perú (o una de sus
+    provincias o ciudades principales), respetando límites de palabra.
+    Retorna el departamento más mencionado o None.
     """
     if not texto:
         return None
-    
-    texto_lower = texto.lower()
-    
-    for dept, variantes in DEPARTAMENTOS_MAP.items():
-        for variante in variantes:
-            if variante in texto_lower:
-                return dept
-    
-    return None
+    return _detector_lugares.departamento(texto)
+
+def detectar_departamentos_en_lote(textos):
+    """
+    Igual que detectar_departamento_en_texto para una lista de textos, en una sola pasada.
+    """
+    return _detector_lugares.departamentos_lote(textos)
+
+def detectar_lugares(texto):
+    """
+    Retorna todos los lugares mencionados en el texto con su posición:
+    [{'lugar', 'departamento', 'provincia', 'inicio', 'fin'}].
+    """
+    return _detector_lugares.buscar(texto)
 
 def clasificar_noticia(titulo, resumen, categoria_fuente):
     """
@@ -384,11 +396,23 @@ def clasificar_noticia(titulo, resumen, categoria_fuente):
             'departamento': nombre_departamento|None
         }
     """
-    texto_completo = f"{titulo or ''} {resumen or ''}".lower()
+    # Sin lower(): el detector ignora mayúsculas salvo para "La Libertad"
+    texto_completo = f"{titulo or ''} {resumen or ''}"
     
     # Detectar departamento en el texto
     departamento = detectar_departamento_en_texto(texto_completo)
-    
+    return _clasificar(departamento, categoria_fuente)
+
+def clasificar_noticias_lote(noticias):
+    """
+    Igual que clasificar_noticia para una lista de dicts con titulo, resumen
+    y categoria (la de la fuente), con una sola pasada del detector.
+    """
+    departamentos = detectar_departamentos_en_lote(
+        f"{n.get('titulo') or ''} {n.get('resumen') or ''}" for n in noticias)
+    return [_clasificar(d, n.get("categoria")) for n, d in zip(noticias, departamentos)]
+
+def _clasificar(departamento, categoria_fuente):
     # Si la fuente ya está clasificada como regional (Puno), mantenerlo
     if categoria_fuente == "regional":
         return {
@@ -4,6 +4,7 @@ const limit = 15; // Máximo 15 noticias para infinite scroll
 let currentView = 'grid'; // 'grid' o 'list'
 let currentFilters = {};
 let paginationData = {};
+let nextCursor = null; // cursor opaco de la API para pedir la página siguiente (keyset)
 let isInfiniteScroll = true;
 let isLoading = false;
 
@@ -31,11 +32,15 @@ function formatDate(dateString) {
 }
 
 // ========== CREAR NODO DE NOTICIA ==========
+// titulo_resaltado / snippet vienen del índice de búsqueda, ya escapados y con <mark>.
+// Los listados traen la proyección "card" (extracto en lugar del resumen completo).
 function crearNodoNoticia(n, viewType = currentView) {
     const div = document.createElement('div');
     div.className = `noticia ${viewType === 'list' ? 'list-view' : 'grid-view'}`;
     
-    const meta = `<div class="meta"><strong>Fuente:</strong> ${n.fuente || ''} · <strong>Fecha:</strong> ${formatDate(n.fecha)}</div>`;
+    const otras = (n.otras_fuentes || []).map(o => `<a href="${o.link}" target="_blank" rel="noopener">${o.fuente || 'otra fuente'}</a>`).join(', ');
+    const tambienEn = otras ? ` · <strong>También en:</strong> ${otras}` : '';
+    const meta = `<div class="meta"><strong>Fuente:</strong> ${n.fuente || ''} · <strong>Fecha:</strong> ${formatDate(n.fecha)}${tambienEn}</div>`;
     const img = n.imagen ? `<img src="${n.imagen}" alt="Imagen de noticia" class="news-image" data-src="${n.imagen}">` : '';
     const tipoTag = n.tipo ? `<span class="tag tipo-tag">${n.tipo}</span>` : '';
     const categoriaTag = n.categoria ? `<span class="tag categoria-tag ${n.categoria}">${n.categoria.charAt(0).toUpperCase() + n.categoria.slice(1)}</span>` : '';
@@ -50,7 +55,7 @@ function crearNodoNoticia(n, viewType = currentView) {
                 </div>
                 <div class="noticia-text">
                     <div class="noticia-header">
-                        <h2><a href="/noticia?id=${n.id}">${n.titulo}</a></h2>
+                        <h2><a href="/noticia?id=${n.id}">${n.titulo_resaltado || n.titulo}</a></h2>
                         <button class="bookmark-btn ${isFav}" data-id="${n.id}" aria-label="Guardar noticia">⭐</button>
                     </div>
                     ${meta}
@@ -59,7 +64,7 @@ function crearNodoNoticia(n, viewType = currentView) {
                         ${categoriaTag}
                         ${departamentoTag}
                     </div>
-                    <p>${n.resumen || ''}</p>
+                    <p>${n.snippet || n.extracto || n.resumen || ''}</p>
                     <div class="actions">
                         <button class="preview-btn" data-id="${n.id}">👁 Vista Previa</button>
                         <button class="share-btn" data-title="${n.titulo}" data-url="/noticia?id=${n.id}">Compartir</button>
@@ -70,7 +75,7 @@ function crearNodoNoticia(n, viewType = currentView) {
     } else {
         div.innerHTML = `
             <div class="noticia-header">
-                <h2><a href="/noticia?id=${n.id}">${n.titulo}</a></h2>
+                <h2><a href="/noticia?id=${n.id}">${n.titulo_resaltado || n.titulo}</a></h2>
                 <button class="bookmark-btn ${isFav}" data-id="${n.id}" aria-label="Guardar noticia">⭐</button>
             </div>
             ${meta}
@@ -79,7 +84,7 @@ function crearNodoNoticia(n, viewType = currentView) {
                 ${categoriaTag}
             </div>
             ${img}
-            <p>${n.resumen || ''}</p>
+            <p>${n.snippet || n.extracto || n.resumen || ''}</p>
             <div class="actions">
                 <button class="preview-btn" data-id="${n.id}">👁 Vista Previa</button>
                 <button class="share-btn" data-title="${n.titulo}" data-url="/noticia?id=${n.id}">Compartir</button>
@@ -118,6 +123,7 @@ function cargarNoticias(filtros = {}, append = true, resetPage = false) {
     
     if (resetPage) {
         page = 1;
+        nextCursor = null;
     }
     
     const contenedor = document.getElementById('noticias');
@@ -135,6 +141,13 @@ function cargarNoticias(filtros = {}, append = true, resetPage = false) {
     const params = new URLSearchParams();
     params.set('page', page);
     params.set('limit', limit);
+    // Al seguir con scroll infinito se pide la siguiente página por cursor
+    // (la API no recorre las filas ya vistas como haría con OFFSET)
+    // El total ya se conoce desde la primera página: no se vuelve a contar
+    if (append && page > 1 && nextCursor) {
+        params.set('cursor', nextCursor);
+        params.set('count', 'none');
+    }
     
     if (filtros.fuente) params.set('fuente', filtros.fuente);
     if (filtros.categoria) params.set('categoria', filtros.categoria);
@@ -143,14 +156,12 @@ function cargarNoticias(filtros = {}, append = true, resetPage = false) {
     if (filtros.fecha_desde) params.set('fecha_desde', filtros.fecha_desde);
     if (filtros.fecha_hasta) params.set('fecha_hasta', filtros.fecha_hasta);
     if (filtros.ordenar) params.set('ordenar', filtros.ordenar);
+    // Una tarjeta por historia: las copias de otras fuentes llegan en otras_fuentes
+    params.set('agrupar', '1');
     
+    // La búsqueda (FULLTEXT) se combina con los demás filtros
     if (filtros.q) {
         url = `/api/noticias/buscar?`;
-        params.delete('fuente');
-        params.delete('categoria');
-        params.delete('fecha');
-        params.delete('fecha_desde');
-        params.delete('fecha_hasta');
         params.set('q', filtros.q);
     }
     
@@ -170,7 +181,13 @@ function cargarNoticias(filtros = {}, append = true, resetPage = false) {
             }
             
             const noticias = data.noticias || data;
+            const anterior = paginationData;
             paginationData = data.pagination || {};
+            if (paginationData.total == null && anterior.total != null) {
+                paginationData.total = anterior.total;
+                paginationData.total_pages = anterior.total_pages;
+            }
+            nextCursor = paginationData.next_cursor || null;
             
             noticias.forEach(noticia => {
                 contenedor.appendChild(crearNodoNoticia(noticia));
@@ -259,6 +276,7 @@ function updatePaginationControls(pagination) {
 
 function goToPage(newPage) {
     page = newPage;
+    nextCursor = null; // salto directo a una página: se usa page/offset
     cargarNoticias(currentFilters, false, false);
 }
 
@@ -269,6 +287,15 @@ function showPreview(noticia) {
     
     if (!modal || !content) return;
     
+    // Las tarjetas no traen el resumen completo: se pide el detalle al abrir la vista previa
+    if (noticia.resumen === undefined) {
+        fetch(`/api/noticias/${noticia.id}`)
+            .then(r => r.json())
+            .then(completa => showPreview(completa.id ? completa : { ...noticia, resumen: noticia.extracto || '' }))
+            .catch(() => showPreview({ ...noticia, resumen: noticia.extracto || '' }));
+        return;
+    }
+    
     content.innerHTML = `
         <h2>${noticia.titulo}</h2>
         <div class="meta">
@@ -626,56 +653,65 @@ function renderFavoritos() {
     const fechaHasta = document.getElementById('fav-fecha-hasta')?.value || '';
     const ordenar = document.getElementById('fav-ordenar')?.value || 'fecha_desc';
     
-    Promise.all(ids.map(id => 
-        fetch(`/api/noticias/${id}`)
-            .then(r => r.json())
-            .catch(() => null)
+    // Una petición por cada 500 favoritos (límite de la API); los filtros los aplica la API
+    const LOTE = 500;
+    const lotes = [];
+    for (let i = 0; i < ids.length; i += LOTE) lotes.push(ids.slice(i, i + LOTE));
+    
+    Promise.all(lotes.map(loteIds =>
+        fetch('/api/noticias/lote', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                ids: loteIds,
+                q: searchQuery,
+                fecha_desde: fechaDesde,
+                fecha_hasta: fechaHasta
+            })
+        })
+            .then(r => {
+                if (!r.ok) throw new Error(`HTTP ${r.status}`);
+                return r.json();
+            })
+            .then(data => ({ noticias: data.noticias || [] }))
+            .catch(() => ({ noticias: [], fallidos: loteIds.length }))
     ))
-    .then(items => {
-        let filteredItems = items.filter(Boolean);
-        
-        // Filtro de búsqueda
-        if (searchQuery) {
-            filteredItems = filteredItems.filter(n => 
-                n.titulo?.toLowerCase().includes(searchQuery) || 
-                n.resumen?.toLowerCase().includes(searchQuery)
-            );
-        }
-        
-        // Filtro de fecha (comparar como fechas reales)
-        if (fechaDesde) {
-            const desde = new Date(fechaDesde);
-            filteredItems = filteredItems.filter(n => {
-                const f = n && n.fecha ? new Date(n.fecha) : null;
-                return f ? f >= desde : false;
-            });
-        }
-        if (fechaHasta) {
-            const hasta = new Date(fechaHasta);
-            filteredItems = filteredItems.filter(n => {
-                const f = n && n.fecha ? new Date(n.fecha) : null;
-                return f ? f <= hasta : false;
-            });
-        }
+    .then(resultados => {
+        const filteredItems = resultados.flatMap(r => r.noticias);
+        const fallidos = resultados.reduce((total, r) => total + (r.fallidos || 0), 0);
         
-        // Ordenamiento
+        // Ordenamiento global (cada lote llega por separado); a igual valor, el orden guardado
+        const posicion = new Map(ids.map((id, i) => [id, i]));
+        const fecha = n => (n.fecha ? new Date(n.fecha).getTime() : 0);
         filteredItems.sort((a, b) => {
+            let cmp;
             switch (ordenar) {
                 case 'fecha_asc':
-                    return new Date(a.fecha) - new Date(b.fecha);
+                    cmp = fecha(a) - fecha(b);
+                    break;
                 case 'titulo_asc':
-                    return a.titulo.localeCompare(b.titulo);
+                    cmp = (a.titulo || '').localeCompare(b.titulo || '');
+                    break;
                 case 'titulo_desc':
-                    return b.titulo.localeCompare(a.titulo);
+                    cmp = (b.titulo || '').localeCompare(a.titulo || '');
+                    break;
                 default: // fecha_desc
-                    return new Date(b.fecha) - new Date(a.fecha);
+                    cmp = fecha(b) - fecha(a);
             }
+            return cmp || posicion.get(a.id) - posicion.get(b.id);
         });
         
         filteredItems.forEach(n => {
             list.appendChild(crearNodoNoticia(n, 'list'));
         });
         
+        if (fallidos) {
+            const err = document.createElement('p');
+            err.className = 'meta';
+            err.textContent = `No se pudieron cargar ${fallidos} de tus favoritos. Recarga la página para reintentar.`;
+            list.appendChild(err);
+        }
+        
         bindFavButtons();
     });
 }
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la agrupación de noticias duplicadas entre fuentes
+"""
+
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agrupamiento import AgrupadorNoticias, terminos_titulo, jaccard
+from consultas import ConsultaNoticias
+from bd_prueba import CursorSQLite, crear_tabla_ejemplo
+
+INICIO = datetime(2024, 5, 1, 8, 0, 0)
+
+
+def test_misma_historia_mismo_grupo():
+    """Variantes del mismo titular comparten cluster_id; titulares distintos no"""
+    print("🧪 Probando agrupación de duplicados...")
+    agrupador = AgrupadorNoticias()
+    titulos = [
+        (1, "Huaicos en Huánuco bloquean la carretera central"),
+        (2, "Congreso aprueba reforma electoral en primera votación"),
+        (3, "Huaico en Huánuco bloquea la carretera central"),
+        (4, "El Congreso aprobó en primera votación la reforma electoral"),
+        (5, "BCR mantiene la tasa de referencia"),
+        (6, "Alcalde de Lima anuncia nuevo plan de transporte"),
+        (7, "Sismo"),
+    ]
+    grupos = {doc_id: agrupador.asignar(doc_id, titulo, INICIO + timedelta(minutes=doc_id))
+              for doc_id, titulo in titulos}
+    assert grupos == {1: 1, 2: 2, 3: 1, 4: 2, 5: 5, 6: 6, 7: 7}
+    assert jaccard(terminos_titulo(titulos[0][1]), terminos_titulo(titulos[2][1])) >= 0.5
+    # Reasignar la misma noticia no cambia su grupo
+    assert agrupador.asignar(3, titulos[2][1], INICIO) == 1
+
+
+def test_ventana():
+    """Un titular repetido días después abre otro grupo"""
+    print("\n🧪 Probando ventana de agrupación...")
+    agrupador = AgrupadorNoticias(ventana=timedelta(days=3))
+    titulo = "Resultados de la Tinka del domingo"
+    assert agrupador.asignar(1, titulo, INICIO) == 1
+    assert agrupador.asignar(2, titulo, INICIO + timedelta(days=1)) == 1
+    assert agrupador.asignar(3, titulo, INICIO + timedelta(days=10)) == 3
+    assert len(agrupador) == 1
+
+
+def test_listado_agrupado():
+    """agrupar=1: una noticia por grupo (la primera que cumple el filtro) y sus otras fuentes"""
+    print("\n🧪 Probando listado agrupado...")
+    conn = crear_tabla_ejemplo()
+    # Grupo 1: ids 1 (regional), 2 (nacional), 3 (regional); grupo 5: ids 5 y 10 (Peru21)
+    conn.executemany("UPDATE noticias SET cluster_id = ?, link = ? WHERE id = ?",
+                     [(1, "l1", 1), (1, "l2", 2), (1, "l3", 3), (5, "l5", 5), (5, "l10", 10)])
+    cursor = CursorSQLite(conn)
+
+    rows, _, total, _ = ConsultaNoticias.desde_args({"agrupar": "1", "limit": "50", "fields": "titulo,fuente"}).ejecutar(cursor)
+    ids = {r["id"] for r in rows}
+    assert 1 in ids and 2 not in ids and 3 not in ids and 5 in ids
+    assert total == len(rows) == 36 - 2
+    grupo = next(r for r in rows if r["id"] == 1)
+    assert [c["id"] for c in grupo["otras_fuentes"]] == [2, 3]
+    assert next(r for r in rows if r["id"] == 5)["otras_fuentes"] == []
+
+    # Con filtro, el representante es la primera copia que lo cumple
+    rows, _, _, _ = ConsultaNoticias.desde_args({"agrupar": "1", "categoria": "nacional", "limit": "50"}).ejecutar(cursor)
+    assert 2 in {r["id"] for r in rows}
+
+
+if __name__ == "__main__":
+    test_misma_historia_mismo_grupo()
+    test_ventana()
+    test_listado_agrupado()
+    print("\n✅ Pruebas completadas")
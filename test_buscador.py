@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el índice de búsqueda en memoria
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import db
+import buscador
+import cache_respuestas
+from buscador import IndiceBusqueda, tokenizar, analizar_consulta, resaltar
+from bd_prueba import ConexionSQLite, crear_tabla_noticias, insertar_noticias
+
+NOTICIAS = [
+    {"id": 1, "titulo": "Huánuco: lluvias intensas dejan damnificados", "resumen": "Las lluvias en la región Huánuco afectan a 200 familias.",
+     "categoria": "regional", "departamento": "huanuco", "fuente": "RPP", "fecha": "2024-05-01", "fecha_scraping": "2024-05-01 10:00:00"},
+    {"id": 2, "titulo": "Política nacional en debate", "resumen": "El Congreso debate la política de regiones y el BCR responde.",
+     "categoria": "nacional", "departamento": None, "fuente": "RPP", "fecha": "2024-05-03", "fecha_scraping": "2024-05-03 10:00:00"},
+    {"id": 3, "titulo": "Ica registra sismo", "resumen": "Un sismo se sintió en Ica sin daños en la región.",
+     "categoria": "regional", "departamento": "ica", "fuente": "Andina", "fecha": "2024-05-02", "fecha_scraping": "2024-05-02 10:00:00"},
+    {"id": 4, "titulo": "Lluvias en Huánuco según Perú21", "resumen": "Nota de una fuente excluida.",
+     "categoria": "regional", "departamento": "huanuco", "fuente": "Perú21", "fecha": "2024-05-04", "fecha_scraping": "2024-05-04 10:00:00"},
+]
+
+
+def test_tokenizar():
+    """Plegado de tildes, stopwords, plurales y tokens cortos"""
+    print("🧪 Probando tokenización...")
+    assert tokenizar("Política en HUÁNUCO") == ["politica", "huanuco"]
+    assert tokenizar("las regiones y las luces") == ["region", "luz"]
+    assert tokenizar("BCR e Ica") == ["bcr", "ica"]
+    assert analizar_consulta('"ministerio de salud" lima') == (["lima", "ministerio", "salud"], [["ministerio", "salud"]])
+
+
+def test_busqueda_y_filtros():
+    """AND, frases, filtros, orden y exclusión de Peru21"""
+    print("\n🧪 Probando búsqueda...")
+    indice = IndiceBusqueda()
+    indice.agregar(NOTICIAS)
+    assert len(indice) == 3
+
+    ids = lambda r: [x["id"] for x in r[0]]
+    assert ids(indice.buscar("huanuco lluvia")) == [1]
+    assert ids(indice.buscar("region", ordenar="fecha_desc")) == [2, 3, 1]
+    assert ids(indice.buscar("region", filtros={"categoria": "regional"}, ordenar="fecha_asc")) == [1, 3]
+    assert ids(indice.buscar("region", filtros={"fecha_desde": "2024-05-02", "fecha_hasta": "2024-05-02"})) == [3]
+    assert ids(indice.buscar('"region huanuco"')) == [1]
+    assert ids(indice.buscar('"huanuco region"')) == []
+    assert ids(indice.buscar("bcr")) == [2] and ids(indice.buscar("ica")) == [3]
+    assert indice.buscar("de la") == ([], 0)
+
+    resultados, total = indice.buscar("region", limit=2, offset=2)
+    assert total == 3 and len(resultados) == 1
+
+
+def test_incremental_y_resaltado():
+    """Reindexar un id reemplaza sus términos; el resaltado escapa HTML"""
+    print("\n🧪 Probando actualización incremental y snippets...")
+    indice = IndiceBusqueda()
+    indice.agregar(NOTICIAS[:1])
+    indice.agregar([dict(NOTICIAS[0], titulo="Sequía en Huánuco", resumen="Sin agua")])
+    assert indice.buscar("lluvia") == ([], 0)
+    assert indice.buscar("sequia")[1] == 1
+    indice.eliminar(1)
+    assert indice.buscar("sequia") == ([], 0) and len(indice) == 0
+
+    assert resaltar("Huánuco <b>hoy</b>", ["huanuco"]) == "<mark>Huánuco</mark> &lt;b&gt;hoy&lt;/b&gt;"
+    texto = " ".join(f"p{i}" for i in range(50)) + " lluvias " + " ".join(f"q{i}" for i in range(50))
+    snippet = resaltar(texto, ["lluvia"], max_palabras=10)
+    assert snippet.startswith("… ") and snippet.endswith(" …") and "<mark>lluvias</mark>" in snippet
+
+
+def test_similares_corpus_chico():
+    """Con términos presentes en todas las noticias (idf 0) no hay vecinos ni división por cero"""
+    print("\n🧪 Probando similares en un corpus chico...")
+    indice = IndiceBusqueda()
+    indice.agregar([{"id": 1, "titulo": "Lluvias en Puno", "resumen": None},
+                    {"id": 2, "titulo": "Lluvias en Puno", "resumen": None}])
+    assert indice.similares(1) == [] and indice.similares(2) == []
+    indice.agregar([{"id": 3, "titulo": "Sismo en Ica", "resumen": None}])
+    assert [otro for otro, _ in indice.similares(1)] == [2]
+
+
+def test_refresco_desde_bd():
+    """Las noticias que inserta otro proceso se leen de la BD por id, sin recargar todo"""
+    print("\n🧪 Probando refresco del índice desde la BD...")
+    conn = crear_tabla_noticias()
+    insertar = lambda noticias: insertar_noticias(conn, noticias)
+    insertar(NOTICIAS[:2])
+
+    conectar_original, indice_original = db.conectar, buscador._indice
+    db.conectar = lambda: ConexionSQLite(conn)
+    buscador._indice = IndiceBusqueda()
+    try:
+        assert buscador.refrescar_indice() is None  # sin calentar no se refresca
+        assert buscador.calentar_indice(tam_lote=1)
+        assert buscador._indice.ultimo_id == 2 and buscador._indice.buscar("ica") == ([], 0)
+        # scraper.py inserta en otro proceso
+        insertar(NOTICIAS[2:])
+        assert buscador.refrescar_indice() == 2
+        assert buscador._indice.buscar("ica")[1] == 1 and buscador._indice.ultimo_id == 4
+        assert buscador.refrescar_indice() == 0
+    finally:
+        db.conectar, buscador._indice = conectar_original, indice_original
+
+
+def test_generacion_tras_refresco():
+    """indice_al_dia anota la generación solo si el refresco corrió"""
+    print("\n🧪 Probando la generación del índice con el refresco ocupado...")
+    import app as aplicacion
+
+    conn = crear_tabla_noticias()
+    insertar_noticias(conn, NOTICIAS[:2])
+    originales = db.conectar, buscador._indice, cache_respuestas._cache
+    db.conectar = lambda: ConexionSQLite(conn)
+    buscador._indice = IndiceBusqueda()
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache = cache_respuestas._cache = cache_respuestas.CacheRespuestas(ruta=os.path.join(carpeta, "r.sqlite3"))
+        try:
+            assert buscador.calentar_indice()
+            aplicacion._generacion_indice = cache.generacion()
+            aplicacion._reescritura_indice = cache.generacion_reescritura()
+            # scraper.py inserta en otro proceso mientras otro hilo refresca
+            insertar_noticias(conn, NOTICIAS[2:])
+            cache.incrementar_generacion()
+            with buscador._refresco_lock:
+                assert aplicacion.indice_al_dia()
+            assert aplicacion._generacion_indice != cache.generacion()
+            assert buscador._indice.buscar("ica") == ([], 0)
+            # La siguiente llamada reintenta
+            assert aplicacion.indice_al_dia()
+            assert aplicacion._generacion_indice == cache.generacion()
+            assert buscador._indice.buscar("ica")[1] == 1
+        finally:
+            db.conectar, buscador._indice, cache_respuestas._cache = originales
+
+
+if __name__ == "__main__":
+    test_tokenizar()
+    test_busqueda_y_filtros()
+    test_incremental_y_resaltado()
+    test_similares_corpus_chico()
+    test_refresco_desde_bd()
+    test_generacion_tras_refresco()
+    print("\n✅ Pruebas completadas")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la cache de validadores HTTP (ETag / Last-Modified)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cache_http import CacheValidadores
+
+
+class RespuestaFalsa:
+    def __init__(self, status_code=200, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+
+def test_validadores_y_hits():
+    """Verifica cabeceras condicionales, 304, cuerpo idéntico y persistencia"""
+    print("🧪 Probando cache de validadores HTTP...")
+    url = "https://rpp.pe/peru"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "validadores.json")
+        cache = CacheValidadores(ruta)
+        assert cache.cabeceras_condicionales(url) == {}
+
+        primera = RespuestaFalsa(200, b"<html>v1</html>", {"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"})
+        cambio, validadores = cache.registrar_respuesta(url, primera)
+        assert cambio is True and validadores["etag"] == '"abc"'
+        # Hasta confirmar (listado guardado) no se envían validadores
+        assert cache.cabeceras_condicionales(url) == {}
+        cache.confirmar(url, validadores)
+        assert cache.cabeceras_condicionales(url) == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT",
+        }
+
+        # 304: sin cambios
+        assert cache.registrar_respuesta(url, RespuestaFalsa(304)) == (False, None)
+        # Servidor sin validadores pero mismo cuerpo: también sin cambios
+        assert cache.registrar_respuesta(url, RespuestaFalsa(200, b"<html>v1</html>")) == (False, None)
+        # Cuerpo distinto: cambió
+        assert cache.registrar_respuesta(url, RespuestaFalsa(200, b"<html>v2</html>"))[0] is True
+
+        assert cache.estadisticas([url])[url] == {"hits": 2, "misses": 2}
+
+        # La cache se recupera desde disco
+        recargada = CacheValidadores(ruta)
+        assert recargada.estadisticas([url])[url] == {"hits": 2, "misses": 2}
+
+
+def test_sin_confirmar_se_repite():
+    """Si el listado no se guardó, la misma página vuelve a contar como cambiada"""
+    print("\n🧪 Probando validadores sin confirmar...")
+    url = "https://rpp.pe/peru"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheValidadores(os.path.join(tmp, "validadores.json"))
+        respuesta = RespuestaFalsa(200, b"<html>v1</html>", {"ETag": '"abc"'})
+        assert cache.registrar_respuesta(url, respuesta)[0] is True
+        # Falló el guardado: no se confirma y la próxima descarga se procesa otra vez
+        cambio, validadores = cache.registrar_respuesta(url, respuesta)
+        assert cambio is True and cache.cabeceras_condicionales(url) == {}
+        cache.confirmar(url, validadores)
+        assert cache.registrar_respuesta(url, respuesta) == (False, None)
+        # Tras un reinicio también
+        assert CacheValidadores(cache.ruta).validadores(url)[0] == '"abc"'
+
+
+if __name__ == "__main__":
+    test_validadores_y_hits()
+    test_sin_confirmar_se_repite()
+    print("\n✅ Pruebas completadas")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la cache de respuestas de la API (LRU + SQLite)
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from cache_respuestas import CacheRespuestas, clave_cache
+
+
+def test_clave_normalizada():
+    """El orden de los parámetros y los vacíos no cambian la clave"""
+    print("🧪 Probando claves de cache...")
+    assert clave_cache("/api/noticias", {"page": "1", "categoria": "nacional", "fuente": ""}) == \
+        clave_cache("/api/noticias", {"categoria": "nacional", "page": "1"}) == \
+        "/api/noticias?categoria=nacional&page=1"
+    assert clave_cache("/api/meta", {}) == "/api/meta"
+
+
+def test_niveles_y_generacion():
+    """Hit en memoria, hit compartido entre procesos e invalidación por generación"""
+    print("\n🧪 Probando niveles de cache y generación...")
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "respuestas.sqlite3")
+        worker_a = CacheRespuestas(ruta, capacidad=2)
+        worker_b = CacheRespuestas(ruta, capacidad=2)
+        clave = "/api/meta"
+
+        assert worker_a.obtener(clave) is None
+        generacion = worker_a.generacion()
+        worker_a.guardar(clave, generacion, 200, b'{"fuentes": []}', "application/json")
+        assert worker_a.obtener(clave) == (200, b'{"fuentes": []}', "application/json")
+        # Otro worker la encuentra en el nivel compartido y luego en su LRU
+        assert worker_b.obtener(clave)[1] == b'{"fuentes": []}'
+        assert worker_b.obtener(clave) is not None
+        assert (worker_b.hits_compartida, worker_b.hits_memoria) == (1, 1)
+
+        # El scraper (otro proceso) inserta noticias: ambas quedan invalidadas
+        CacheRespuestas(ruta).incrementar_generacion()
+        assert worker_a.obtener(clave) is None and worker_b.obtener(clave) is None
+
+        # Una respuesta calculada con la generación anterior no se guarda
+        worker_a.guardar(clave, generacion, 200, b"viejo", "application/json")
+        assert worker_b.obtener(clave) is None
+
+        # LRU acotado
+        generacion = worker_a.generacion()
+        for i in range(3):
+            worker_a.guardar(f"/api/noticias?page={i}", generacion, 200, b"x", "application/json")
+        stats = worker_a.estadisticas()
+        assert stats["entradas_memoria"] == 2 and stats["entradas_compartida"] == 3
+        assert stats["generacion"] == 1 and stats["misses"] == 2
+
+
+if __name__ == "__main__":
+    test_clave_normalizada()
+    test_niveles_y_generacion()
+    print("\n✅ Pruebas completadas")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la clasificación de noticias por tipo
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import db
+import buscador
+import cache_respuestas
+import app as aplicacion
+from clasificador import ClasificadorTipo, clasificar_tipo, clasificar_tipos_lote, reclasificar_todo
+from bd_prueba import ConexionSQLite, crear_tabla_noticias
+
+
+def test_palabras_completas():
+    """'gol' no está en 'golpe' ni 'liga' en 'obligan'; plurales y tildes sí cuentan"""
+    print("🧪 Probando límites de palabra...")
+    casos = {
+        "Golpe de calor en la costa": "informativo",
+        "Obligan a cerrar locales en el centro": "informativo",
+        "Tres goles en el clásico": "deporte",
+        "Liga 1: Alianza gana y lidera": "deporte",
+        "Suben los precios del dolar": "economía",
+        "Caen dos ministros": "política",
+        "Cierran colegios por frío": "educación",
+    }
+    for titulo, esperado in casos.items():
+        assert clasificar_tipo(titulo, None, None, None) == esperado, titulo
+
+
+def test_puntuacion():
+    """Gana el tipo con más puntos; a igualdad, el primero de las reglas"""
+    print("\n🧪 Probando puntuación...")
+    clasificador = ClasificadorTipo()
+    puntos = clasificador.puntuar("Ministro de Salud visita hospital", "Vacuna contra la covid", "nacional", "RPP")
+    assert puntos == {"política": 2, "salud": 2 + 2 + 1 + 1}
+    assert clasificador.clasificar("Ministro de Salud visita hospital", "Vacuna contra la covid") == "salud"
+    # Empate: deporte va antes que política en REGLAS_TIPO
+    assert clasificar_tipo("Presidente asiste al partido", None, None, None) == "deporte"
+    # La categoría y la fuente también puntúan
+    assert clasificar_tipo("Resultados de la fecha", None, "Deportes", "Depor") == "deporte"
+
+
+def test_lote():
+    """El lote equivale a clasificar una por una"""
+    print("\n🧪 Probando lote...")
+    noticias = [
+        {"titulo": "Congreso debate reforma", "resumen": "El golpe de Estado", "categoria": "nacional", "fuente": "RPP"},
+        {"titulo": "", "resumen": None, "categoria": None, "fuente": None},
+        {"titulo": "Detienen a banda de robos", "resumen": "La PNP capturó a tres", "categoria": "nacional", "fuente": "Correo"},
+        {"titulo": "Memes del partido", "resumen": "Humor en redes", "categoria": None, "fuente": None},
+    ]
+    esperados = [clasificar_tipo(n["titulo"], n["resumen"], n["categoria"], n["fuente"]) for n in noticias]
+    assert clasificar_tipos_lote(noticias) == esperados == ["política", "informativo", "policial", "comedia"]
+    assert clasificar_tipos_lote([]) == []
+
+
+def test_reclasificar_todo():
+    """La reclasificación recalcula categoría, departamento y tipo como la ingesta"""
+    print("\n🧪 Probando reclasificación de la tabla...")
+    conn = crear_tabla_noticias()
+    conn.executemany(
+        "INSERT INTO noticias (id, titulo, resumen, categoria, tipo, departamento, fuente) VALUES (?, ?, ?, ?, ?, ?, ?)", [
+            (1, "Lluvias en Cusco", None, "nacional", "informativo", None, "RPP Noticias"),
+            # Guardada como internacional antes de que se detectara Ica
+            (2, "Sismo de magnitud 4.5 en Ica", None, "internacional", "informativo", None, "El Comercio"),
+            (3, "Feria en la ciudad", None, "regional", "informativo", None, "Pachamama Radio"),
+            (4, "Elecciones en Francia", "El Congreso francés", "nacional", "deporte", None, "Perú21"),
+        ])
+    originales = db.conectar, cache_respuestas._cache
+    db.conectar = lambda: ConexionSQLite(conn)
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache_respuestas._cache = cache_respuestas.CacheRespuestas(ruta=os.path.join(carpeta, "r.sqlite3"))
+        generacion = cache_respuestas._cache.generacion()
+        try:
+            assert reclasificar_todo(tam_lote=3)
+            assert cache_respuestas._cache.generacion() > generacion
+        finally:
+            db.conectar, cache_respuestas._cache = originales
+
+    filas = [tuple(f) for f in conn.execute("SELECT id, categoria, departamento, tipo FROM noticias ORDER BY id")]
+    assert filas == [
+        (1, "nacional", "cusco", "informativo"),
+        (2, "nacional", "ica", "informativo"),
+        (3, "regional", "puno", "informativo"),
+        # El tipo se calcula con la categoría nueva, como en la ingesta
+        (4, "nacional", None, clasificar_tipo("Elecciones en Francia", "El Congreso francés", "nacional", "Perú21")),
+    ]
+
+
+def test_reclasificar_actualiza_indice():
+    """Tras reclasificar (otro proceso), el índice de búsqueda filtra con las etiquetas nuevas"""
+    print("\n🧪 Probando el índice de búsqueda tras reclasificar...")
+    conn = crear_tabla_noticias()
+    conn.executemany("INSERT INTO noticias (id, titulo, categoria, tipo, departamento, fuente) VALUES (?, ?, ?, ?, ?, ?)", [
+        (1, "Sismo de magnitud 4.5 en Ica", "internacional", "informativo", None, "El Comercio"),
+        (2, "Sismo en Chile", "internacional", "informativo", None, "El Comercio"),
+    ])
+    originales = db.conectar, cache_respuestas._cache, buscador._indice
+    db.conectar = lambda: ConexionSQLite(conn)
+    buscador._indice = buscador.IndiceBusqueda()
+    aplicacion._generacion_indice = aplicacion._reescritura_indice = None
+    filtrar = lambda: [r["id"] for r in buscador._indice.buscar("sismo", filtros={"departamento": "ica"})[0]]
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache_respuestas._cache = cache_respuestas.CacheRespuestas(ruta=os.path.join(carpeta, "r.sqlite3"))
+        try:
+            assert not aplicacion.indice_al_dia()
+            buscador._calentamiento.join()
+            assert aplicacion.indice_al_dia() and filtrar() == []
+            # clasificador.py corre en otro proceso: solo comparte la cache
+            reescritura = cache_respuestas._cache.generacion_reescritura()
+            assert reclasificar_todo()
+            assert cache_respuestas._cache.generacion_reescritura() == reescritura + 1
+            assert aplicacion.indice_al_dia() and filtrar() == [1]
+            assert aplicacion._reescritura_indice == reescritura + 1
+        finally:
+            db.conectar, cache_respuestas._cache, buscador._indice = originales
+
+
+if __name__ == "__main__":
+    test_palabras_completas()
+    test_puntuacion()
+    test_lote()
+    test_reclasificar_todo()
+    test_reclasificar_actualiza_indice()
+    print("\n✅ Pruebas completadas")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el compilador de consultas de listado
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from mysql.connector import Error
+import consultas
+from consultas import ConsultaNoticias, CampoInvalido, ParametroInvalido, PROYECCIONES, resolver_campos
+from paginacion import CursorInvalido
+from bd_prueba import CursorSQLite, crear_tabla_ejemplo
+
+
+def test_total_en_la_misma_consulta():
+    """Filas y total viajan en una sola consulta y coinciden con un COUNT aparte"""
+    print("🧪 Probando total en la misma consulta...")
+    cursor = CursorSQLite(crear_tabla_ejemplo())
+    consulta = ConsultaNoticias.desde_args({"categoria": "nacional", "limit": "5"})
+    rows, next_cursor, total, estimado = consulta.ejecutar(cursor)
+
+    assert len(cursor.consultas) == 1
+    assert len(rows) == 5 and next_cursor is not None and not estimado
+    assert all("_total" not in r for r in rows)
+    # 20 nacionales menos las 4 de Peru21 (excluida siempre)
+    assert total == 16 == consulta._contar(cursor)
+
+
+def test_fijos_y_busqueda():
+    """Los filtros de la ruta tienen prioridad y q busca en título y resumen"""
+    print("\n🧪 Probando filtros fijos y búsqueda...")
+    cursor = CursorSQLite(crear_tabla_ejemplo())
+    consulta = ConsultaNoticias.desde_args({"departamento": "Lima", "q": "lluvias", "modo": "like"}, fijos={"departamento": "Cusco"})
+    rows, _, total, _ = consulta.ejecutar(cursor)
+    assert total == len(rows) == 3
+    assert all(r["departamento"] == "Cusco" and r["id"] % 12 == 0 for r in rows)
+
+
+def test_conteo_none_y_cursor():
+    """count=none no cuenta; con cursor y count exacto se cuenta aparte"""
+    print("\n🧪 Probando count=none y cursor...")
+    cursor = CursorSQLite(crear_tabla_ejemplo())
+    _, next_cursor, total, _ = ConsultaNoticias.desde_args({"limit": "10"}).ejecutar(cursor)
+
+    cursor.consultas.clear()
+    siguiente = ConsultaNoticias.desde_args({"limit": "10", "page": "2", "cursor": next_cursor, "count": "none"})
+    rows, _, total_none, _ = siguiente.ejecutar(cursor)
+    assert total_none is None and len(rows) == 10
+    assert len(cursor.consultas) == 1 and "COUNT" not in cursor.consultas[0]
+    assert siguiente.paginacion(total_none, None)["total_pages"] is None
+
+    cursor.consultas.clear()
+    exacto = ConsultaNoticias.desde_args({"limit": "10", "page": "2", "cursor": next_cursor})
+    _, _, total_exacto, _ = exacto.ejecutar(cursor)
+    assert total_exacto == total == 36 and len(cursor.consultas) == 2
+
+
+def test_conteo_estimado():
+    """count=estimate usa el plan de EXPLAIN (rows * filtered)"""
+    print("\n🧪 Probando count=estimate...")
+
+    class CursorExplain(CursorSQLite):
+        def execute(self, sql, params=()):
+            if sql.startswith("EXPLAIN"):
+                self.consultas.append(sql)
+                self._filas = [{"rows": 1000, "filtered": 25.0}]
+            else:
+                super().execute(sql, params)
+
+    cursor = CursorExplain(crear_tabla_ejemplo())
+    consulta = ConsultaNoticias.desde_args({"count": "estimate"})
+    _, _, total, estimado = consulta.ejecutar(cursor)
+    assert total == 250 and estimado
+    assert consulta.paginacion(total, None, estimado)["total_estimado"] is True
+
+
+def test_busqueda_fulltext():
+    """q usa MATCH ... AGAINST y ordenar=relevancia pagina por offset"""
+    print("\n🧪 Probando búsqueda FULLTEXT...")
+    consulta = ConsultaNoticias(filtros={"q": "+lluvias -cusco", "categoria": "nacional"},
+                                ordenar="relevancia", modo="booleano")
+    sql, params = consulta.sql_filas()
+    assert "MATCH(titulo, resumen) AGAINST (%s IN BOOLEAN MODE) AS relevancia" in sql
+    assert sql.count("MATCH") == 2 and "ORDER BY relevancia DESC" in sql
+    assert params[0] == "+lluvias -cusco" and params[-2:] == [11, 0]
+
+    # Sin búsqueda, relevancia vuelve al orden por defecto
+    assert ConsultaNoticias(ordenar="relevancia").ordenar == "fecha_desc"
+    try:
+        ConsultaNoticias(filtros={"q": "lluvias"}, ordenar="relevancia", cursor="abc")
+        assert False, "debió fallar"
+    except CursorInvalido:
+        pass
+
+
+def test_respaldo_like_sin_indice():
+    """Sin índice FULLTEXT (error 1191) la búsqueda se repite con LIKE"""
+    print("\n🧪 Probando respaldo LIKE...")
+
+    class CursorSinFulltext(CursorSQLite):
+        def execute(self, sql, params=()):
+            if "MATCH(" in sql:
+                raise Error("Can't find FULLTEXT index matching the column list", errno=1191)
+            super().execute(sql, params)
+
+    cursor = CursorSinFulltext(crear_tabla_ejemplo())
+    try:
+        consulta = ConsultaNoticias.desde_args({"q": "lluvias", "ordenar": "relevancia"})
+        rows, next_cursor, total, _ = consulta.ejecutar(cursor)
+        assert consulta.modo == "like" and consulta.ordenar == "fecha_desc"
+        assert total == 8 and len(rows) == 8 and next_cursor is None
+        # Las siguientes búsquedas ya no intentan FULLTEXT
+        assert ConsultaNoticias(filtros={"q": "x"}).modo == "like"
+    finally:
+        consultas._fulltext_disponible = True
+
+
+def test_lote_por_ids():
+    """El filtro ids (favoritos) se combina con búsqueda, fechas y orden"""
+    print("\n🧪 Probando lote por ids...")
+    cursor = CursorSQLite(crear_tabla_ejemplo())
+    consulta = ConsultaNoticias(filtros={"ids": [4, 8, 12, 13, 20], "q": "lluvias"},
+                                ordenar="titulo_asc", limit=5, conteo="none", modo="like")
+    rows, _, total, _ = consulta.ejecutar(cursor)
+    # 13 no tiene "lluvias" y 20 es de Peru21
+    assert [r["id"] for r in rows] == [12, 4, 8] and total is None
+    assert len(cursor.consultas) == 1
+
+
+def test_proyecciones():
+    """fields= elige columnas; siempre viajan id y las columnas del orden"""
+    print("\n🧪 Probando proyecciones...")
+    assert resolver_campos(None) == PROYECCIONES["card"]
+    assert resolver_campos("completa") == PROYECCIONES["completa"]
+    try:
+        resolver_campos("titulo,link_hash")
+        assert False, "debió fallar"
+    except CampoInvalido:
+        pass
+
+    cursor = CursorSQLite(crear_tabla_ejemplo())
+    consulta = ConsultaNoticias.desde_args({"fields": "titulo", "ordenar": "titulo_asc", "limit": "3"})
+    rows, next_cursor, _, _ = consulta.ejecutar(cursor)
+    assert set(rows[0]) == {"id", "titulo", "fecha_scraping"}
+    assert "JOIN noticias AS n" in cursor.consultas[0]
+    # El cursor sigue funcionando con la proyección reducida
+    siguiente = ConsultaNoticias.desde_args({"fields": "titulo", "ordenar": "titulo_asc", "limit": "3", "cursor": next_cursor})
+    assert siguiente.ejecutar(cursor)[0][0]["titulo"] > rows[-1]["titulo"]
+
+    rows, _, _, _ = ConsultaNoticias.desde_args({"q": "lluvias", "modo": "like", "limit": "1"}).ejecutar(cursor)
+    assert rows[0]["extracto"] == "lluvias en la sierra" and "resumen" not in rows[0]
+
+
+def test_limit_y_page():
+    """limit y page deben ser enteros >= 1: un LIMIT/OFFSET negativo es un error de MySQL"""
+    print("\n🧪 Probando limit y page...")
+    consulta = ConsultaNoticias.desde_args({"limit": "3", "page": "2"})
+    assert (consulta.limit, consulta.page) == (3, 2)
+    for args in ({"limit": "-5"}, {"limit": "0"}, {"page": "0"}, {"page": "x"}):
+        try:
+            ConsultaNoticias.desde_args(args)
+            assert False, f"debió fallar: {args}"
+        except ParametroInvalido:
+            pass
+
+
+if __name__ == "__main__":
+    test_total_en_la_misma_consulta()
+    test_fijos_y_busqueda()
+    test_conteo_none_y_cursor()
+    test_conteo_estimado()
+    test_busqueda_fulltext()
+    test_respaldo_like_sin_indice()
+    test_lote_por_ids()
+    test_proyecciones()
+    test_limit_y_page()
+    print("\n✅ Pruebas completadas")
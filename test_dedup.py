@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para las claves de deduplicación
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dedup import normalizar_titulo, normalizar_link, hash_link, hash_titulo, FiltroEnlacesConocidos
+
+
+def test_claves_hash():
+    """Verifica normalización y ancho fijo de las claves"""
+    print("🧪 Probando claves de deduplicación...")
+
+    assert normalizar_titulo("  Huánuco: ¡Lluvias   afectan a POLÍTICA local! ") == "huanuco lluvias afectan a politica local"
+    assert normalizar_link(" https://rpp.pe/peru/nota-123#comentarios ") == "https://rpp.pe/peru/nota-123"
+
+    assert hash_titulo("Política en Huánuco") == hash_titulo("politica en huanuco.")
+    assert hash_titulo("Política en Huánuco") != hash_titulo("Política en Puno")
+    assert hash_link("https://rpp.pe/a#x") == hash_link("https://rpp.pe/a")
+    assert hash_link("https://rpp.pe/a") != hash_link("https://rpp.pe/b")
+    assert len(hash_link("https://rpp.pe/" + "x" * 900)) == 16
+    assert len(hash_titulo("")) == 16
+
+
+def test_filtro_enlaces():
+    """Verifica capacidad acotada, expulsión FIFO y tasa de omisión"""
+    print("\n🧪 Probando filtro de enlaces conocidos...")
+    filtro = FiltroEnlacesConocidos(capacidad=3)
+    links = [hash_link(f"https://rpp.pe/peru/nota-{i}") for i in range(5)]
+
+    filtro.agregar(links[:3])
+    assert len(filtro) == 3
+    assert filtro.contiene(links[0])
+    assert not filtro.contiene(links[3])
+
+    # Al superar la capacidad sale el más antiguo
+    filtro.agregar(links[3])
+    assert len(filtro) == 3
+    assert not filtro.contiene(links[0])
+    assert filtro.contiene(links[3])
+
+    stats = filtro.estadisticas()
+    assert stats["consultados"] == 4 and stats["omitidos"] == 2
+    assert stats["tasa_omision"] == 0.5
+
+    filtro.reiniciar_estadisticas()
+    assert filtro.estadisticas()["consultados"] == 0
+
+
+if __name__ == "__main__":
+    test_claves_hash()
+    test_filtro_enlaces()
+    print("\n✅ Pruebas completadas")
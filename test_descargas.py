@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el motor de descargas concurrentes
+"""
+
+import sys
+import os
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import descargas
+
+
+def _fuente(url):
+    return {"url": url, "fuente": url}
+
+
+def test_limites_concurrencia():
+    """Verifica el límite global y el límite por dominio"""
+    print("🧪 Probando límites de concurrencia...")
+
+    lock = threading.Lock()
+    activos_total = [0, 0]  # actual, máximo
+    activos_host = {}
+    maximos_host = {}
+
+    def descargar_falso(url, **kwargs):
+        host = descargas.host_de(url)
+        with lock:
+            activos_total[0] += 1
+            activos_total[1] = max(activos_total[1], activos_total[0])
+            activos_host[host] = activos_host.get(host, 0) + 1
+            maximos_host[host] = max(maximos_host.get(host, 0), activos_host[host])
+        time.sleep(0.02)
+        with lock:
+            activos_total[0] -= 1
+            activos_host[host] -= 1
+        return f"<html>{url}</html>", None
+
+    fuentes = [_fuente(f"https://rpp.pe/peru/{i}") for i in range(6)]
+    fuentes += [_fuente(f"https://larepublica.pe/tag/{i}") for i in range(6)]
+    fuentes += [_fuente("https://pachamamaradio.org")]
+
+    original = descargas.descargar
+    descargas.descargar = descargar_falso
+    try:
+        resultados = list(descargas.descargar_fuentes(fuentes, max_descargas=3, max_por_host=2))
+    finally:
+        descargas.descargar = original
+
+    assert len(resultados) == len(fuentes)
+    assert all(error is None for _, _, _, error in resultados)
+    assert activos_total[1] <= 3
+    assert all(maximo <= 2 for maximo in maximos_host.values())
+    print(f"   Máximo simultáneo: {activos_total[1]} | por host: {maximos_host}")
+
+
+def test_errores_no_detienen_ciclo():
+    """Un fallo en una fuente no impide procesar las demás"""
+    print("\n🧪 Probando manejo de errores...")
+
+    def descargar_falso(url, **kwargs):
+        if "falla" in url:
+            raise RuntimeError("timeout")
+        return "<html></html>", None
+
+    fuentes = [_fuente("https://a.pe"), _fuente("https://falla.pe"), _fuente("https://b.pe")]
+    original = descargas.descargar
+    descargas.descargar = descargar_falso
+    try:
+        resultados = {f["url"]: (html, error) for f, html, _, error in descargas.descargar_fuentes(fuentes)}
+    finally:
+        descargas.descargar = original
+
+    assert resultados["https://a.pe"][1] is None
+    assert resultados["https://b.pe"][1] is None
+    assert isinstance(resultados["https://falla.pe"][1], RuntimeError)
+
+
+if __name__ == "__main__":
+    test_limites_concurrencia()
+    test_errores_no_detienen_ciclo()
+    print("\n✅ Pruebas completadas")
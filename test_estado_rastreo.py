@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el estado de rastreo por URL de fuente (crawl_state)
+"""
+
+import sys
+import os
+import sqlite3
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import db
+import scraper
+import estado_rastreo
+from estado_rastreo import EstadoFuente, EstadoRastreo, LINKS_POR_FUENTE
+from dedup import hash_link
+from bd_prueba import ConexionSQLite
+
+FUENTE = {
+    "url": "https://rpp.pe/peru/puno", "fuente": "RPP Noticias", "base": "https://rpp.pe",
+    "container": "article.news", "title_selector": "h2 a", "categoria": "regional",
+}
+AHORA = datetime(2024, 5, 1, 8, 0, 0)
+
+
+def _listado(*numeros):
+    return "".join(f'<article class="news"><h2><a href="/puno/{n}">Noticia {n} en Puno</a></h2></article>'
+                   for n in numeros)
+
+
+def test_estado_fuente():
+    """Links recordados, errores consecutivos y fila de la tabla"""
+    print("🧪 Probando estado de una fuente...")
+    estado = EstadoFuente(FUENTE["url"], FUENTE["fuente"])
+    estado.registrar_error(RuntimeError("timeout"), AHORA)
+    estado.registrar_error(RuntimeError("timeout"), AHORA)
+    assert (estado.errores_consecutivos, estado.errores_total, estado.ultimo_exito) == (2, 2, None)
+
+    estado.registrar_listado([hash_link("a"), hash_link("b")], 2, AHORA)
+    estado.registrar_listado([hash_link("c"), hash_link("a")], 1, AHORA)
+    assert estado.links == [hash_link("c"), hash_link("a"), hash_link("b")]
+    assert estado.conoce(hash_link("b")) and not estado.conoce(hash_link("d"))
+    assert (estado.errores_consecutivos, estado.errores_total, estado.descargas) == (0, 2, 4)
+
+    estado.registrar_listado([hash_link(str(i)) for i in range(LINKS_POR_FUENTE + 10)], 0, AHORA)
+    assert len(estado.links) == LINKS_POR_FUENTE
+
+    # La fila se vuelve a leer igual desde la BD
+    fila = estado.fila()
+    assert fila[0] == hash_link(FUENTE["url"])
+    releido = EstadoFuente(*fila[1:])
+    assert releido.links == estado.links and releido.errores_total == 2
+
+
+def test_decision_por_noticia():
+    """El segundo listado solo extrae y guarda las noticias que no estaban en el primero"""
+    print("\n🧪 Probando decisión incremental por noticia...")
+    guardadas = []
+
+    def guardar_falso(noticias, **kwargs):
+        guardadas.append([n["link"] for n in noticias])
+        return {"insertadas": len(noticias), "duplicadas": 0, "conocidas": 0, "bloqueadas": 0, "errores": 0}
+
+    cargar_original = estado_rastreo.cargar_filas_estado
+    guardar_original = scraper.guardar_noticias_lote
+    estado_rastreo.cargar_filas_estado = lambda urls: []
+    scraper.guardar_noticias_lote = guardar_falso
+    try:
+        rastreo = EstadoRastreo.cargar([FUENTE])
+        scraper.procesar_fuente(FUENTE, _listado(1, 2, 3), rastreo)
+        scraper.procesar_fuente(FUENTE, _listado(4, 1, 2), rastreo)
+        # --full: sin saltar conocidos (la deduplicación queda en guardar_noticias_lote)
+        scraper.procesar_fuente(FUENTE, _listado(4, 1), rastreo, completo=True)
+    finally:
+        estado_rastreo.cargar_filas_estado = cargar_original
+        scraper.guardar_noticias_lote = guardar_original
+
+    assert guardadas == [["https://rpp.pe/puno/1", "https://rpp.pe/puno/2", "https://rpp.pe/puno/3"],
+                         ["https://rpp.pe/puno/4"],
+                         ["https://rpp.pe/puno/4", "https://rpp.pe/puno/1"]]
+    estado = rastreo.obtener(FUENTE)
+    assert estado.conocidas_total == 2 and estado.modificado
+    # Otra URL del mismo medio tiene su propio estado
+    assert not rastreo.obtener(dict(FUENTE, url="https://rpp.pe/peru")).links
+
+
+def test_completo_sin_cache_http():
+    """--full descarga sin GET condicional: un 304 no puede saltarse el backfill"""
+    print("\n🧪 Probando --full sin cache HTTP...")
+    llamadas = []
+
+    def descargar_falso(url, **kwargs):
+        llamadas.append(kwargs)
+        return None, None
+
+    def descargar_fuentes_falso(fuentes, **kwargs):
+        llamadas.append(kwargs)
+        return iter([])
+
+    originales = (estado_rastreo.cargar_filas_estado, estado_rastreo.guardar_filas_estado,
+                  scraper.descargar, scraper.descargar_fuentes)
+    estado_rastreo.cargar_filas_estado = lambda urls: []
+    estado_rastreo.guardar_filas_estado = lambda grupos: True
+    scraper.descargar, scraper.descargar_fuentes = descargar_falso, descargar_fuentes_falso
+    try:
+        scraper.scrape_fuente(FUENTE)
+        scraper.scrape_fuente(FUENTE, completo=True)
+        scraper.scrape_por_categoria("regional", completo=True)
+    finally:
+        (estado_rastreo.cargar_filas_estado, estado_rastreo.guardar_filas_estado,
+         scraper.descargar, scraper.descargar_fuentes) = originales
+
+    assert [k.get("usar_cache") for k in llamadas] == [True, False, False]
+
+
+def test_guardado_parcial():
+    """Dos procesos con el mismo estado: cada uno escribe solo lo suyo y los contadores se suman"""
+    print("\n🧪 Probando guardado parcial de crawl_state...")
+    conn = sqlite3.connect(":memory:")
+    conn.row_factory = sqlite3.Row
+    conn.execute("""CREATE TABLE crawl_state (url_hash BLOB PRIMARY KEY, url TEXT, fuente TEXT,
+                    ultima_descarga TEXT, ultimo_exito TEXT, links_vistos BLOB, nuevas_ultima INTEGER DEFAULT 0,
+                    descargas INTEGER DEFAULT 0, errores_consecutivos INTEGER DEFAULT 0,
+                    errores_total INTEGER DEFAULT 0, ultimo_error TEXT, tasa_nuevas REAL, proxima_descarga TEXT)""")
+    inicial = EstadoFuente(FUENTE["url"], FUENTE["fuente"], descargas=5, errores_total=1,
+                           links_vistos=hash_link("a"), tasa_nuevas=2.0)
+    conn.execute("INSERT INTO crawl_state VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", inicial.fila())
+
+    conectar_original = db.conectar
+    db.conectar = lambda: ConexionSQLite(conn, clave="url_hash")
+    try:
+        app_proceso, scraper_proceso = EstadoRastreo.cargar([FUENTE]), EstadoRastreo.cargar([FUENTE])
+        app_proceso.obtener(FUENTE).registrar_listado([hash_link("b")], 1, AHORA)
+        scraper_proceso.obtener(FUENTE).registrar_error(RuntimeError("timeout"), AHORA)
+        # Una URL sin fila previa se inserta con sus valores
+        nueva = dict(FUENTE, url="https://rpp.pe/peru")
+        scraper_proceso.obtener(nueva).registrar_sin_cambios(AHORA)
+        assert app_proceso.guardar() and scraper_proceso.guardar()
+        assert not app_proceso.obtener(FUENTE).modificado
+    finally:
+        db.conectar = conectar_original
+
+    fila = dict(conn.execute("SELECT * FROM crawl_state WHERE url = ?", (FUENTE["url"],)).fetchone())
+    assert (fila["descargas"], fila["errores_total"], fila["errores_consecutivos"]) == (7, 2, 1)
+    # links_vistos y tasa_nuevas no los tocó el proceso que falló
+    assert fila["links_vistos"] == hash_link("b") + hash_link("a") and fila["tasa_nuevas"] == 2.0
+    assert fila["ultimo_error"] == "timeout"
+    fila = dict(conn.execute("SELECT * FROM crawl_state WHERE url = ?", ("https://rpp.pe/peru",)).fetchone())
+    assert (fila["fuente"], fila["descargas"], fila["errores_total"]) == ("RPP Noticias", 1, 0)
+
+
+if __name__ == "__main__":
+    test_estado_fuente()
+    test_decision_por_noticia()
+    test_completo_sin_cache_http()
+    test_guardado_parcial()
+    print("\n✅ Pruebas completadas")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la exportación en streaming (NDJSON / CSV / gzip)
+"""
+
+import sys
+import os
+import csv
+import gzip
+import json
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import exportacion
+from exportacion import Exportacion, serializar, codificar
+from bd_prueba import ConexionSQLite, crear_tabla_noticias, insertar_noticias
+
+
+def _conexion(n=25):
+    conn = crear_tabla_noticias()
+    insertar_noticias(conn, [dict(zip(("id", "titulo", "resumen", "categoria", "fuente", "fecha"), f)) for f in _filas(n)])
+    return ConexionSQLite(conn)
+
+
+def _filas(n=25):
+    return [(i, f"Noticia {i}, \"con comillas\"", "resumen", "regional" if i % 2 else "nacional",
+             "Peru21" if i % 10 == 0 else "RPP", f"2024-05-{i % 28 + 1:02d}") for i in range(1, n + 1)]
+
+
+def test_serializar():
+    """NDJSON una línea por fila y CSV con cabecera; las fechas salen como texto"""
+    print("🧪 Probando serialización...")
+    filas = [{"id": 1, "titulo": "Año, \"nuevo\"", "fecha_scraping": datetime(2024, 5, 1, 10, 0, 0)}]
+    campos = ("id", "titulo", "fecha_scraping")
+
+    ndjson = "".join(serializar(filas, campos, "ndjson"))
+    assert json.loads(ndjson) == {"id": 1, "titulo": "Año, \"nuevo\"", "fecha_scraping": "2024-05-01 10:00:00"}
+
+    lineas = list(csv.reader("".join(serializar(filas, campos, "csv")).splitlines()))
+    assert lineas == [list(campos), ["1", "Año, \"nuevo\"", "2024-05-01 10:00:00"]]
+
+
+def test_gzip_al_vuelo():
+    """La salida comprimida es un gzip válido con el mismo contenido"""
+    print("\n🧪 Probando gzip al vuelo...")
+    trozos = ["línea %d\n" % i for i in range(1000)]
+    comprimido = b"".join(codificar(iter(trozos), comprimir=True))
+    assert gzip.decompress(comprimido).decode("utf-8") == "".join(trozos)
+
+
+def test_exportacion_en_lotes():
+    """Filtros de ConsultaNoticias, orden por id, lotes de fetchmany y cierre de la conexión"""
+    print("\n🧪 Probando exportación completa...")
+    conexion = _conexion()
+    original_connect, original_lote = exportacion.mysql.connector.connect, exportacion.TAM_LOTE
+    exportacion.mysql.connector.connect = lambda **kwargs: conexion
+    exportacion.TAM_LOTE = 4
+    try:
+        export = Exportacion({"categoria": "nacional"}, "titulo,fecha", "ndjson")
+        assert export.abrir()
+        filas = [json.loads(l) for l in b"".join(export).decode("utf-8").splitlines()]
+        # 12 nacionales menos las 2 de Peru21 (excluida siempre)
+        assert [f["id"] for f in filas] == [2, 4, 6, 8, 12, 14, 16, 18, 22, 24]
+        assert set(filas[0]) == {"id", "titulo", "fecha"}
+        assert conexion.cursores[-1].lotes == 4 and not conexion.abierta
+
+        export = Exportacion(None, None, "csv", comprimir=True)
+        assert export.nombre_archivo == "noticias.csv.gz" and export.mimetype == "application/gzip"
+        conexion.abierta = True
+        assert export.abrir()
+        lineas = list(csv.reader(gzip.decompress(b"".join(export)).decode("utf-8").splitlines()))
+        assert lineas[0][0] == "id" and len(lineas) == 1 + 23
+    finally:
+        exportacion.mysql.connector.connect = original_connect
+        exportacion.TAM_LOTE = original_lote
+
+
+def test_conexion_se_cierra_sin_terminar():
+    """La conexión se abre dentro del generador y se cierra aunque no se itere o se corte a medias"""
+    print("\n🧪 Probando cierre de la conexión...")
+    conexiones = []
+
+    def conectar(**kwargs):
+        conexiones.append(_conexion())
+        return conexiones[-1]
+
+    original_connect, original_trozo = exportacion.mysql.connector.connect, exportacion.TAM_TROZO
+    exportacion.mysql.connector.connect = conectar
+    exportacion.TAM_TROZO = 10
+    try:
+        export = Exportacion(None, "titulo", "ndjson")
+        assert not conexiones  # crear la exportación no abre nada
+        # Respuesta que nunca se envía: abrir() dejó la conexión abierta hasta cerrar()
+        assert export.abrir() and conexiones[-1].abierta
+        export.cerrar()
+        assert not conexiones[-1].abierta
+
+        # Cliente que se desconecta tras el primer trozo
+        export = Exportacion(None, "titulo", "ndjson")
+        assert export.abrir()
+        trozos = iter(export)
+        assert json.loads(next(trozos))["id"] == 1
+        assert conexiones[-1].abierta
+        export.cerrar()
+        assert not conexiones[-1].abierta and len(conexiones) == 2
+
+        # Sin abrir(): la conexión se abre al iterar
+        export = Exportacion(None, "titulo", "ndjson")
+        assert len(b"".join(export).splitlines()) == 23 and not conexiones[-1].abierta
+    finally:
+        exportacion.mysql.connector.connect = original_connect
+        exportacion.TAM_TROZO = original_trozo
+
+
+def test_error_al_abrir():
+    """Si la BD no responde, abrir() devuelve False sin dejar nada abierto"""
+    print("\n🧪 Probando error al abrir...")
+
+    def conectar(**kwargs):
+        raise exportacion.Error("sin conexión")
+
+    original_connect = exportacion.mysql.connector.connect
+    exportacion.mysql.connector.connect = conectar
+    try:
+        export = Exportacion(None, None, "csv")
+        assert not export.abrir()
+        assert export._conn is None and export._generador is None
+    finally:
+        exportacion.mysql.connector.connect = original_connect
+
+
+if __name__ == "__main__":
+    test_serializar()
+    test_gzip_al_vuelo()
+    test_exportacion_en_lotes()
+    test_conexion_se_cierra_sin_terminar()
+    test_error_al_abrir()
+    print("\n✅ Pruebas completadas")
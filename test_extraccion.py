@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la extracción incremental de noticias con parada temprana
+"""
+
+import sys
+import os
+import tracemalloc
+from datetime import date
+from dataclasses import FrozenInstanceError
+from bs4 import BeautifulSoup
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from extraccion import Extraccion, plan_de, parsear, _planes
+from sources import FUENTES
+from dedup import hash_link
+
+FUENTE = {
+    "url": "https://larepublica.pe/tag/puno", "fuente": "La República", "base": "https://larepublica.pe",
+    "container": "div.story-item", "title_selector": "h2 a", "img_selector": "img::attr(data-lazy)",
+    "summary_selector": "p.resumen", "author_selector": None, "date_selector": "time",
+    "category_selector": None, "categoria": "regional",
+}
+
+
+def _pagina(*numeros):
+    return BeautifulSoup("".join(
+        f'<div class="story-item"><h2><a href="/puno/{n}">Noticia {n}</a></h2>'
+        f'<img data-lazy="/img/{n}.jpg"><p class="resumen">Resumen {n}</p><time>0{n % 9 + 1}/05/2024</time></div>'
+        for n in numeros), "html.parser")
+
+
+def _conocidos(*numeros):
+    hashes = {hash_link(f"https://larepublica.pe/puno/{n}") for n in numeros}
+    return lambda link_hash: link_hash in hashes
+
+
+def test_extraccion_completa():
+    """Sin función de conocidos se extraen todos los datos de todas las noticias"""
+    print("🧪 Probando extracción completa...")
+    extraccion = Extraccion(FUENTE, _pagina(1, 2, 3))
+    noticias = list(extraccion)
+    assert [n["link"] for n in noticias] == [f"https://larepublica.pe/puno/{n}" for n in (1, 2, 3)]
+    assert noticias[0] == {
+        "titulo": "Noticia 1", "link": "https://larepublica.pe/puno/1", "categoria": "regional",
+        "fecha": date(2024, 5, 2), "resumen": "Resumen 1", "autor": None,
+        "imagen": "https://larepublica.pe/img/1.jpg", "fuente": "La República",
+    }
+    assert len(extraccion.link_hashes) == 3 and extraccion.conocidas == extraccion.omitidas == 0
+
+
+def test_parada_temprana():
+    """Se detiene tras K links conocidos seguidos; los conocidos sueltos solo se saltan"""
+    print("\n🧪 Probando parada temprana...")
+    # 10 y 9 nuevas; 8 conocida suelta; 7 nueva; de 6 en adelante ya guardadas
+    extraccion = Extraccion(FUENTE, _pagina(10, 9, 8, 7, 6, 5, 4, 3, 2, 1), _conocidos(8, 6, 5, 4, 3, 2, 1), parada=3)
+    assert [n["titulo"] for n in extraccion] == ["Noticia 10", "Noticia 9", "Noticia 7"]
+    assert extraccion.conocidas == 4 and extraccion.omitidas == 3
+    assert len(extraccion.link_hashes) == 7
+
+    # Con parada=0 se recorre toda la página aunque todo sea conocido
+    extraccion = Extraccion(FUENTE, _pagina(3, 2, 1), _conocidos(3, 2, 1), parada=0)
+    assert list(extraccion) == [] and extraccion.conocidas == 3 and extraccion.omitidas == 0
+
+
+def test_generador_perezoso():
+    """Los datos de cada noticia se extraen solo al pedirla"""
+    print("\n🧪 Probando generador...")
+    extraccion = iter(Extraccion(FUENTE, _pagina(3, 2, 1)))
+    assert next(extraccion)["titulo"] == "Noticia 3"
+    assert next(extraccion)["titulo"] == "Noticia 2"
+
+
+def test_planes_compilados():
+    """Cada configuración de fuente se compila una vez en un plan inmutable"""
+    print("\n🧪 Probando planes de extracción...")
+    compilados = len(_planes)
+    assert plan_de(FUENTES[0]) is plan_de(dict(FUENTES[0]))
+    assert len(_planes) == compilados
+
+    plan = plan_de(FUENTE)
+    assert plan.atributos_imagen[-1] == "data-lazy" and plan.unir("/x") == "https://larepublica.pe/x"
+    assert plan_de(dict(FUENTE, img_selector="img")).atributos_imagen[-1] != "data-lazy"
+    try:
+        plan.fuente = "otra"
+        assert False, "el plan debería ser inmutable"
+    except FrozenInstanceError:
+        pass
+
+
+def test_parseo_solo_contenedores():
+    """El parseo parcial extrae lo mismo con menos memoria; selectores complejos parsean todo"""
+    print("\n🧪 Probando parseo por contenedores...")
+    ruido = "<script>" + "var x = 1;" * 2000 + "</script><nav>" + '<a href="/s">Sección</a>' * 300 + "</nav>"
+    html = f'<html><head>{ruido}</head><body>{str(_pagina(3, 2, 1)).replace("story-item", "story-item destacado", 1)}{ruido}</body></html>'
+
+    completo = dict(FUENTE, parseo_parcial=False)
+    soup, parseo = parsear(FUENTE, html, medir_memoria=True)
+    soup_completo, parseo_completo = parsear(completo, html, medir_memoria=True)
+    assert parseo["parcial"] and not parseo_completo["parcial"] and parseo["parser"] == "html.parser"
+    assert list(Extraccion(FUENTE, soup)) == list(Extraccion(completo, soup_completo))
+    assert len(list(Extraccion(FUENTE, soup))) == 3
+    assert parseo["memoria"] < parseo_completo["memoria"] / 5
+    assert parseo["segundos"] > 0 and parseo["pico"] >= parseo["memoria"]
+    # Sin medir memoria no se toca tracemalloc
+    _, parseo = parsear(FUENTE, html, medir_memoria=False)
+    assert parseo["segundos"] > 0 and parseo["pico"] is None and not tracemalloc.is_tracing()
+
+    assert plan_de(dict(FUENTE, container="section div.story-item")).colador is None
+    assert plan_de(dict(FUENTE, container=None, selector="a")).colador is None
+    # Parser no instalado o desconocido: html.parser
+    assert plan_de(dict(FUENTE, parser="no-existe")).parser == "html.parser"
+
+
+if __name__ == "__main__":
+    test_extraccion_completa()
+    test_parada_temprana()
+    test_generador_perezoso()
+    test_planes_compilados()
+    test_parseo_solo_contenedores()
+    print("\n✅ Pruebas completadas")
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el guardado por lotes de noticias (guardar_noticias_lote)
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import db
+from dedup import FiltroEnlacesConocidos, hash_link, hash_titulo
+from bd_prueba import ConexionSQLite, crear_tabla_noticias, insertar_noticias
+
+
+def _noticia(titulo, link, fuente="RPP Noticias"):
+    return {"titulo": titulo, "link": link, "categoria": "regional", "fecha": "2024-05-01", "fuente": fuente}
+
+
+def _con_bd(conn, funcion):
+    conectar_original, filtro_original = db.conectar, db._filtro_enlaces
+    db.conectar = lambda: ConexionSQLite(conn)
+    db._filtro_enlaces = FiltroEnlacesConocidos()
+    db._filtro_enlaces.calentado = True
+    try:
+        return funcion()
+    finally:
+        db.conectar, db._filtro_enlaces = conectar_original, filtro_original
+
+
+def test_contadores_lote():
+    """Insertadas, duplicadas (por título y por link), conocidas en memoria y bloqueadas"""
+    print("🧪 Probando contadores del guardado por lotes...")
+    conn = crear_tabla_noticias()
+
+    def guardar():
+        primera = db.guardar_noticias_lote([
+            _noticia("Lluvias en Puno", "https://rpp.pe/puno/1"),
+            _noticia("Paro en Cusco", "https://rpp.pe/cusco/2"),
+            # Mismo título normalizado dentro del lote
+            _noticia("lluvias en puno.", "https://rpp.pe/puno/otra"),
+            _noticia("Otra nota", "https://peru21.pe/x", fuente="Perú21"),
+        ])
+        segunda = db.guardar_noticias_lote([
+            # Ya vista en este proceso: la descarta el filtro sin consultar la BD
+            _noticia("Lluvias en Puno", "https://rpp.pe/puno/1"),
+            # Título ya guardado con otro link
+            _noticia("Paro en Cusco", "https://larepublica.pe/cusco/9"),
+            _noticia("Heladas en Pasco", "https://rpp.pe/pasco/3"),
+        ])
+        return primera, segunda, db._filtro_enlaces
+
+    primera, segunda, filtro = _con_bd(conn, guardar)
+    assert primera == {"insertadas": 2, "duplicadas": 1, "conocidas": 0, "bloqueadas": 1, "errores": 0}
+    assert segunda == {"insertadas": 1, "duplicadas": 2, "conocidas": 1, "bloqueadas": 0, "errores": 0}
+    assert conn.execute("SELECT COUNT(*) FROM noticias").fetchone()[0] == 3
+
+    # Al filtro solo llegan links guardados, no los descartados por título
+    assert filtro.contiene(hash_link("https://rpp.pe/pasco/3"))
+    assert not filtro.contiene(hash_link("https://larepublica.pe/cusco/9"))
+    assert not filtro.contiene(hash_link("https://rpp.pe/puno/otra"))
+
+
+def test_link_existente_sin_filtro():
+    """Un link ya guardado por otro proceso no se inserta dos veces y cuenta como duplicado"""
+    print("\n🧪 Probando duplicados por link_hash...")
+    conn = crear_tabla_noticias()
+
+    def guardar():
+        db.guardar_noticias_lote([_noticia("Lluvias en Puno", "https://rpp.pe/puno/1")], usar_filtro=False)
+        return db.guardar_noticias_lote([_noticia("Lluvias en Puno (actualizada)", "https://rpp.pe/puno/1#top")],
+                                        usar_filtro=False)
+
+    resultado = _con_bd(conn, guardar)
+    assert resultado == {"insertadas": 0, "duplicadas": 1, "conocidas": 0, "bloqueadas": 0, "errores": 0}
+
+
+def test_errores_de_conexion():
+    """Sin conexión, cada candidata cuenta como error"""
+    print("\n🧪 Probando errores de conexión...")
+    conectar_original = db.conectar
+    db.conectar = lambda: None
+    try:
+        resultado = db.guardar_noticias_lote([_noticia("Lluvias en Puno", "https://rpp.pe/puno/1")], usar_filtro=False)
+    finally:
+        db.conectar = conectar_original
+    assert resultado["errores"] == 1 and resultado["insertadas"] == 0
+
+
+def test_oyentes_tras_cerrar_conexion():
+    """Los oyentes se llaman con las filas nuevas y con la conexión del lote ya devuelta al pool"""
+    print("\n🧪 Probando oyentes de ingesta con la conexión cerrada...")
+    conn = crear_tabla_noticias()
+    conexiones, avisos = [], []
+
+    def conectar():
+        conexiones.append(ConexionSQLite(conn))
+        return conexiones[-1]
+
+    def oyente(noticias):
+        avisos.append(([n["titulo"] for n in noticias], [c.abierta for c in conexiones]))
+
+    originales = db.conectar, db._oyentes_ingesta
+    db.conectar, db._oyentes_ingesta = conectar, [oyente]
+    try:
+        db.guardar_noticias_lote([_noticia("Lluvias en Puno", "https://rpp.pe/puno/1")], usar_filtro=False)
+    finally:
+        db.conectar, db._oyentes_ingesta = originales
+    assert avisos == [(["Lluvias en Puno"], [False])]
+
+
+def test_titulo_guardado_por_otro_proceso():
+    """Un título que otro proceso guarda entre la consulta y el INSERT lo frena la clave única"""
+    print("\n🧪 Probando la carrera por titulo_hash...")
+    conn = crear_tabla_noticias()
+
+    class ConexionConCarrera(ConexionSQLite):
+        def cursor(self, dictionary=False, buffered=None):
+            cursor = super().cursor(dictionary, buffered)
+            execute = cursor.execute
+
+            def execute_y_guardar_otro(sql, params=()):
+                execute(sql, params)
+                if "SELECT titulo_hash" in sql:
+                    # Otro proceso guarda el mismo título con otro link
+                    insertar_noticias(conn, [{"titulo": "Lluvias en Puno", "link": "https://larepublica.pe/puno/7",
+                                              "link_hash": hash_link("https://larepublica.pe/puno/7"),
+                                              "titulo_hash": hash_titulo("Lluvias en Puno")}])
+            cursor.execute = execute_y_guardar_otro
+            return cursor
+
+    conectar_original = db.conectar
+    db.conectar = lambda: ConexionConCarrera(conn)
+    try:
+        resultado = db.guardar_noticias_lote([_noticia("Lluvias en Puno", "https://rpp.pe/puno/1")], usar_filtro=False)
+    finally:
+        db.conectar = conectar_original
+    assert resultado == {"insertadas": 0, "duplicadas": 1, "conocidas": 0, "bloqueadas": 0, "errores": 0}
+    assert [r[0] for r in conn.execute("SELECT link FROM noticias")] == ["https://larepublica.pe/puno/7"]
+
+
+if __name__ == "__main__":
+    test_contadores_lote()
+    test_link_existente_sin_filtro()
+    test_errores_de_conexion()
+    test_oyentes_tras_cerrar_conexion()
+    test_titulo_guardado_por_otro_proceso()
+    print("\n✅ Pruebas completadas")
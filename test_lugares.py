@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la detección de departamentos, provincias y ciudades
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from lugares import PROVINCIAS
+from sources import detectar_departamento_en_texto, detectar_departamentos_en_lote, detectar_lugares, clasificar_noticia
+
+
+def test_limites_de_palabra():
+    """'ica' dentro de 'política' o 'república' no es Ica"""
+    print("🧪 Probando límites de palabra...")
+    casos = {
+        "La política económica de la república": None,
+        "Sismo de magnitud 4.5 en Ica": "ica",
+        "Debate sobre la libertad de expresión": None,
+        "Trujillo, La Libertad: inauguran hospital": "la-libertad",
+        "Homenaje a José de San Martín en Lima": "lima",
+        "Huánuco y HUANUCO": "huanuco",
+        "Hallan moho en la sandía": None,
+        "San Martín de Porres gana el clásico distrital": "lima",
+        "Manu Chao en concierto": None,
+        "Turismo en la provincia de Manu": "madre-de-dios",
+    }
+    for texto, esperado in casos.items():
+        assert detectar_departamento_en_texto(texto) == esperado, texto
+
+
+def test_provincias_y_ciudades():
+    """Provincias y ciudades se atribuyen a su departamento, con posiciones"""
+    print("\n🧪 Probando provincias, ciudades y posiciones...")
+    assert sum(len(p) for p in PROVINCIAS.values()) == 196
+
+    texto = "Lluvias en Quispicanchi y Juliaca; la provincia de Santa en alerta"
+    lugares = detectar_lugares(texto)
+    assert [(l["departamento"], l["provincia"]) for l in lugares] == [
+        ("cusco", "Quispicanchi"), ("puno", "San Román"), ("ancash", "Santa")]
+    assert all(texto[l["inicio"]:l["fin"]] == l["lugar"] for l in lugares)
+    assert lugares[2]["lugar"] == "provincia de Santa"
+    # Santa sola no es una provincia
+    assert detectar_lugares("Santa Rosa de Lima") == [detectar_lugares("Lima")[0] | {"inicio": 14, "fin": 18}]
+
+
+def test_lote_y_mas_mencionado():
+    """El lote equivale a textos sueltos y gana el departamento más mencionado"""
+    print("\n🧪 Probando lote...")
+    textos = ["Alcalde de Lima viaja a Puno; en Puno se reúne con el gobernador",
+              "", None, "Paro en Cañete", "Turistas llegan a Machu Picchu"]
+    assert detectar_departamentos_en_lote(textos) == [detectar_departamento_en_texto(t) for t in textos]
+    assert detectar_departamentos_en_lote(textos) == ["puno", None, None, "lima", "cusco"]
+
+    clasificacion = clasificar_noticia("Protesta en la república", "Reclamos en la plaza", "nacional")
+    assert clasificacion == {"categoria": "nacional", "departamento": None}
+    clasificacion = clasificar_noticia("Trujillo y La Libertad", None, "nacional")
+    assert clasificacion == {"categoria": "nacional", "departamento": "la-libertad"}
+
+
+def test_clasificar_respeta_mayusculas():
+    """clasificar_noticia pasa el texto sin lower(): "La Libertad" sola se detecta"""
+    print("\n🧪 Probando mayúsculas en clasificar_noticia...")
+    clasificacion = clasificar_noticia("Lluvias intensas en La Libertad", "Se reportan daños", "nacional")
+    assert clasificacion == {"categoria": "nacional", "departamento": "la-libertad"}
+    clasificacion = clasificar_noticia("Lluvias intensas en la libertad", None, "nacional")
+    assert clasificacion["departamento"] is None
+
+
+if __name__ == "__main__":
+    test_limites_de_palabra()
+    test_provincias_y_ciudades()
+    test_lote_y_mas_mencionado()
+    test_clasificar_respeta_mayusculas()
+    print("\n✅ Pruebas completadas")
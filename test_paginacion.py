@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la paginación por cursor (keyset)
+"""
+
+import sys
+import os
+import random
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from bd_prueba import crear_tabla_noticias, insertar_noticias
+from paginacion import (
+    ORDENES, CursorInvalido, clausula_orden, codificar_cursor, decodificar_cursor, condicion_keyset
+)
+
+
+def _crear_tabla():
+    # SQLite ordena NULL igual que MySQL (primero en ASC, último en DESC)
+    conn = crear_tabla_noticias()
+    rnd = random.Random(7)
+    for i in range(1, 121):
+        fecha = None if i % 11 == 0 else f"2024-05-{rnd.randint(1, 5):02d}"
+        fecha_scraping = f"2024-05-05 {rnd.randint(8, 10):02d}:00:00"
+        insertar_noticias(conn, [{"id": i, "titulo": f"Titulo {rnd.randint(1, 15)}", "fecha": fecha,
+                                  "fecha_scraping": fecha_scraping}])
+    return conn
+
+
+def test_keyset_recorre_todo_sin_repetir():
+    """Recorrer por cursor da exactamente el mismo orden que un ORDER BY completo"""
+    print("🧪 Probando paginación keyset en todos los órdenes...")
+    conn = _crear_tabla()
+    for ordenar in ORDENES:
+        orden = clausula_orden(ordenar)
+        esperado = [r["id"] for r in conn.execute(f"SELECT id FROM noticias {orden}")]
+
+        vistos = []
+        cursor = None
+        while True:
+            sql, params = "SELECT * FROM noticias WHERE 1=1", []
+            if cursor:
+                condicion, extra = condicion_keyset(ordenar, decodificar_cursor(cursor, ordenar))
+                sql += f" AND {condicion}"
+                params += extra
+            sql = f"{sql} {orden} LIMIT 8".replace("%s", "?")
+            filas = [dict(r) for r in conn.execute(sql, params)]
+            if not filas:
+                break
+            vistos += [f["id"] for f in filas]
+            cursor = codificar_cursor(ordenar, filas[-1])
+
+        assert vistos == esperado, ordenar
+        print(f"   {ordenar}: {len(vistos)} filas OK")
+
+
+def test_cursor_invalido():
+    """Un cursor corrupto o de otro orden se rechaza"""
+    print("\n🧪 Probando cursores inválidos...")
+    cursor = codificar_cursor("fecha_desc", {"fecha_scraping": "2024-05-05 10:00:00", "fecha": "2024-05-05", "id": 3})
+    assert decodificar_cursor(cursor, "fecha_desc") == ["2024-05-05 10:00:00", "2024-05-05", 3]
+    for malo, ordenar in ((cursor, "titulo_asc"), ("%%%", "fecha_desc"), ("bm8tanNvbg", "fecha_desc")):
+        try:
+            decodificar_cursor(malo, ordenar)
+            assert False, "debió fallar"
+        except CursorInvalido:
+            pass
+
+
+if __name__ == "__main__":
+    test_keyset_recorre_todo_sin_repetir()
+    test_cursor_invalido()
+    print("\n✅ Pruebas completadas")
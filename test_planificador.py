@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para el planificador adaptativo del scraping automático
+"""
+
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from estado_rastreo import EstadoRastreo, EstadoFuente
+from planificador import (Planificador, espera_por_errores, intervalo_por_tasa,
+                          INTERVALO_MIN, INTERVALO_MAX)
+
+INICIO = datetime(2024, 5, 1, 0, 0, 0)
+PORTADA = {"url": "https://rpp.pe/peru", "fuente": "RPP Noticias"}
+REGIONAL = {"url": "https://pachamamaradio.org", "fuente": "Pachamama Radio"}
+CAIDA = {"url": "https://caida.pe", "fuente": "Caída"}
+
+
+def test_intervalos_y_espera():
+    """El intervalo sigue la tasa dentro de los límites; los errores esperan exponencialmente"""
+    print("🧪 Probando intervalos y espera por errores...")
+    assert intervalo_por_tasa(60) == INTERVALO_MIN
+    assert intervalo_por_tasa(6) == timedelta(minutes=30)
+    assert intervalo_por_tasa(0.01) == intervalo_por_tasa(0) == INTERVALO_MAX
+
+    rnd = random.Random(1)
+    esperas = [espera_por_errores(n, rnd) for n in range(1, 12)]
+    assert all(INTERVALO_MIN / 2 <= e <= INTERVALO_MAX for e in esperas)
+    assert esperas[4] > esperas[0] and esperas[-1] >= INTERVALO_MAX / 2
+
+
+def test_simulacion_un_dia():
+    """Portadas activas cada pocos minutos, páginas tranquilas cada pocas horas, fuente caída con backoff"""
+    print("\n🧪 Simulando un día de scraping...")
+    # Noticias publicadas por hora: 4 portadas nacionales y 15 páginas regionales o por tag, como en FUENTES
+    tasas = {f"https://portada{i}.pe": 8 for i in range(4)}
+    tasas.update({f"https://regional{i}.pe": 0.5 for i in range(15)})
+    fuentes = [{"url": url, "fuente": url} for url in tasas] + [CAIDA]
+    rastreo = EstadoRastreo()
+    planificador = Planificador(fuentes, rastreo, rnd=random.Random(7), ahora=INICIO)
+    pendientes = {url: 0.0 for url in tasas}
+    ultima = {url: INICIO for url in tasas}
+    descargas = {f["url"]: 0 for f in fuentes}
+
+    ahora = INICIO
+    while ahora < INICIO + timedelta(days=1):
+        for fuente in planificador.vencidas(ahora):
+            url = fuente["url"]
+            descargas[url] += 1
+            estado = rastreo.obtener(fuente)
+            if fuente is CAIDA:
+                estado.registrar_error(RuntimeError("timeout"), ahora)
+            else:
+                pendientes[url] += tasas[url] * (ahora - ultima[url]).total_seconds() / 3600
+                nuevas = int(pendientes[url])
+                pendientes[url] -= nuevas
+                ultima[url] = ahora
+                estado.registrar_listado([], nuevas, ahora)
+            planificador.reprogramar(fuente, ahora)
+        ahora += timedelta(seconds=max(60, planificador.espera(ahora)))
+
+    total = sum(descargas.values())
+    print(f"   Descargas en 24 h: {total} (antes {24 * len(fuentes)}); portada: {descargas['https://portada0.pe']}, "
+          f"regional: {descargas['https://regional0.pe']}, caída: {descargas[CAIDA['url']]}")
+    # Con el ciclo fijo de 3600 s cada fuente se descargaba 24 veces al día
+    assert total < 24 * len(fuentes)
+    assert all(descargas[f"https://portada{i}.pe"] >= 48 for i in range(4))
+    assert all(descargas[f"https://regional{i}.pe"] < 24 for i in range(15))
+    assert descargas[CAIDA["url"]] < 24
+    assert rastreo.obtener(CAIDA).errores_consecutivos == descargas[CAIDA["url"]]
+    # Una noticia de portada se recoge en menos de media hora
+    assert rastreo.obtener(fuentes[0]).proxima_descarga - ahora <= timedelta(minutes=30)
+
+
+def test_reanuda_desde_estado():
+    """La próxima descarga guardada en crawl_state ordena la cola al arrancar"""
+    print("\n🧪 Probando reanudación desde crawl_state...")
+    rastreo = EstadoRastreo([
+        EstadoFuente(PORTADA["url"], proxima_descarga=INICIO + timedelta(minutes=3)),
+        EstadoFuente(REGIONAL["url"], proxima_descarga=INICIO + timedelta(days=30)),
+        EstadoFuente(CAIDA["url"], proxima_descarga=INICIO - timedelta(hours=1)),
+    ])
+    planificador = Planificador([PORTADA, REGIONAL, CAIDA], rastreo, ahora=INICIO)
+    assert planificador.vencidas(INICIO) == [CAIDA]
+    assert planificador.espera(INICIO) == 180
+    assert planificador.vencidas(INICIO + INTERVALO_MAX) == [PORTADA, REGIONAL]
+    assert len(planificador) == 0
+
+
+if __name__ == "__main__":
+    test_intervalos_y_espera()
+    test_simulacion_un_dia()
+    test_reanuda_desde_estado()
+    print("\n✅ Pruebas completadas")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para la devolución de conexiones al pool desde las rutas de la API
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import app as aplicacion
+import cache_respuestas
+from bd_prueba import ConexionSQLite, crear_tabla_ejemplo
+
+
+class PoolFalso:
+    """Pool de tamaño fijo: close() devuelve la conexión; agotado, entrega None"""
+
+    def __init__(self, conn, tamano=1):
+        pool = self
+        self.prestadas = 0
+
+        class ConexionDelPool(ConexionSQLite):
+            def close(self):
+                super().close()
+                pool.prestadas -= 1
+                pool.libres.append(self)
+
+        self.libres = [ConexionDelPool(conn) for _ in range(tamano)]
+
+    def sacar(self):
+        if not self.libres:
+            return None
+        self.prestadas += 1
+        conexion = self.libres.pop()
+        conexion.abierta = True
+        return conexion
+
+
+def _con_pool(conn, funcion):
+    pool = PoolFalso(conn)
+    originales = aplicacion.get_connection, cache_respuestas._cache
+    aplicacion.get_connection = pool.sacar
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache_respuestas._cache = cache_respuestas.CacheRespuestas(ruta=os.path.join(carpeta, "r.sqlite3"))
+        try:
+            return pool, funcion(aplicacion.app.test_client())
+        finally:
+            aplicacion.get_connection, cache_respuestas._cache = originales
+
+
+def test_consulta_fallida_devuelve_conexion():
+    """Una consulta que falla responde 500 y su conexión vuelve al pool"""
+    print("🧪 Probando devolución de la conexión tras un error...")
+    # Sin tabla noticias: todas las consultas fallan
+    rutas = ["/api/noticias?limit=5", "/api/noticias/3", "/api/meta", "/api/noticias/relacionadas?id=3&modo=tipo"]
+
+    def pedir(cliente):
+        return [cliente.get(ruta).status_code for ruta in rutas * 3]
+
+    pool, estados = _con_pool(sqlite3.connect(":memory:"), pedir)
+    assert estados == [500] * len(rutas) * 3, estados
+    assert pool.prestadas == 0 and len(pool.libres) == 1
+
+    # Con la tabla, el mismo pool de una conexión sigue atendiendo
+    pool, respuesta = _con_pool(crear_tabla_ejemplo(), lambda cliente: cliente.get("/api/noticias/3?fields=titulo"))
+    assert respuesta.status_code == 200 and respuesta.json["titulo"] == "Noticia 3"
+    assert pool.prestadas == 0
+
+
+def test_limit_y_page_invalidos():
+    """limit o page menores que 1 (o no numéricos) responden 400 sin pedir conexión"""
+    print("\n🧪 Probando limit y page inválidos...")
+    rutas = ["/api/noticias?limit=-5", "/api/noticias?page=0", "/api/noticias/filtrar?limit=abc",
+             "/api/noticias/buscar?q=lluvias&modo=like&page=-1", "/api/noticias/relacionadas?id=3&limit=0"]
+
+    def pedir(cliente):
+        return [cliente.get(ruta) for ruta in rutas]
+
+    pool, respuestas = _con_pool(crear_tabla_ejemplo(), pedir)
+    assert [r.status_code for r in respuestas] == [400] * len(rutas)
+    assert "limit" in respuestas[0].json["error"] and "page" in respuestas[1].json["error"]
+    assert pool.prestadas == 0
+
+
+if __name__ == "__main__":
+    test_consulta_fallida_devuelve_conexion()
+    test_limit_y_page_invalidos()
+    print("\n✅ Pruebas completadas")
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para noticias relacionadas (vecinos TF-IDF y muestra aleatoria)
+"""
+
+import sys
+import os
+import random
+import sqlite3
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import buscador
+import cache_respuestas
+from buscador import IndiceBusqueda
+from relacionadas import calcular_vecinos, guardar_vecinos, leer_similares, muestra_aleatoria
+from bd_prueba import CursorSQLite, ConexionSQLite, crear_tabla_ejemplo, crear_tabla_noticias, insertar_noticias
+
+NOTICIAS = [
+    {"id": 1, "titulo": "Huaicos en Huánuco bloquean la carretera central", "resumen": "Las lluvias activaron quebradas"},
+    {"id": 2, "titulo": "Carretera central bloqueada por huaico en Huánuco", "resumen": "Lluvias intensas en la región"},
+    {"id": 3, "titulo": "BCR mantiene la tasa de referencia", "resumen": "El directorio del banco central decidió"},
+    {"id": 4, "titulo": "Congreso aprueba reforma electoral", "resumen": "El pleno votó la reforma"},
+    {"id": 5, "titulo": "Nuevo huaico en Huánuco", "resumen": "Otra quebrada se activó por las lluvias"},
+]
+
+
+def test_similares():
+    """Las noticias que comparten términos raros son vecinas; las demás no"""
+    print("🧪 Probando vecinos por TF-IDF...")
+    indice = IndiceBusqueda()
+    # Relleno para que los términos del ejemplo sean poco frecuentes
+    indice.agregar(NOTICIAS + [{"id": 100 + i, "titulo": f"Tema {i}", "resumen": f"texto{i}"} for i in range(40)])
+
+    vecinos = indice.similares(1, limit=3)
+    assert [v for v, _ in vecinos[:2]] == [2, 5]
+    # 3 solo comparte "central": puede salir, pero muy por detrás
+    assert 1 not in dict(vecinos) and dict(vecinos).get(3, 0) < vecinos[1][1] / 2
+    assert all(0 < p <= 1 for _, p in vecinos)
+    assert indice.similares(999) == []
+
+    filas = calcular_vecinos([1], indice, k=2)
+    assert (1, 2, vecinos[0][1]) in filas and (2, 1, vecinos[0][1]) in filas
+    assert len(filas) == 4
+
+
+def test_vecinos_acotados():
+    """Una noticia popular no acumula más de K vecinos inversos, ni en memoria ni en la tabla"""
+    print("\n🧪 Probando recorte de vecinos inversos...")
+    indice = IndiceBusqueda()
+    # Copias de la noticia 1 con un término propio cada una: su vecina más cercana es la 1
+    parecidas = [dict(NOTICIAS[0], id=i, resumen=f"{NOTICIAS[0]['resumen']} extra{i}") for i in range(2, 8)]
+    indice.agregar([NOTICIAS[0]] + parecidas + [{"id": 100 + i, "titulo": f"Tema {i}", "resumen": f"texto{i}"} for i in range(80)])
+
+    filas = calcular_vecinos([n["id"] for n in parecidas], indice, k=2)
+    por_noticia = {}
+    for a, b, p in filas:
+        por_noticia.setdefault(a, []).append(p)
+    assert all(len(v) <= 2 for v in por_noticia.values())
+    assert len(por_noticia[1]) == 2
+
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE noticias_relacionadas (noticia_id INTEGER, relacionada_id INTEGER, puntuacion REAL, "
+                 "PRIMARY KEY (noticia_id, relacionada_id))")
+    conn.executemany("INSERT INTO noticias_relacionadas VALUES (?, ?, ?)", [(1, 50, 0.01), (1, 51, 0.02), (9, 50, 0.5)])
+    guardar_vecinos(ConexionSQLite(conn, clave="noticia_id, relacionada_id"), filas, k=2)
+    guardadas = conn.execute("SELECT relacionada_id, puntuacion FROM noticias_relacionadas WHERE noticia_id = 1").fetchall()
+    assert set(guardadas) == {(b, p) for a, b, p in filas if a == 1}
+    # Las noticias que este lote no toca se dejan como estaban
+    assert conn.execute("SELECT COUNT(*) FROM noticias_relacionadas WHERE noticia_id = 9").fetchone()[0] == 1
+
+
+def test_leer_similares():
+    """La lectura une la tabla de vecinos con noticias y excluye Peru21"""
+    print("\n🧪 Probando lectura de vecinos...")
+    conn = crear_tabla_ejemplo()
+    conn.execute("CREATE TABLE noticias_relacionadas (noticia_id INTEGER, relacionada_id INTEGER, puntuacion REAL)")
+    conn.executemany("INSERT INTO noticias_relacionadas VALUES (?, ?, ?)", [(1, 2, 0.5), (1, 3, 0.9), (1, 10, 1.0)])
+    rows = leer_similares(CursorSQLite(conn), 1, 5, ("id", "titulo"))
+    assert [r["id"] for r in rows] == [3, 2]
+
+
+def test_muestra_aleatoria():
+    """Sorteo por rango de ids sin repetir, sin la noticia base ni Peru21"""
+    print("\n🧪 Probando muestra aleatoria...")
+    cursor = CursorSQLite(crear_tabla_ejemplo())
+    rows = muestra_aleatoria(cursor, 7, 6, ("id", "titulo"), rnd=random.Random(3))
+    ids = [r["id"] for r in rows]
+    assert len(ids) == len(set(ids)) == 6
+    assert 7 not in ids and all(i % 10 for i in ids)
+    assert not any("RAND" in sql for sql in cursor.consultas)
+
+
+def test_sin_tabla_de_vecinos():
+    """Sin la tabla noticias_relacionadas, modo=similar responde por categoría en lugar de un 500"""
+    print("\n🧪 Probando relacionadas sin tabla de vecinos...")
+    import app as aplicacion
+
+    conn = crear_tabla_ejemplo()
+    original = aplicacion.get_connection
+    aplicacion.get_connection = lambda: ConexionSQLite(conn)
+    try:
+        respuesta = aplicacion.app.test_client().get("/api/noticias/relacionadas?id=2&limit=3&fields=id,categoria")
+    finally:
+        aplicacion.get_connection = original
+    assert respuesta.status_code == 200
+    assert len(respuesta.json) == 3 and all(r["categoria"] == "nacional" and r["id"] != 2 for r in respuesta.json)
+
+
+def test_vecinos_inversos_no_bastan():
+    """Una noticia con solo vecinos inversos calcula los suyos al pedirla, una vez"""
+    print("\n🧪 Probando cálculo diferido con vecinos inversos...")
+    import app as aplicacion
+
+    conn = crear_tabla_noticias()
+    insertar_noticias(conn, [dict(n, fuente="RPP") for n in NOTICIAS])
+    conn.execute("CREATE TABLE noticias_relacionadas (noticia_id INTEGER, relacionada_id INTEGER, puntuacion REAL, "
+                 "PRIMARY KEY (noticia_id, relacionada_id))")
+    conn.execute("CREATE TABLE vecinos_calculados (noticia_id INTEGER PRIMARY KEY)")
+    # La 3 se calculó después y dejó a la 1 como vecina inversa
+    conn.execute("INSERT INTO noticias_relacionadas VALUES (1, 3, 0.01)")
+    conn.execute("INSERT INTO vecinos_calculados VALUES (3)")
+    indice = IndiceBusqueda()
+    indice.agregar(NOTICIAS + [{"id": 100 + i, "titulo": f"Tema {i}", "resumen": f"texto{i}"} for i in range(40)])
+    indice.listo = True
+
+    originales = aplicacion.get_connection, cache_respuestas._cache, buscador._indice
+    aplicacion.get_connection = lambda: ConexionSQLite(conn, clave="noticia_id, relacionada_id")
+    buscador._indice = indice
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache_respuestas._cache = cache_respuestas.CacheRespuestas(ruta=os.path.join(carpeta, "r.sqlite3"))
+        aplicacion._generacion_indice = cache_respuestas._cache.generacion()
+        aplicacion._reescritura_indice = cache_respuestas._cache.generacion_reescritura()
+        try:
+            pedir = lambda: aplicacion.app.test_client().get("/api/noticias/relacionadas?id=1&limit=2&fields=id")
+            respuesta = pedir()
+            assert respuesta.status_code == 200 and [r["id"] for r in respuesta.json] == [2, 5]
+            assert [r[0] for r in conn.execute("SELECT noticia_id FROM vecinos_calculados ORDER BY noticia_id")] == [1, 3]
+            # Ya calculada: no se vuelve a calcular
+            indice.agregar([{"id": 6, "titulo": "Huaico en Huánuco bloquea la carretera central", "resumen": "Lluvias"}])
+            assert [r["id"] for r in pedir().json] == [2, 5]
+        finally:
+            aplicacion.get_connection, cache_respuestas._cache, buscador._indice = originales
+
+
+if __name__ == "__main__":
+    test_similares()
+    test_vecinos_acotados()
+    test_leer_similares()
+    test_muestra_aleatoria()
+    test_sin_tabla_de_vecinos()
+    test_vecinos_inversos_no_bastan()
+    print("\n✅ Pruebas completadas")
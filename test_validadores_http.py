@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Script de prueba para ETag / Last-Modified / 304 en la API
+"""
+
+import sys
+import os
+import tempfile
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("API_CACHE_SQLITE", os.path.join(tempfile.mkdtemp(), "respuestas.sqlite3"))
+
+import app as aplicacion
+from flask import jsonify
+
+llamadas = []
+
+
+@aplicacion.app.route("/_prueba/validadores/<categoria>")
+@aplicacion.validadores_http(aplicacion.CACHE_CONTROL_LISTADOS)
+def _vista_prueba(categoria):
+    llamadas.append(categoria)
+    return jsonify({"categoria": categoria})
+
+
+def test_etag_y_304():
+    """Un If-None-Match vigente recibe 304 sin ejecutar la vista"""
+    print("🧪 Probando ETag y 304...")
+    ultima = {"nacional": datetime(2024, 5, 1, 10, 0, 0)}
+    original = aplicacion.ultima_modificacion
+    aplicacion.ultima_modificacion = lambda fijos: ultima[fijos["categoria"]]
+    try:
+        cliente = aplicacion.app.test_client()
+        primera = cliente.get("/_prueba/validadores/nacional?page=1")
+        assert primera.status_code == 200 and len(llamadas) == 1
+        etag = primera.headers["ETag"]
+        assert etag.startswith('W/"')
+        assert primera.headers["Cache-Control"] == "public, no-cache"
+        assert primera.headers["Last-Modified"]
+
+        repetida = cliente.get("/_prueba/validadores/nacional?page=1", headers={"If-None-Match": etag})
+        assert repetida.status_code == 304 and repetida.headers["ETag"] == etag
+        assert len(llamadas) == 1
+
+        por_fecha = cliente.get("/_prueba/validadores/nacional?page=1",
+                                headers={"If-Modified-Since": primera.headers["Last-Modified"]})
+        assert por_fecha.status_code == 304 and len(llamadas) == 1
+
+        # Otra página tiene otro ETag
+        otra = cliente.get("/_prueba/validadores/nacional?page=2", headers={"If-None-Match": etag})
+        assert otra.status_code == 200 and otra.headers["ETag"] != etag
+
+        # Noticias nuevas en el filtro: el ETag cambia y se vuelve a ejecutar la vista
+        ultima["nacional"] = datetime(2024, 5, 1, 11, 0, 0)
+        nueva = cliente.get("/_prueba/validadores/nacional?page=1", headers={"If-None-Match": etag})
+        assert nueva.status_code == 200 and nueva.headers["ETag"] != etag and len(llamadas) == 3
+
+        # Sin BD no hay validadores, pero la vista responde
+        ultima["nacional"] = None
+        sin_bd = cliente.get("/_prueba/validadores/nacional?page=1", headers={"If-None-Match": etag})
+        assert sin_bd.status_code == 200 and "ETag" not in sin_bd.headers
+    finally:
+        aplicacion.ultima_modificacion = original
+
+
+if __name__ == "__main__":
+    test_etag_y_304()
+    print("\n✅ Pruebas completadas")